@@ -1,5 +1,5 @@
 import httpx
-from httpx_sse import connect_sse
+from httpx_sse import aconnect_sse
 from typing import Any, AsyncIterable
 from common.types import (
     AgentCard,
@@ -18,69 +18,218 @@ from common.types import (
     A2AClientJSONError,
     SendTaskStreamingRequest,
     SendTaskStreamingResponse,
+    TaskResubscriptionRequest,
 )
+import asyncio
+import importlib.util
 import json
+import random
+import weakref
+
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=200, max_keepalive_connections=50, keepalive_expiry=30
+)
+# 429 and 503 mean the agent rejected the request without processing it.
+RETRYABLE_STATUS_CODES = {429, 503}
+# A gateway error can arrive after the agent already accepted the request, so
+# it is only retried for methods that are safe to repeat.
+GATEWAY_STATUS_CODES = {502, 504}
+IDEMPOTENT_METHODS = {
+    "tasks/get",
+    "tasks/cancel",
+    "tasks/pushNotification/get",
+    "tasks/pushNotification/set",
+    "tasks/resubscribe",
+}
+# Only errors raised before the request reached the agent are retried, so a
+# task is never sent twice.
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Connections are bound to the event loop that opened them, so the shared
+# pool is kept per loop.
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_shared_http_client(
+    limits: httpx.Limits = DEFAULT_LIMITS, http2: bool | None = None
+) -> httpx.AsyncClient:
+    """Returns the keep-alive connection pool shared by A2AClients on this loop.
+
+    HTTP/2 is used when the optional ``h2`` package is installed.
+    """
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None or client.is_closed:
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+        client = httpx.AsyncClient(limits=limits, http2=http2)
+        _shared_clients[loop] = client
+    return client
+
+
+async def close_shared_http_client():
+    """Closes the shared pool of the running loop, e.g. on server shutdown."""
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
 
 
 class A2AClient:
-    def __init__(self, agent_card: AgentCard = None, url: str = None):
+    def __init__(
+        self,
+        agent_card: AgentCard = None,
+        url: str = None,
+        httpx_client: httpx.AsyncClient | None = None,
+        timeout: float = 30,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+    ):
         if agent_card:
             self.url = agent_card.url
         elif url:
             self.url = url
         else:
             raise ValueError("Must provide either agent_card or url")
+        self.httpx_client = httpx_client
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
 
-    async def send_task(self, payload: dict[str, Any]) -> SendTaskResponse:
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self.httpx_client is not None:
+            return self.httpx_client
+        return get_shared_http_client()
+
+    async def send_task(
+        self, payload: dict[str, Any], timeout: float | None = None
+    ) -> SendTaskResponse:
         request = SendTaskRequest(params=payload)
-        return SendTaskResponse(**await self._send_request(request))
+        return SendTaskResponse(**await self._send_request(request, timeout))
 
     async def send_task_streaming(
-        self, payload: dict[str, Any]
+        self, payload: dict[str, Any], timeout: float | None = None
     ) -> AsyncIterable[SendTaskStreamingResponse]:
         request = SendTaskStreamingRequest(params=payload)
-        with httpx.Client(timeout=None) as client:
-            with connect_sse(
-                client, "POST", self.url, json=request.model_dump()
+        async for response in self._stream_request(request, timeout=timeout):
+            yield response
+
+    async def resubscribe_task(
+        self,
+        payload: dict[str, Any],
+        last_event_id: int | None = None,
+        timeout: float | None = None,
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        request = TaskResubscriptionRequest(params=payload)
+        headers = {}
+        if last_event_id is not None:
+            headers["Last-Event-ID"] = str(last_event_id)
+        async for response in self._stream_request(request, headers, timeout):
+            yield response
+
+    async def _stream_request(
+        self,
+        request: JSONRPCRequest,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        # Remote agents can stream for a long time, only bound the connect.
+        stream_timeout = httpx.Timeout(timeout or self.timeout, read=None)
+        try:
+            async with aconnect_sse(
+                self.client,
+                "POST",
+                self.url,
+                json=request.model_dump(),
+                headers=dict(headers or {}),
+                timeout=stream_timeout,
             ) as event_source:
-                try:
-                    for sse in event_source.iter_sse():
-                        yield SendTaskStreamingResponse(**json.loads(sse.data))
-                except json.JSONDecodeError as e:
-                    raise A2AClientJSONError(str(e)) from e
-                except httpx.RequestError as e:
-                    raise A2AClientHTTPError(400, str(e)) from e
-
-    async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+                event_source.response.raise_for_status()
+                async for sse in event_source.aiter_sse():
+                    yield self._to_streaming_response(sse)
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+        except httpx.RequestError as e:
+            raise A2AClientHTTPError(400, str(e)) from e
+
+    def _to_streaming_response(self, sse) -> SendTaskStreamingResponse:
+        response = SendTaskStreamingResponse(**json.loads(sse.data))
+        if sse.id and sse.id.isdigit():
+            # Remember the event id so callers can resume via resubscribe_task.
+            response._event_id = int(sse.id)
+        return response
+
+    async def _send_request(
+        self, request: JSONRPCRequest, timeout: float | None = None
+    ) -> dict[str, Any]:
+        retryable_status_codes = RETRYABLE_STATUS_CODES
+        if request.method in IDEMPOTENT_METHODS:
+            retryable_status_codes = RETRYABLE_STATUS_CODES | GATEWAY_STATUS_CODES
+        attempt = 0
+        while True:
             try:
-                # Image generation could take time, adding timeout
-                response = await client.post(
-                    self.url, json=request.model_dump(), timeout=30
+                response = await self.client.post(
+                    self.url,
+                    json=request.model_dump(),
+                    timeout=timeout or self.timeout,
                 )
+                if (
+                    response.status_code in retryable_status_codes
+                    and attempt < self.max_retries
+                ):
+                    await self._backoff(attempt, response)
+                    attempt += 1
+                    continue
                 response.raise_for_status()
                 return response.json()
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise A2AClientHTTPError(503, str(e)) from e
+                await self._backoff(attempt)
+                attempt += 1
             except httpx.HTTPStatusError as e:
                 raise A2AClientHTTPError(e.response.status_code, str(e)) from e
             except json.JSONDecodeError as e:
                 raise A2AClientJSONError(str(e)) from e
 
-    async def get_task(self, payload: dict[str, Any]) -> GetTaskResponse:
+    async def _backoff(self, attempt: int, response: httpx.Response | None = None):
+        # Full jitter keeps many clients from retrying in lockstep.
+        delay = random.uniform(0, self.retry_backoff * (2**attempt))
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after and retry_after.isdigit():
+                # Never retry before the server's Retry-After; jitter on top.
+                delay += float(retry_after)
+        await asyncio.sleep(delay)
+
+    async def get_task(
+        self, payload: dict[str, Any], timeout: float | None = None
+    ) -> GetTaskResponse:
         request = GetTaskRequest(params=payload)
-        return GetTaskResponse(**await self._send_request(request))
+        return GetTaskResponse(**await self._send_request(request, timeout))
 
-    async def cancel_task(self, payload: dict[str, Any]) -> CancelTaskResponse:
+    async def cancel_task(
+        self, payload: dict[str, Any], timeout: float | None = None
+    ) -> CancelTaskResponse:
         request = CancelTaskRequest(params=payload)
-        return CancelTaskResponse(**await self._send_request(request))
+        return CancelTaskResponse(**await self._send_request(request, timeout))
 
     async def set_task_callback(
-        self, payload: dict[str, Any]
+        self, payload: dict[str, Any], timeout: float | None = None
     ) -> SetTaskPushNotificationResponse:
         request = SetTaskPushNotificationRequest(params=payload)
-        return SetTaskPushNotificationResponse(**await self._send_request(request))
+        return SetTaskPushNotificationResponse(
+            **await self._send_request(request, timeout)
+        )
 
     async def get_task_callback(
-        self, payload: dict[str, Any]
+        self, payload: dict[str, Any], timeout: float | None = None
     ) -> GetTaskPushNotificationResponse:
         request = GetTaskPushNotificationRequest(params=payload)
-        return GetTaskPushNotificationResponse(**await self._send_request(request))
+        return GetTaskPushNotificationResponse(
+            **await self._send_request(request, timeout)
+        )
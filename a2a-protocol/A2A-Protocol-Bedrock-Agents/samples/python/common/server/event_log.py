@@ -0,0 +1,84 @@
+"""Replayable per-task log of streaming events."""
+
+from collections import deque
+from itertools import islice
+from typing import Any
+import asyncio
+import time
+
+
+class EventLogOverflowError(Exception):
+    """Raised when a reader asks for events that were already dropped."""
+
+
+class EventLogCursorError(Exception):
+    """Raised when a reader's cursor is past the newest event in the log."""
+
+
+class TaskEventLog:
+    """Bounded ring buffer of events for one task, numbered from 1.
+
+    Readers keep their own cursor (the last sequence number they have seen)
+    instead of owning a queue, so memory stays at ``maxlen`` events per task
+    no matter how many subscribers there are. A reader that falls more than
+    ``maxlen`` events behind gets an EventLogOverflowError and is dropped.
+
+    Args:
+        maxlen: Maximum number of events kept for replay.
+    """
+
+    def __init__(self, maxlen: int = 256):
+        self.events: deque[tuple[int, Any]] = deque(maxlen=maxlen)
+        self.last_seq = 0
+        # Cursor just before the current (or last) streaming turn
+        self.turn_start = 0
+        self.closed = False
+        self.closed_at: float | None = None
+        self._condition = asyncio.Condition()
+
+    @property
+    def first_seq(self) -> int:
+        return self.events[0][0] if self.events else self.last_seq + 1
+
+    async def append(self, event: Any, final: bool = False) -> int:
+        async with self._condition:
+            self.last_seq += 1
+            self.events.append((self.last_seq, event))
+            if final:
+                self.closed = True
+                self.closed_at = time.monotonic()
+            self._condition.notify_all()
+            return self.last_seq
+
+    def reopen(self) -> int:
+        """Starts a new streaming turn on the task and returns its cursor."""
+        self.closed = False
+        self.closed_at = None
+        self.turn_start = self.last_seq
+        return self.turn_start
+
+    def check_cursor(self, cursor: int) -> None:
+        """Raises EventLogCursorError if ``cursor`` is not a position in this log."""
+        if cursor < 0 or cursor > self.last_seq:
+            raise EventLogCursorError(
+                f"Event {cursor} does not exist, newest event is {self.last_seq}"
+            )
+
+    async def read_after(self, cursor: int) -> list[tuple[int, Any]]:
+        """Waits for events newer than ``cursor`` and returns them.
+
+        Returns an empty list once the log is closed and fully read.
+        """
+        async with self._condition:
+            # A stale or foreign Last-Event-ID would otherwise wait forever
+            self.check_cursor(cursor)
+            await self._condition.wait_for(
+                lambda: self.last_seq > cursor or self.closed
+            )
+            first_seq = self.first_seq
+            if cursor < first_seq - 1:
+                raise EventLogOverflowError(
+                    f"Events after {cursor} are no longer available, "
+                    f"oldest retained event is {first_seq}"
+                )
+            return list(islice(self.events, cursor - first_seq + 1, None))
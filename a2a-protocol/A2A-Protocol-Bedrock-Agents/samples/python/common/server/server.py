@@ -81,6 +81,7 @@ class A2AServer:
             elif isinstance(json_rpc_request, GetTaskPushNotificationRequest):
                 result = await self.task_manager.on_get_task_push_notification(json_rpc_request)
             elif isinstance(json_rpc_request, TaskResubscriptionRequest):
+                self._apply_last_event_id(request, json_rpc_request)
                 result = await self.task_manager.on_resubscribe_to_task(
                     json_rpc_request
                 )
@@ -93,6 +94,19 @@ class A2AServer:
         except Exception as e:
             return self._handle_exception(e)
 
+    def _apply_last_event_id(
+        self, request: Request, json_rpc_request: TaskResubscriptionRequest
+    ):
+        """Lets EventSource clients resume via the standard Last-Event-ID header."""
+        last_event_id = request.headers.get("last-event-id")
+        if not last_event_id:
+            return
+
+        params = json_rpc_request.params
+        if params.metadata is None:
+            params.metadata = {}
+        params.metadata.setdefault("lastEventId", last_event_id)
+
     def _handle_exception(self, e: Exception) -> JSONResponse:
         if isinstance(e, json.decoder.JSONDecodeError):
             json_rpc_error = JSONParseError()
@@ -110,7 +124,11 @@ class A2AServer:
 
             async def event_generator(result) -> AsyncIterable[dict[str, str]]:
                 async for item in result:
-                    yield {"data": item.model_dump_json(exclude_none=True)}
+                    event = {"data": item.model_dump_json(exclude_none=True)}
+                    event_id = getattr(item, "_event_id", None)
+                    if event_id is not None:
+                        event["id"] = str(event_id)
+                    yield event
 
             return EventSourceResponse(event_generator(result))
         elif isinstance(result, JSONRPCResponse):
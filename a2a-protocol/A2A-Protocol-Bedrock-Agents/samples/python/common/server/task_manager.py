@@ -28,12 +28,17 @@ from common.types import (
     PushNotificationConfig,
     TaskStatusUpdateEvent,
     JSONRPCError,
+    Message,
     TaskPushNotificationConfig,
     InternalError,
+    InvalidParamsError,
 )
-from common.server.utils import new_not_implemented_error
+from common.server.task_store import TaskStore, InMemoryTaskStore
+from common.server.event_log import TaskEventLog, EventLogCursorError, EventLogOverflowError
+from collections import OrderedDict
 import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -76,19 +81,32 @@ class TaskManager(ABC):
 
 
 class InMemoryTaskManager(TaskManager):
-    def __init__(self):
-        self.tasks: dict[str, Task] = {}
-        self.push_notification_infos: dict[str, PushNotificationConfig] = {}
-        self.lock = asyncio.Lock()
-        self.task_sse_subscribers: dict[str, List[asyncio.Queue]] = {}
+    def __init__(
+        self,
+        task_store: TaskStore | None = None,
+        lock_stripes: int = 64,
+        max_history: int | None = 100,
+        event_log_size: int = 256,
+        event_log_ttl: float = 300,
+        max_event_logs: int = 10_000,
+    ):
+        self.task_store = task_store if task_store is not None else InMemoryTaskStore()
+        self.max_history = max_history
+        # Updates to one task are serialized on its stripe, so unrelated tasks
+        # no longer contend on a single global lock.
+        self.task_locks = [asyncio.Lock() for _ in range(lock_stripes)]
+        self.event_log_size = event_log_size
+        self.event_log_ttl = event_log_ttl
+        self.max_event_logs = max_event_logs
+        self.task_event_logs: OrderedDict[str, TaskEventLog] = OrderedDict()
         self.subscriber_lock = asyncio.Lock()
 
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         logger.info(f"Getting task {request.params.id}")
         task_query_params: TaskQueryParams = request.params
 
-        async with self.lock:
-            task = self.tasks.get(task_query_params.id)
+        async with self.task_lock(task_query_params.id):
+            task = await self.task_store.get(task_query_params.id)
             if task is None:
                 return GetTaskResponse(id=request.id, error=TaskNotFoundError())
 
@@ -102,8 +120,8 @@ class InMemoryTaskManager(TaskManager):
         logger.info(f"Cancelling task {request.params.id}")
         task_id_params: TaskIdParams = request.params
 
-        async with self.lock:
-            task = self.tasks.get(task_id_params.id)
+        async with self.task_lock(task_id_params.id):
+            task = await self.task_store.get(task_id_params.id)
             if task is None:
                 return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
 
@@ -120,28 +138,29 @@ class InMemoryTaskManager(TaskManager):
         pass
 
     async def set_push_notification_info(self, task_id: str, notification_config: PushNotificationConfig):
-        async with self.lock:
-            task = self.tasks.get(task_id)
+        async with self.task_lock(task_id):
+            task = await self.task_store.get(task_id)
             if task is None:
                 raise ValueError(f"Task not found for {task_id}")
 
-            self.push_notification_infos[task_id] = notification_config
+            await self.task_store.set_push_notification_info(task_id, notification_config)
 
         return
     
     async def get_push_notification_info(self, task_id: str) -> PushNotificationConfig:
-        async with self.lock:
-            task = self.tasks.get(task_id)
+        async with self.task_lock(task_id):
+            task = await self.task_store.get(task_id)
             if task is None:
                 raise ValueError(f"Task not found for {task_id}")
 
-            return self.push_notification_infos[task_id]
-            
-        return
+            notification_config = await self.task_store.get_push_notification_info(task_id)
+            if notification_config is None:
+                raise ValueError(f"Push notification info not found for {task_id}")
+
+            return notification_config
     
     async def has_push_notification_info(self, task_id: str) -> bool:
-        async with self.lock:
-            return task_id in self.push_notification_infos
+        return await self.task_store.get_push_notification_info(task_id) is not None
             
 
     async def on_set_task_push_notification(
@@ -184,8 +203,8 @@ class InMemoryTaskManager(TaskManager):
 
     async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
         logger.info(f"Upserting task {task_send_params.id}")
-        async with self.lock:
-            task = self.tasks.get(task_send_params.id)
+        async with self.task_lock(task_send_params.id):
+            task = await self.task_store.get(task_send_params.id)
             if task is None:
                 task = Task(
                     id=task_send_params.id,
@@ -194,39 +213,68 @@ class InMemoryTaskManager(TaskManager):
                     status=TaskStatus(state=TaskState.SUBMITTED),
                     history=[task_send_params.message],
                 )
-                self.tasks[task_send_params.id] = task
             else:
-                task.history.append(task_send_params.message)
+                self.append_history_message(task, task_send_params.message)
 
+            await self.task_store.save(task)
             return task
 
     async def on_resubscribe_to_task(
         self, request: TaskResubscriptionRequest
     ) -> Union[AsyncIterable[SendTaskStreamingResponse], JSONRPCResponse]:
-        return new_not_implemented_error(request.id)
+        task_id_params: TaskIdParams = request.params
+        last_event_id = None
+        if task_id_params.metadata and task_id_params.metadata.get("lastEventId") is not None:
+            try:
+                last_event_id = int(task_id_params.metadata["lastEventId"])
+            except (TypeError, ValueError):
+                return JSONRPCResponse(
+                    id=request.id,
+                    error=InvalidParamsError(message="lastEventId must be an integer"),
+                )
+
+        try:
+            cursor = await self.setup_sse_consumer(task_id_params.id, True, last_event_id)
+        except ValueError as e:
+            logger.error(f"Error while reconnecting to SSE stream: {e}")
+            return JSONRPCResponse(id=request.id, error=TaskNotFoundError())
+        except EventLogCursorError as e:
+            return JSONRPCResponse(id=request.id, error=InvalidParamsError(message=str(e)))
+
+        return self.dequeue_events_for_sse(request.id, task_id_params.id, cursor)
 
     async def update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
-        async with self.lock:
-            try:
-                task = self.tasks[task_id]
-            except KeyError:
+        async with self.task_lock(task_id):
+            task = await self.task_store.get(task_id)
+            if task is None:
                 logger.error(f"Task {task_id} not found for updating the task")
                 raise ValueError(f"Task {task_id} not found")
 
             task.status = status
 
             if status.message is not None:
-                task.history.append(status.message)
+                self.append_history_message(task, status.message)
 
             if artifacts is not None:
                 if task.artifacts is None:
                     task.artifacts = []
                 task.artifacts.extend(artifacts)
 
+            await self.task_store.save(task)
             return task
 
+    def task_lock(self, task_id: str) -> asyncio.Lock:
+        return self.task_locks[hash(task_id) % len(self.task_locks)]
+
+    def append_history_message(self, task: Task, message: Message):
+        if task.history is None:
+            task.history = []
+        task.history.append(message)
+        if self.max_history is not None and len(task.history) > self.max_history:
+            del task.history[: len(task.history) - self.max_history]
+
     def append_task_history(self, task: Task, historyLength: int | None):
         new_task = task.model_copy()
         if historyLength is not None and historyLength > 0:
@@ -236,42 +284,92 @@ class InMemoryTaskManager(TaskManager):
 
         return new_task        
 
-    async def setup_sse_consumer(self, task_id: str, is_resubscribe: bool = False):
+    async def setup_sse_consumer(
+        self, task_id: str, is_resubscribe: bool = False, last_event_id: int | None = None
+    ) -> int:
+        """Registers a reader on the task's event log and returns its cursor."""
         async with self.subscriber_lock:
-            if task_id not in self.task_sse_subscribers:
+            self._expire_event_logs()
+            event_log = self.task_event_logs.get(task_id)
+            if event_log is None:
                 if is_resubscribe:
                     raise ValueError("Task not found for resubscription")
-                else:
-                    self.task_sse_subscribers[task_id] = []
+                event_log = self._create_event_log(task_id)
 
-            sse_event_queue = asyncio.Queue(maxsize=0) # <=0 is unlimited
-            self.task_sse_subscribers[task_id].append(sse_event_queue)
-            return sse_event_queue
+            if not is_resubscribe:
+                return event_log.reopen()
+            if last_event_id is not None:
+                event_log.check_cursor(last_event_id)
+                return last_event_id
+            # Earlier turns may still be in the buffer; their final events
+            # would end the stream before the current turn is replayed.
+            return max(event_log.turn_start, event_log.first_seq - 1)
 
     async def enqueue_events_for_sse(self, task_id, task_update_event):
         async with self.subscriber_lock:
-            if task_id not in self.task_sse_subscribers:
-                return
+            event_log = self.task_event_logs.get(task_id)
+            if event_log is None:
+                event_log = self._create_event_log(task_id)
+            else:
+                self.task_event_logs.move_to_end(task_id)
 
-            current_subscribers = self.task_sse_subscribers[task_id]
-            for subscriber in current_subscribers:
-                await subscriber.put(task_update_event)
+        final = isinstance(task_update_event, JSONRPCError) or (
+            isinstance(task_update_event, TaskStatusUpdateEvent) and task_update_event.final
+        )
+        await event_log.append(task_update_event, final=final)
 
     async def dequeue_events_for_sse(
-        self, request_id, task_id, sse_event_queue: asyncio.Queue
+        self, request_id, task_id, cursor: int
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
-        try:
-            while True:                
-                event = await sse_event_queue.get()
-                if isinstance(event, JSONRPCError):
-                    yield SendTaskStreamingResponse(id=request_id, error=event)
-                    break
-                                                
-                yield SendTaskStreamingResponse(id=request_id, result=event)
-                if isinstance(event, TaskStatusUpdateEvent) and event.final:
-                    break
-        finally:
-            async with self.subscriber_lock:
-                if task_id in self.task_sse_subscribers:
-                    self.task_sse_subscribers[task_id].remove(sse_event_queue)
+        event_log = self.task_event_logs.get(task_id)
+        if event_log is None:
+            yield SendTaskStreamingResponse(id=request_id, error=TaskNotFoundError())
+            return
+
+        while True:
+            try:
+                entries = await event_log.read_after(cursor)
+            except EventLogCursorError as e:
+                yield SendTaskStreamingResponse(
+                    id=request_id, error=InvalidParamsError(message=str(e))
+                )
+                return
+            except EventLogOverflowError as e:
+                logger.warning(f"Dropping slow subscriber for task {task_id}: {e}")
+                yield SendTaskStreamingResponse(
+                    id=request_id, error=InternalError(message=str(e))
+                )
+                return
 
+            if not entries:
+                return
+
+            for cursor, event in entries:
+                if isinstance(event, JSONRPCError):
+                    response = SendTaskStreamingResponse(id=request_id, error=event)
+                else:
+                    response = SendTaskStreamingResponse(id=request_id, result=event)
+                response._event_id = cursor
+                yield response
+
+                if isinstance(event, JSONRPCError) or (
+                    isinstance(event, TaskStatusUpdateEvent) and event.final
+                ):
+                    return
+
+    def _create_event_log(self, task_id: str) -> TaskEventLog:
+        event_log = TaskEventLog(maxlen=self.event_log_size)
+        self.task_event_logs[task_id] = event_log
+        while len(self.task_event_logs) > self.max_event_logs:
+            self.task_event_logs.popitem(last=False)
+        return event_log
+
+    def _expire_event_logs(self):
+        now = time.monotonic()
+        expired = [
+            task_id
+            for task_id, event_log in self.task_event_logs.items()
+            if event_log.closed and now - event_log.closed_at > self.event_log_ttl
+        ]
+        for task_id in expired:
+            del self.task_event_logs[task_id]
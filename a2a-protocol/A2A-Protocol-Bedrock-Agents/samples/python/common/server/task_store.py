@@ -0,0 +1,291 @@
+"""Task store backends used by InMemoryTaskManager."""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from common.types import Task, TaskState, PushNotificationConfig
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = {TaskState.COMPLETED, TaskState.CANCELED, TaskState.FAILED}
+
+
+def is_terminal(task: Task) -> bool:
+    return task.status is not None and task.status.state in TERMINAL_STATES
+
+
+def _pack(task: Task) -> bytes:
+    return zlib.compress(task.model_dump_json(exclude_none=True).encode("utf-8"))
+
+
+def _unpack(data: bytes) -> Task:
+    return Task.model_validate_json(zlib.decompress(data))
+
+
+class TaskStore(ABC):
+    """Storage interface for tasks and their push notification configs.
+
+    Implementations only need to be safe for a single event loop; per-task
+    serialization of read-modify-write cycles is done by the task manager.
+    """
+
+    @abstractmethod
+    async def get(self, task_id: str) -> Task | None:
+        pass
+
+    @abstractmethod
+    async def save(self, task: Task) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, task_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def set_push_notification_info(
+        self, task_id: str, config: PushNotificationConfig
+    ) -> None:
+        pass
+
+    @abstractmethod
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> PushNotificationConfig | None:
+        pass
+
+
+class InMemoryTaskStore(TaskStore):
+    """Bounded in-memory store with LRU eviction and TTL for finished tasks.
+
+    Active tasks are kept as live objects. Once a task reaches a terminal
+    state it is frozen into a compressed JSON blob, which keeps the retained
+    history small, and it expires after ``completed_ttl`` seconds.
+
+    Args:
+        max_tasks: Maximum number of active tasks kept before the least
+            recently used one is evicted.
+        max_completed: Maximum number of finished tasks kept.
+        completed_ttl: Seconds a finished task stays readable.
+    """
+
+    def __init__(
+        self,
+        max_tasks: int = 10_000,
+        max_completed: int = 10_000,
+        completed_ttl: float = 3600,
+    ):
+        self.max_tasks = max_tasks
+        self.max_completed = max_completed
+        self.completed_ttl = completed_ttl
+        self._active: OrderedDict[str, Task] = OrderedDict()
+        self._completed: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._push_notification_infos: dict[str, PushNotificationConfig] = {}
+
+    async def get(self, task_id: str) -> Task | None:
+        task = self._active.get(task_id)
+        if task is not None:
+            self._active.move_to_end(task_id)
+            return task
+
+        entry = self._completed.get(task_id)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if time.monotonic() > expires_at:
+            self._forget(task_id)
+            return None
+        self._completed.move_to_end(task_id)
+        return _unpack(data)
+
+    async def save(self, task: Task) -> None:
+        if is_terminal(task):
+            self._active.pop(task.id, None)
+            self._completed[task.id] = (
+                time.monotonic() + self.completed_ttl,
+                _pack(task),
+            )
+            self._completed.move_to_end(task.id)
+        else:
+            self._completed.pop(task.id, None)
+            self._active[task.id] = task
+            self._active.move_to_end(task.id)
+        self._evict()
+
+    async def delete(self, task_id: str) -> None:
+        self._forget(task_id)
+
+    async def set_push_notification_info(
+        self, task_id: str, config: PushNotificationConfig
+    ) -> None:
+        self._push_notification_infos[task_id] = config
+
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> PushNotificationConfig | None:
+        return self._push_notification_infos.get(task_id)
+
+    def __len__(self) -> int:
+        return len(self._active) + len(self._completed)
+
+    def _forget(self, task_id: str) -> None:
+        self._active.pop(task_id, None)
+        self._completed.pop(task_id, None)
+        self._push_notification_infos.pop(task_id, None)
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        # Scanning from the LRU end is enough to keep memory bounded; expired
+        # entries further back are dropped lazily by get().
+        while self._completed:
+            task_id, (expires_at, _) = next(iter(self._completed.items()))
+            if expires_at > now and len(self._completed) <= self.max_completed:
+                break
+            self._forget(task_id)
+
+        while len(self._active) > self.max_tasks:
+            task_id = next(iter(self._active))
+            logger.warning(f"Evicting active task {task_id}, task store is full")
+            self._forget(task_id)
+
+
+class SQLiteTaskStore(TaskStore):
+    """On-disk store backed by SQLite.
+
+    Tasks are stored as compressed JSON. Finished tasks older than
+    ``completed_ttl`` seconds are purged, and the table is capped at
+    ``max_tasks`` rows by dropping the least recently updated tasks.
+
+    Args:
+        path: Database file path, ``":memory:"`` for a throwaway store.
+        max_tasks: Maximum number of rows kept in the tasks table.
+        completed_ttl: Seconds a finished task stays readable.
+        purge_interval: Minimum seconds between two purge passes.
+    """
+
+    def __init__(
+        self,
+        path: str = "a2a_tasks.db",
+        max_tasks: int = 100_000,
+        completed_ttl: float = 24 * 3600,
+        purge_interval: float = 60,
+    ):
+        self.max_tasks = max_tasks
+        self.completed_ttl = completed_ttl
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " id TEXT PRIMARY KEY,"
+                " terminal INTEGER NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " data BLOB NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS tasks_updated_at ON tasks (updated_at)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS push_notifications ("
+                " task_id TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    async def _run(self, fn, *args):
+        return await asyncio.to_thread(self._locked, fn, *args)
+
+    def _locked(self, fn, *args):
+        with self._db_lock:
+            return fn(*args)
+
+    async def get(self, task_id: str) -> Task | None:
+        row = await self._run(self._get_row, task_id)
+        if row is None:
+            return None
+        return _unpack(row[0])
+
+    def _get_row(self, task_id: str):
+        return self._conn.execute(
+            "SELECT data FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+
+    async def save(self, task: Task) -> None:
+        await self._run(self._save_row, task.id, int(is_terminal(task)), _pack(task))
+
+    def _save_row(self, task_id: str, terminal: int, data: bytes) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO tasks (id, terminal, updated_at, data) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(id) DO UPDATE SET"
+            " terminal = excluded.terminal,"
+            " updated_at = excluded.updated_at,"
+            " data = excluded.data",
+            (task_id, terminal, now, data),
+        )
+        if now - self._last_purge >= self.purge_interval:
+            self._purge(now)
+        self._conn.commit()
+
+    def _purge(self, now: float) -> None:
+        self._last_purge = now
+        self._conn.execute(
+            "DELETE FROM tasks WHERE terminal = 1 AND updated_at < ?",
+            (now - self.completed_ttl,),
+        )
+        self._conn.execute(
+            "DELETE FROM tasks WHERE id IN ("
+            " SELECT id FROM tasks ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_tasks,),
+        )
+        self._conn.execute(
+            "DELETE FROM push_notifications"
+            " WHERE task_id NOT IN (SELECT id FROM tasks)"
+        )
+
+    async def delete(self, task_id: str) -> None:
+        await self._run(self._delete_row, task_id)
+
+    def _delete_row(self, task_id: str) -> None:
+        self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        self._conn.execute(
+            "DELETE FROM push_notifications WHERE task_id = ?", (task_id,)
+        )
+        self._conn.commit()
+
+    async def set_push_notification_info(
+        self, task_id: str, config: PushNotificationConfig
+    ) -> None:
+        await self._run(self._set_push_row, task_id, config.model_dump_json())
+
+    def _set_push_row(self, task_id: str, data: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO push_notifications (task_id, data) VALUES (?, ?)",
+            (task_id, data),
+        )
+        self._conn.commit()
+
+    async def get_push_notification_info(
+        self, task_id: str
+    ) -> PushNotificationConfig | None:
+        row = await self._run(self._get_push_row, task_id)
+        if row is None:
+            return None
+        return PushNotificationConfig.model_validate_json(row[0])
+
+    def _get_push_row(self, task_id: str):
+        return self._conn.execute(
+            "SELECT data FROM push_notifications WHERE task_id = ?", (task_id,)
+        ).fetchone()
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._conn.close()
@@ -159,12 +159,12 @@ class AgentTaskManager(InMemoryTaskManager):
                     return JSONRPCResponse(id=request.id, error=InvalidParamsError(message="Push notification URL is invalid"))
 
             task_send_params: TaskSendParams = request.params
-            sse_event_queue = await self.setup_sse_consumer(task_send_params.id, False)            
+            cursor = await self.setup_sse_consumer(task_send_params.id, False)
 
             asyncio.create_task(self._run_streaming_agent(request))
 
             return self.dequeue_events_for_sse(
-                request.id, task_send_params.id, sse_event_queue
+                request.id, task_send_params.id, cursor
             )
         except Exception as e:
             logger.error(f"Error in SSE stream: {e}")
@@ -220,22 +220,6 @@ class AgentTaskManager(InMemoryTaskManager):
             data=task.model_dump(exclude_none=True)
         )
 
-    async def on_resubscribe_to_task(
-        self, request
-    ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
-        task_id_params: TaskIdParams = request.params
-        try:
-            sse_event_queue = await self.setup_sse_consumer(task_id_params.id, True)
-            return self.dequeue_events_for_sse(request.id, task_id_params.id, sse_event_queue)
-        except Exception as e:
-            logger.error(f"Error while reconnecting to SSE stream: {e}")
-            return JSONRPCResponse(
-                id=request.id,
-                error=InternalError(
-                    message=f"An error occurred while reconnecting to stream: {e}"
-                ),
-            )
-    
     async def set_push_notification_info(self, task_id: str, push_notification_config: PushNotificationConfig):
         # Verify the ownership of notification URL by issuing a challenge request.
         is_verified = await self.notification_sender_auth.verify_push_notification_url(push_notification_config.url)
@@ -2,7 +2,7 @@ from typing import Union, Any
 from pydantic import BaseModel, Field, TypeAdapter
 from typing import Literal, List, Annotated, Optional
 from datetime import datetime
-from pydantic import model_validator, ConfigDict, field_serializer
+from pydantic import model_validator, ConfigDict, field_serializer, PrivateAttr
 from uuid import uuid4
 from enum import Enum
 from typing_extensions import Self
@@ -181,6 +181,8 @@ class SendTaskStreamingRequest(JSONRPCRequest):
 
 class SendTaskStreamingResponse(JSONRPCResponse):
     result: TaskStatusUpdateEvent | TaskArtifactUpdateEvent | None = None
+    # Sequence number in the task's event log, sent as the SSE event id.
+    _event_id: int | None = PrivateAttr(default=None)
 
 
 class GetTaskRequest(JSONRPCRequest):
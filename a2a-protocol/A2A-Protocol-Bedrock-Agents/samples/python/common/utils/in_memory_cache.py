@@ -1,48 +1,124 @@
 """In Memory Cache utility."""
 
+import asyncio
+import sys
 import threading
 import time
-from typing import Any, Dict, Optional
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
 
+_MISSING = object()
 
-class InMemoryCache:
-    """A thread-safe Singleton class to manage cache data.
 
-    Ensures only one instance of the cache exists across the application.
-    """
+def _sweep_loop(cache_ref: "weakref.ref[InMemoryCache]", stop: threading.Event, interval: float) -> None:
+    # Only a weak reference is held, so an unclosed cache can still be
+    # collected; its finalizer sets ``stop`` and the thread exits.
+    while not stop.wait(interval):
+        cache = cache_ref()
+        if cache is None:
+            return
+        cache.sweep()
+        del cache
 
-    _instance: Optional["InMemoryCache"] = None
-    _lock: threading.Lock = threading.Lock()
-    _initialized: bool = False
 
-    def __new__(cls):
-        """Override __new__ to control instance creation (Singleton pattern).
+@dataclass
+class CacheStats:
+    """Counters reported by InMemoryCache.stats()."""
 
-        Uses a lock to ensure thread safety during the first instantiation.
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
 
-        Returns:
-            The singleton instance of InMemoryCache.
-        """
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-        return cls._instance
 
-    def __init__(self):
-        """Initialize the cache storage.
+class _Shard:
+    """One LRU partition of the cache with its own lock."""
 
-        Uses a flag (_initialized) to ensure this logic runs only on the very first
-        creation of the singleton instance.
-        """
-        if not self._initialized:
-            with self._lock:
-                if not self._initialized:
-                    # print("Initializing SessionCache storage")
-                    self._cache_data: Dict[str, Dict[str, Any]] = {}
-                    self._ttl: Dict[str, float] = {}
-                    self._data_lock: threading.Lock = threading.Lock()
-                    self._initialized = True
+    def __init__(self, max_entries: Optional[int], max_bytes: Optional[int]):
+        self.lock = threading.Lock()
+        # key -> (value, expires_at or None, size in bytes)
+        self.data: "OrderedDict[str, tuple[Any, Optional[float], int]]" = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.stats = CacheStats()
+
+    def pop(self, key: str) -> None:
+        _, _, size = self.data.pop(key)
+        self.bytes -= size
+
+    def evict_overflow(self) -> None:
+        while self.data and (
+            (self.max_entries is not None and len(self.data) > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            _, (_, _, size) = self.data.popitem(last=False)
+            self.bytes -= size
+            self.stats.evictions += 1
+
+    def sweep(self, now: float) -> None:
+        expired = [
+            key
+            for key, (_, expires_at, _) in self.data.items()
+            if expires_at is not None and now > expires_at
+        ]
+        for key in expired:
+            self.pop(key)
+        self.stats.expirations += len(expired)
+
+
+class InMemoryCache:
+    """A thread-safe, sharded LRU cache with per-key TTL.
+
+    Keys are spread over independently locked shards so concurrent callers
+    rarely contend. Each shard enforces its share of ``max_entries`` and
+    ``max_bytes`` by evicting least recently used keys, and a background
+    thread removes expired keys even if they are never read again.
+
+    Args:
+        num_shards: Number of independently locked partitions.
+        max_entries: Maximum number of keys across all shards, or None.
+        max_bytes: Approximate maximum size of all values, or None.
+        sweep_interval: Seconds between background expiry sweeps, or None to
+            only expire keys lazily on access.
+        sizeof: Function used to estimate the size of a value in bytes.
+    """
+
+    def __init__(
+        self,
+        num_shards: int = 16,
+        max_entries: Optional[int] = 10_000,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+        sweep_interval: Optional[float] = 30.0,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ):
+        self._shards = [
+            _Shard(
+                None if max_entries is None else max(1, max_entries // num_shards),
+                None if max_bytes is None else max(1, max_bytes // num_shards),
+            )
+            for _ in range(num_shards)
+        ]
+        self._sizeof = sizeof
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if sweep_interval is not None:
+            self._sweeper = threading.Thread(
+                target=_sweep_loop,
+                args=(weakref.ref(self), self._stop, sweep_interval),
+                name="InMemoryCacheSweeper",
+                daemon=True,
+            )
+            self._sweeper.start()
+            weakref.finalize(self, self._stop.set)
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
 
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         """Set a key-value pair.
@@ -52,33 +128,43 @@ class InMemoryCache:
             value: The data to store.
             ttl: Time to live in seconds. If None, data will not expire.
         """
-        with self._data_lock:
-            self._cache_data[key] = value
-
-            if ttl is not None:
-                self._ttl[key] = time.time() + ttl
-            else:
-                if key in self._ttl:
-                    del self._ttl[key]
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        size = self._sizeof(value)
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.data:
+                shard.pop(key)
+            shard.data[key] = (value, expires_at, size)
+            shard.bytes += size
+            shard.evict_overflow()
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get the value associated with a key.
 
         Args:
-            key: The key for the data within the session.
-            default: The value to return if the session or key is not found.
+            key: The key for the data.
+            default: The value to return if the key is not found or expired.
 
         Returns:
             The cached value, or the default value if not found.
         """
-        with self._data_lock:
-            if key in self._ttl and time.time() > self._ttl[key]:
-                del self._cache_data[key]
-                del self._ttl[key]
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.data.get(key)
+            if entry is None:
+                shard.stats.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at is not None and time.monotonic() > expires_at:
+                shard.pop(key)
+                shard.stats.expirations += 1
+                shard.stats.misses += 1
                 return default
-            return self._cache_data.get(key, default)
+            shard.data.move_to_end(key)
+            shard.stats.hits += 1
+            return value
 
-    def delete(self, key: str) -> None:
+    def delete(self, key: str) -> bool:
         """Delete a specific key-value pair from a cache.
 
         Args:
@@ -87,12 +173,10 @@ class InMemoryCache:
         Returns:
             True if the key was found and deleted, False otherwise.
         """
-
-        with self._data_lock:
-            if key in self._cache_data:
-                del self._cache_data[key]
-                if key in self._ttl:
-                    del self._ttl[key]
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.data:
+                shard.pop(key)
                 return True
             return False
 
@@ -100,10 +184,92 @@ class InMemoryCache:
         """Remove all data.
 
         Returns:
-            True if the data was cleared, False otherwise.
+            True once the data was cleared.
+        """
+        for shard in self._shards:
+            with shard.lock:
+                shard.data.clear()
+                shard.bytes = 0
+        return True
+
+    def __len__(self) -> int:
+        return sum(len(shard.data) for shard in self._shards)
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss/eviction counters aggregated over all shards."""
+        total = CacheStats()
+        for shard in self._shards:
+            with shard.lock:
+                total.hits += shard.stats.hits
+                total.misses += shard.stats.misses
+                total.evictions += shard.stats.evictions
+                total.expirations += shard.stats.expirations
+                total.entries += len(shard.data)
+                total.bytes += shard.bytes
+        return total
+
+    def sweep(self) -> None:
+        """Remove all expired keys now."""
+        now = time.monotonic()
+        for shard in self._shards:
+            with shard.lock:
+                shard.sweep(now)
+
+    def close(self) -> None:
+        """Stop the background sweeper thread."""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        """Async variant of get(); never blocks the event loop for long."""
+        return self.get(key, default)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Async variant of set()."""
+        self.set(key, value, ttl)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """Return the cached value, awaiting ``loader`` once on a miss.
+
+        Concurrent callers that miss on the same key share a single load.
+
+        Args:
+            key: The key for the data.
+            loader: Coroutine function producing the value.
+            ttl: Time to live in seconds for the loaded value.
+
+        Returns:
+            The cached or freshly loaded value.
         """
-        with self._data_lock:
-            self._cache_data.clear()
-            self._ttl.clear()
-            return True
-        return False
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        # The load runs in its own task so that cancelling one caller,
+        # including the one that started it, doesn't cancel the others.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._load_done(key, t))
+        return await asyncio.shield(task)
+
+    async def _load(
+        self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int]
+    ) -> Any:
+        value = await loader()
+        self.set(key, value, ttl)
+        return value
+
+    def _load_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller was cancelled.
+            task.exception()
@@ -43,7 +43,7 @@ def main(host, port):
         notification_sender_auth.generate_jwk()
         server = A2AServer(
             agent_card=agent_card,
-            task_manager=AgentTaskManager(agent=BedrockHostAgent(remote_agent_addresses=list_urls), notification_sender_auth=notification_sender_auth),
+            task_manager=AgentTaskManager(agent=BedrockHostAgent(is_host_agent=True, remote_agent_addresses=list_urls), notification_sender_auth=notification_sender_auth),
             host=host,
             port=port,
         )
@@ -1,12 +1,18 @@
+import asyncio
 import base64
 import json
 import uuid
 import boto3
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Any, AsyncIterable, Dict, List
 
 from common.client import A2ACardResolver
 from common.types import AgentCard, TaskSendParams, Message, TextPart, TaskState, Task, Part, DataPart
 from hosts.bedrock.remote_agent_connection import TaskUpdateCallback, RemoteAgentConnections
+from hosts.bedrock.router import AgentRouter
+from hosts.bedrock.sessions import SessionMemory
 
 
 class BedrockHostAgent:
@@ -23,19 +29,53 @@ class BedrockHostAgent:
             tools: List[Any] = None,
             is_host_agent: bool = False,
             remote_agent_addresses: List[str] = None,
-            task_callback: TaskUpdateCallback | None = None
+            task_callback: TaskUpdateCallback | None = None,
+            max_concurrent_model_calls: int = 16,
+            max_sessions: int = 1000,
+            session_ttl: float = 3600,
+            max_context_tokens: int = 4000,
+            summarize_history: bool = False,
+            planner_mode: bool = False,
+            max_concurrent_per_agent: int = 8,
+            delegation_timeout: float = 120,
     ):
         """
         Initializes the Bedrock agent with the given parameters.
+
+        Bedrock calls run on a bounded thread pool sized by
+        max_concurrent_model_calls, so they never block the event loop.
+        Conversation history is bounded by max_sessions, session_ttl and
+        max_context_tokens; with summarize_history older turns are summarized
+        instead of dropped. In planner_mode compound requests are split and
+        sent to several remote agents concurrently, at most
+        max_concurrent_per_agent at a time per agent and each bounded by
+        delegation_timeout seconds.
         """
         self.model_id = model_id
         self.name = name
         self.description = description
         self.instructions = instructions
         self.tools = tools or []
-        self.bedrock_client = boto3.client('bedrock-runtime')
-        self.sessions = {}
+        self.bedrock_client = boto3.client(
+            'bedrock-runtime',
+            config=Config(max_pool_connections=max_concurrent_model_calls),
+        )
+        self.bedrock_executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_model_calls,
+            thread_name_prefix="bedrock",
+        )
+        self.sessions = SessionMemory(
+            max_sessions=max_sessions,
+            ttl=session_ttl,
+            max_context_tokens=max_context_tokens,
+            summarizer=self._summarize_history if summarize_history else None,
+        )
         self.task_callback = task_callback
+        self.router = AgentRouter()
+        self.planner_mode = planner_mode
+        self.max_concurrent_per_agent = max_concurrent_per_agent
+        self.delegation_timeout = delegation_timeout
+        self.agent_semaphores: Dict[str, asyncio.Semaphore] = {}
         
         # Host agent specific setup
         if is_host_agent and remote_agent_addresses:
@@ -52,6 +92,7 @@ class BedrockHostAgent:
             
             self.is_host_agent = True
             self.instructions = self.root_instruction()
+            self.router.index(self.cards.values())
         else:
             self.remote_agent_connections = {}
             self.cards = {}
@@ -60,53 +101,70 @@ class BedrockHostAgent:
     def invoke(self, query, session_id) -> Dict[str, Any]:
         """
         Invokes the agent with the given query and session ID.
+
+        Blocking convenience wrapper around ainvoke for callers without an
+        event loop.
+        """
+        return asyncio.run(self.ainvoke(query, session_id))
+
+    async def ainvoke(self, query, session_id) -> Dict[str, Any]:
+        """
+        Invokes the agent and returns only its final response.
+        """
+        result = None
+        async for item in self.stream(query, session_id):
+            result = item
+        return result
+
+    async def stream(self, query, session_id) -> AsyncIterable[Dict[str, Any]]:
+        """
+        Streams the response from the agent.
+
+        For the host agent, status and artifact updates from the remote agent
+        are relayed as they arrive, followed by the final response.
         """
         try:
-            # Initialize session if needed
-            if session_id not in self.sessions:
-                self.sessions[session_id] = []
-            
-            # Add user message to history
-            self.sessions[session_id].append({"role": "user", "content": query})
-            
-            # If host agent, include agent information in prompt
             if self.is_host_agent:
-                response = self._invoke_host_agent(query, session_id)
+                # Routing is per request, so the host keeps no history
+                async for item in self._stream_host_agent(query, session_id):
+                    yield item
             else:
-                response = self._invoke_regular_agent(query, session_id)
-            
-            return {
-                "is_task_complete": True,
-                "require_user_input": False,
-                "content": response
-            }
+                # Add user message to history
+                self.sessions.append(session_id, "user", query)
+                response = await self._invoke_regular_agent(query, session_id)
+                yield {
+                    "is_task_complete": True,
+                    "require_user_input": False,
+                    "content": response
+                }
         except Exception as e:
             error_message = f"Error invoking agent: {str(e)}"
             print(error_message)
-            return {
+            yield {
                 "is_task_complete": True,
                 "require_user_input": True,
                 "content": error_message
             }
 
-    async def stream(self, query, session_id) -> AsyncIterable[Dict[str, Any]]:
-        """
-        Streams the response from the agent.
-        """
-        # First yield a processing message
-        yield {
-            "content": "Processing your request...",
-            "is_task_complete": False,
-            "require_user_input": False
-        }
-        
-        # Then yield the final result
-        result = self.invoke(query, session_id)
-        yield result
+    async def _invoke_model(self, payload) -> Dict[str, Any]:
+        """Call Bedrock on the bounded executor and return the parsed body"""
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self.bedrock_executor,
+            partial(
+                self.bedrock_client.invoke_model,
+                modelId=self.model_id,
+                body=json.dumps(payload),
+            ),
+        )
+        return json.loads(response['body'].read())
 
-    def _invoke_regular_agent(self, query, session_id):
+    async def _invoke_regular_agent(self, query, session_id):
         """Handle regular agent invocation"""
-        messages = self.sessions[session_id]
+        summary, messages = await self.sessions.context(session_id)
+        system = self.instructions
+        if summary:
+            system += f"\n\nSummary of the earlier conversation:\n{summary}"
         
         # Create payload based on model
         if self.model_id.startswith("anthropic.claude"):
@@ -114,7 +172,7 @@ class BedrockHostAgent:
                 "anthropic_version": "bedrock-2023-05-31",
                 "max_tokens": 1000,
                 "messages": messages,
-                "system": self.instructions
+                "system": system
             }
         else:
             # Default to Claude format
@@ -122,26 +180,202 @@ class BedrockHostAgent:
                 "anthropic_version": "bedrock-2023-05-31",
                 "max_tokens": 1000,
                 "messages": messages,
-                "system": self.instructions
+                "system": system
             }
         
         # Call Bedrock
-        response = self.bedrock_client.invoke_model(
-            modelId=self.model_id,
-            body=json.dumps(payload)
-        )
-        
-        response_body = json.loads(response['body'].read())
+        response_body = await self._invoke_model(payload)
         content = response_body['content'][0]['text']
         
         # Add assistant response to history
-        self.sessions[session_id].append({"role": "assistant", "content": content})
+        self.sessions.append(session_id, "assistant", content)
         
         return content
 
-    def _invoke_host_agent(self, query, session_id):
-        """Handle host agent invocation with tool calling"""
-        # First try to determine which agent to use
+    async def _summarize_history(self, summary, messages):
+        """Fold messages that left the context window into the running summary"""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = f"""Update the summary of a conversation with the new turns below. Keep facts, user preferences and open questions. Respond with the summary only.
+
+Current summary:
+{summary or "(none)"}
+
+New turns:
+{transcript}"""
+        payload = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 300,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        response_body = await self._invoke_model(payload)
+        return response_body['content'][0]['text'].strip()
+
+    async def _stream_host_agent(self, query, session_id) -> AsyncIterable[Dict[str, Any]]:
+        """Handle host agent invocation, relaying remote agent updates"""
+        plan = await self._plan_sub_requests(query) if self.planner_mode else []
+        if len(plan) <= 1:
+            # The router answers from its index or cache and only asks the
+            # model when it is not confident.
+            agent_name = plan[0][0] if plan else await self.router.route(
+                query, lambda: self._select_agent_with_model(query)
+            )
+            plan = [(agent_name, query)] if agent_name in self.remote_agent_connections else []
+
+        if not plan:
+            yield {
+                "is_task_complete": True,
+                "require_user_input": False,
+                "content": f"I couldn't find a suitable agent to handle your request. Available agents are: {', '.join(self.remote_agent_connections.keys())}"
+            }
+            return
+
+        agent_names = ", ".join(agent_name for agent_name, _ in plan)
+        fan_out = len(plan) > 1
+        yield {
+            "is_task_complete": False,
+            "require_user_input": False,
+            "content": f"Delegating your request to {agent_names}..."
+        }
+
+        # Sub-requests run concurrently and report progress through one
+        # queue, so updates are relayed in the order they arrive.
+        progress: asyncio.Queue = asyncio.Queue()
+        jobs = []
+        for agent_name, sub_query in plan:
+            job = asyncio.create_task(self._delegate(
+                agent_name,
+                sub_query,
+                session_id,
+                lambda text, agent_name=agent_name: progress.put_nowait((agent_name, text)),
+            ))
+            job.add_done_callback(lambda _: progress.put_nowait(None))
+            jobs.append(job)
+
+        pending = len(jobs)
+        try:
+            while pending:
+                item = await progress.get()
+                if item is None:
+                    pending -= 1
+                    continue
+                agent_name, text = item
+                yield {
+                    "is_task_complete": False,
+                    "require_user_input": False,
+                    "content": f"[{agent_name}] {text}" if fan_out else text
+                }
+        finally:
+            for job in jobs:
+                job.cancel()
+
+        response = f"I've delegated your request to {agent_names}.\n\n"
+        require_user_input = False
+        for (agent_name, _), job in zip(plan, jobs):
+            if job.exception() is None:
+                state, text = job.result()
+                require_user_input = require_user_input or state == TaskState.INPUT_REQUIRED
+            elif isinstance(job.exception(), TimeoutError):
+                text = f"{agent_name} did not answer within {self.delegation_timeout} seconds."
+            else:
+                text = f"Error delegating to {agent_name}: {str(job.exception())}"
+            response += f"**{agent_name}**: {text}\n\n" if fan_out else text
+        yield {
+            "is_task_complete": True,
+            "require_user_input": require_user_input,
+            "content": response.rstrip() if fan_out else response
+        }
+
+    async def _delegate(self, agent_name, query, session_id, on_progress):
+        """Send one request to a remote agent within its concurrency limit and deadline.
+
+        Returns the final task state and the text to show the user.
+        """
+        request = TaskSendParams(
+            id=str(uuid.uuid4()),
+            sessionId=session_id,
+            message=Message(
+                role="user",
+                parts=[TextPart(text=query)],
+                metadata={"conversation_id": session_id},
+            ),
+            acceptedOutputModes=self.SUPPORTED_CONTENT_TYPES,
+            metadata={"conversation_id": session_id},
+        )
+
+        state = None
+        status_text = ""
+        artifact_texts = []
+
+        def on_update(update):
+            nonlocal state, status_text
+            status = getattr(update, "status", None)
+            if status is not None and status.state != TaskState.SUBMITTED:
+                state = status.state
+                status_text = _text_of(status.message.parts) if status.message else ""
+                if status_text and state == TaskState.WORKING:
+                    on_progress(status_text)
+
+            artifacts = getattr(update, "artifacts", None) or []
+            if getattr(update, "artifact", None) is not None:
+                artifacts = [update.artifact]
+            for artifact in artifacts:
+                text = _text_of(artifact.parts)
+                if text:
+                    artifact_texts.append(text)
+                    on_progress(text)
+
+            if self.task_callback:
+                return self.task_callback(update)
+            return update if isinstance(update, Task) else None
+
+        semaphore = self.agent_semaphores.setdefault(
+            agent_name, asyncio.Semaphore(self.max_concurrent_per_agent)
+        )
+        async with asyncio.timeout(self.delegation_timeout):
+            async with semaphore:
+                await self.remote_agent_connections[agent_name].send_task(request, on_update)
+
+        text = status_text if state != TaskState.WORKING else ""
+        return state, text + "".join(artifact_texts)
+
+    async def _plan_sub_requests(self, query):
+        """Ask Bedrock to split a query into (agent name, sub-request) pairs"""
+        prompt = f"""You are a expert delegator that can delegate user requests to remote agents.
+
+Available agents:
+{self._format_agent_list()}
+
+Split the user query into independent sub-requests, one per agent that is needed. If a single agent can answer it, return one item.
+Respond with only a JSON list like [{{"agent": "<agent name>", "request": "<sub-request>"}}].
+
+User query: "{query}"
+"""
+        payload = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 500,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        response_body = await self._invoke_model(payload)
+        text = response_body['content'][0]['text']
+        try:
+            items = json.loads(text[text.index("["):text.rindex("]") + 1])
+        except ValueError:
+            return []
+
+        plan = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            agent_name = str(item.get("agent", ""))
+            sub_query = item.get("request") or query
+            for card_name in self.cards.keys():
+                if card_name.lower() == agent_name.strip().lower():
+                    plan.append((card_name, sub_query))
+                    break
+        return plan
+
+    async def _select_agent_with_model(self, query):
+        """Ask Bedrock which agent should handle the query"""
         agent_selection_prompt = f"""You are a expert delegator that can delegate user requests to remote agents.
         
 Available agents:
@@ -150,50 +384,9 @@ Available agents:
 Based on the user query: "{query}"
 Which agent would be best to handle this request? Respond with just the agent name."""
         
-        # Get agent selection
-        agent_name = self._get_agent_selection(agent_selection_prompt)
-        
-        # If we have a valid agent, send the task
-        if agent_name and agent_name in self.remote_agent_connections:
-            try:
-                task_id = str(uuid.uuid4())
-                request = TaskSendParams(
-                    id=task_id,
-                    sessionId=session_id,
-                    message=Message(
-                        role="user",
-                        parts=[TextPart(text=query)],
-                        metadata={"conversation_id": session_id},
-                    ),
-                    acceptedOutputModes=self.SUPPORTED_CONTENT_TYPES,
-                    metadata={"conversation_id": session_id},
-                )
-                
-                # Use asyncio to run the async function
-                import asyncio
-                task = asyncio.run(self.remote_agent_connections[agent_name].send_task(request, self.task_callback))
-                
-                # Process response
-                response = f"I've delegated your request to {agent_name}.\n\n"
-                
-                if task.status.message:
-                    for part in task.status.message.parts:
-                        if part.type == "text":
-                            response += part.text
-                
-                if task.artifacts:
-                    for artifact in task.artifacts:
-                        for part in artifact.parts:
-                            if part.type == "text":
-                                response += part.text
-                
-                return response
-            except Exception as e:
-                return f"Error delegating to {agent_name}: {str(e)}"
-        else:
-            return f"I couldn't find a suitable agent to handle your request. Available agents are: {', '.join(self.remote_agent_connections.keys())}"
+        return await self._get_agent_selection(agent_selection_prompt)
 
-    def _get_agent_selection(self, prompt):
+    async def _get_agent_selection(self, prompt):
         """Get agent selection from Bedrock"""
         payload = {
             "anthropic_version": "bedrock-2023-05-31",
@@ -201,12 +394,7 @@ Which agent would be best to handle this request? Respond with just the agent na
             "messages": [{"role": "user", "content": prompt}]
         }
         
-        response = self.bedrock_client.invoke_model(
-            modelId=self.model_id,
-            body=json.dumps(payload)
-        )
-        
-        response_body = json.loads(response['body'].read())
+        response_body = await self._invoke_model(payload)
         agent_name = response_body['content'][0]['text'].strip()
         
         # Clean up response to just get the agent name
@@ -232,6 +420,7 @@ Which agent would be best to handle this request? Respond with just the agent na
         remote_connection = RemoteAgentConnections(card)
         self.remote_agent_connections[card.name] = remote_connection
         self.cards[card.name] = card
+        self.router.add_card(card)
 
     def root_instruction(self) -> str:
         """Root instruction for host agent"""
@@ -260,3 +449,8 @@ Always identify which agent you're using in your response.
                 {"name": card.name, "description": card.description}
             )
         return remote_agent_info
+
+
+def _text_of(parts: List[Part]) -> str:
+    """Concatenate the text parts of a message or artifact"""
+    return "".join(part.text for part in parts if part.type == "text")
@@ -0,0 +1,143 @@
+import hashlib
+import math
+import re
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple
+
+from common.types import AgentCard
+from common.utils.in_memory_cache import InMemoryCache
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "between", "by", "can", "do",
+    "for", "from", "get", "help", "helps", "how", "i", "in", "is", "it", "me",
+    "my", "of", "on", "or", "please", "tell", "that", "the", "this", "to",
+    "value", "values", "various", "what", "when", "which", "who", "with",
+    "you",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords and with plurals folded"""
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def card_text(card: AgentCard) -> str:
+    """Text of an agent card used for routing"""
+    fields = [card.name, card.description or ""]
+    for skill in card.skills or []:
+        fields.extend([skill.name, skill.description or ""])
+        fields.extend(skill.tags or [])
+        fields.extend(skill.examples or [])
+    return " ".join(fields)
+
+
+class AgentRouter:
+    """Picks a remote agent for a query without a model call when possible.
+
+    Queries are scored against a BM25 index over agent card names,
+    descriptions and skills. If the best agent wins by a clear margin it is
+    used directly, otherwise the fallback (the LLM selection) decides. Every
+    decision is cached by a fingerprint of the query's tokens, so repeated
+    questions are routed without scoring or a model call.
+    """
+
+    def __init__(
+        self,
+        min_score: float = 1.0,
+        min_margin: float = 0.5,
+        cache_ttl: int = 3600,
+        cache_size: int = 10_000,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.cache_ttl = cache_ttl
+        self.k1 = k1
+        self.b = b
+        self.decisions = InMemoryCache(
+            num_shards=4, max_entries=cache_size, sweep_interval=300
+        )
+        self.stats = Counter()
+        self._docs: Dict[str, Counter] = {}
+        self._doc_freq: Counter = Counter()
+        self._avg_len = 0.0
+
+    def index(self, cards: Iterable[AgentCard]):
+        """Rebuild the index from scratch"""
+        self._docs = {}
+        for card in cards:
+            self._docs[card.name] = Counter(tokenize(card_text(card)))
+        self._reindex()
+
+    def add_card(self, card: AgentCard):
+        self._docs[card.name] = Counter(tokenize(card_text(card)))
+        self._reindex()
+
+    def _reindex(self):
+        self._doc_freq = Counter()
+        for terms in self._docs.values():
+            self._doc_freq.update(terms.keys())
+        lengths = [sum(terms.values()) for terms in self._docs.values()]
+        self._avg_len = sum(lengths) / len(lengths) if lengths else 0.0
+        # Routing decisions depend on the set of agents.
+        self.decisions.clear()
+
+    def rank(self, query: str) -> List[Tuple[str, float]]:
+        """Agents ordered by BM25 score for the query"""
+        n_docs = len(self._docs)
+        query_terms = set(tokenize(query))
+        scores = []
+        for name, terms in self._docs.items():
+            doc_len = sum(terms.values())
+            score = 0.0
+            for term in query_terms:
+                tf = terms.get(term, 0)
+                if not tf:
+                    continue
+                df = self._doc_freq[term]
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * doc_len / (self._avg_len or 1))
+                score += idf * tf * (self.k1 + 1) / (tf + norm)
+            scores.append((name, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores
+
+    def fingerprint(self, query: str) -> str:
+        tokens = " ".join(sorted(set(tokenize(query))))
+        return hashlib.sha1(tokens.encode("utf-8")).hexdigest()
+
+    async def route(
+        self, query: str, fallback: Callable[[], Awaitable[str | None]]
+    ) -> str | None:
+        """Return the agent name for the query, calling fallback only if unsure"""
+        key = self.fingerprint(query)
+        cached = self.decisions.get(key)
+        if cached is not None:
+            self.stats["cache"] += 1
+            return cached
+
+        ranked = self.rank(query)
+        agent_name = None
+        if ranked:
+            best_name, best = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+            if best > 0 and best >= self.min_score and (best - runner_up) / best >= self.min_margin:
+                agent_name = best_name
+                self.stats["index"] += 1
+
+        if agent_name is None:
+            agent_name = await fallback()
+            self.stats["llm"] += 1
+
+        # Queries made only of stopwords share a fingerprint, don't cache those.
+        if agent_name is not None and tokenize(query):
+            self.decisions.set(key, agent_name, ttl=self.cache_ttl)
+        return agent_name
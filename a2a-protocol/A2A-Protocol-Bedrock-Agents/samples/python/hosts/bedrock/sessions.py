@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+Summarizer = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class Session:
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    summary: str = ""
+    # Messages that left the window and are not yet folded into the summary
+    unsummarized: List[Dict[str, str]] = field(default_factory=list)
+    last_used: float = field(default_factory=time.monotonic)
+    bytes: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class SessionMemory:
+    """Bounded conversation memory for BedrockHostAgent.
+
+    Sessions are evicted when idle for longer than ``ttl`` seconds or when
+    more than ``max_sessions`` are open (least recently used first). Each
+    session only keeps the most recent messages that fit in
+    ``max_context_tokens``, trimmed on every append; older turns are folded
+    into a running summary when a summarizer is given and dropped otherwise,
+    so both memory and the payload sent to the model stay bounded.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl: float = 3600,
+        max_context_tokens: int = 4000,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_context_tokens = max_context_tokens
+        self.summarizer = summarizer
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _session(self, session_id: str) -> Session:
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = Session()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.ttl:
+                break
+            del self._sessions[session_id]
+
+    def append(self, session_id: str, role: str, content: str):
+        """Add a message to the session history, trimming it to the window"""
+        session = self._session(session_id)
+        session.messages.append({"role": role, "content": content})
+        self._trim(session)
+
+    def _window_start(self, session: Session) -> int:
+        budget = self.max_context_tokens - estimate_tokens(session.summary)
+        start = len(session.messages)
+        while start > 0:
+            cost = estimate_tokens(session.messages[start - 1]["content"])
+            # Always keep the latest message, even if it is over budget.
+            if cost > budget and start < len(session.messages):
+                break
+            budget -= cost
+            start -= 1
+        # The Messages API expects the conversation to start with the user.
+        while start < len(session.messages) - 1 and session.messages[start]["role"] != "user":
+            start += 1
+        return start
+
+    def _trim(self, session: Session):
+        start = self._window_start(session)
+        if start:
+            if self.summarizer is not None:
+                session.unsummarized.extend(session.messages[:start])
+                # Bounded as well in case context() is not called for a while
+                budget = self.max_context_tokens
+                keep = len(session.unsummarized)
+                while keep > 0 and budget >= estimate_tokens(session.unsummarized[keep - 1]["content"]):
+                    budget -= estimate_tokens(session.unsummarized[keep - 1]["content"])
+                    keep -= 1
+                del session.unsummarized[:keep]
+            del session.messages[:start]
+        session.bytes = len(session.summary.encode("utf-8")) + sum(
+            len(m["content"].encode("utf-8")) for m in session.messages + session.unsummarized
+        )
+
+    async def context(self, session_id: str) -> Tuple[str, List[Dict[str, str]]]:
+        """Return (summary, messages) that fit the token budget.
+
+        Messages that fell out of the window are folded into the summary
+        first if a summarizer is configured. Calls for the same session are
+        serialized so concurrent summaries don't overwrite each other.
+        """
+        session = self._session(session_id)
+        async with session.lock:
+            if session.unsummarized and self.summarizer is not None:
+                dropped, session.unsummarized = session.unsummarized, []
+                try:
+                    session.summary = await self.summarizer(session.summary, dropped)
+                except Exception:
+                    session.unsummarized[:0] = dropped
+                    raise
+            # A longer summary leaves less room for messages; the window is
+            # recomputed here so appends made meanwhile are covered too.
+            self._trim(session)
+            return session.summary, list(session.messages)
+
+    def session_bytes(self, session_id: str) -> int:
+        session = self._sessions.get(session_id)
+        return session.bytes if session else 0
+
+    def stats(self) -> Dict[str, float]:
+        """Session count and bytes held per session"""
+        sizes = [session.bytes for session in self._sessions.values()]
+        return {
+            "sessions": len(sizes),
+            "total_bytes": sum(sizes),
+            "max_session_bytes": max(sizes, default=0),
+            "avg_session_bytes": sum(sizes) / len(sizes) if sizes else 0,
+        }
@@ -102,12 +102,12 @@ class AgentTaskManager(InMemoryTaskManager):
     ) -> JSONRPCResponse | None:
         task_send_params: TaskSendParams = request.params
         if not utils.are_modalities_compatible(
-            task_send_params.acceptedOutputModes, BedrockInlineAgent.SUPPORTED_CONTENT_TYPES
+            task_send_params.acceptedOutputModes, BedrockHostAgent.SUPPORTED_CONTENT_TYPES
         ):
             logger.warning(
                 "Unsupported output mode. Received %s, Support %s",
                 task_send_params.acceptedOutputModes,
-                BedrockInlineAgent.SUPPORTED_CONTENT_TYPES,
+                BedrockHostAgent.SUPPORTED_CONTENT_TYPES,
             )
             return utils.new_incompatible_types_error(request.id)
         
@@ -136,7 +136,7 @@ class AgentTaskManager(InMemoryTaskManager):
         task_send_params: TaskSendParams = request.params
         query = self._get_user_query(task_send_params)
         try:
-            agent_response = self.agent.invoke(query, task_send_params.sessionId)
+            agent_response = await self.agent.ainvoke(query, task_send_params.sessionId)
             print(f"Agent Response: {agent_response}")
         except Exception as e:
             logger.error(f"Error invoking agent: {e}")
@@ -160,12 +160,12 @@ class AgentTaskManager(InMemoryTaskManager):
                     return JSONRPCResponse(id=request.id, error=InvalidParamsError(message="Push notification URL is invalid"))
 
             task_send_params: TaskSendParams = request.params
-            sse_event_queue = await self.setup_sse_consumer(task_send_params.id, False)            
+            cursor = await self.setup_sse_consumer(task_send_params.id, False)
 
             asyncio.create_task(self._run_streaming_agent(request))
 
             return self.dequeue_events_for_sse(
-                request.id, task_send_params.id, sse_event_queue
+                request.id, task_send_params.id, cursor
             )
         except Exception as e:
             logger.error(f"Error in SSE stream: {e}")
@@ -221,22 +221,6 @@ class AgentTaskManager(InMemoryTaskManager):
             data=task.model_dump(exclude_none=True)
         )
 
-    async def on_resubscribe_to_task(
-        self, request
-    ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
-        task_id_params: TaskIdParams = request.params
-        try:
-            sse_event_queue = await self.setup_sse_consumer(task_id_params.id, True)
-            return self.dequeue_events_for_sse(request.id, task_id_params.id, sse_event_queue)
-        except Exception as e:
-            logger.error(f"Error while reconnecting to SSE stream: {e}")
-            return JSONRPCResponse(
-                id=request.id,
-                error=InternalError(
-                    message=f"An error occurred while reconnecting to stream: {e}"
-                ),
-            )
-    
     async def set_push_notification_info(self, task_id: str, push_notification_config: PushNotificationConfig):
         # Verify the ownership of notification URL by issuing a challenge request.
         is_verified = await self.notification_sender_auth.verify_push_notification_url(push_notification_config.url)
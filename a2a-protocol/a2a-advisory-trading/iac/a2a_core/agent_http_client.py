@@ -1,13 +1,154 @@
-import aiohttp
+import os
+import time
 import json
 import uuid
+import asyncio
+import logging
+import aiohttp
+from typing import Dict, Optional
 from a2a.types import Task
 
-async def send_task(task: Task, endpoint: str, skill: str, timeout: int = 30) -> Task:
+from .logger import get_logger
+
+logger = get_logger()
+
+# Tunables, all overridable through the Lambda environment.
+POOL_SIZE = int(os.environ.get("A2A_HTTP_POOL_SIZE", "50"))
+KEEPALIVE_SECONDS = float(os.environ.get("A2A_HTTP_KEEPALIVE_SECONDS", "60"))
+# Consecutive failures before an endpoint is skipped; 0 disables the breaker.
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("A2A_CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.environ.get("A2A_CIRCUIT_RESET_SECONDS", "30"))
+# Send a duplicate request if the first has not answered after this many
+# seconds; 0 disables hedging. Only skills listed in A2A_HEDGE_SKILLS are
+# hedged, since a duplicated request must be safe to run twice.
+HEDGE_DELAY_SECONDS = float(os.environ.get("A2A_HEDGE_DELAY_SECONDS", "0"))
+HEDGE_SKILLS = {s.strip() for s in os.environ.get("A2A_HEDGE_SKILLS", "").split(",") if s.strip()}
+LOG_PREVIEW_CHARS = 500
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Fails fast for an endpoint after repeated failures, then lets a single
+    trial request through once reset_timeout has passed.
+    """
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Half-open: re-arm the timer so only one trial goes through.
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failure_threshold and self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+# Reused across warm Lambda invocations; aiohttp sessions are tied to a loop.
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(limit=POOL_SIZE, keepalive_timeout=KEEPALIVE_SECONDS)
+        _session = aiohttp.ClientSession(connector=connector)
+        _session_loop = loop
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _preview(data) -> str:
+    if isinstance(data, bytes):
+        data = data[:LOG_PREVIEW_CHARS].decode("utf-8", errors="replace")
+    return str(data)[:LOG_PREVIEW_CHARS]
+
+
+async def _post_once(endpoint: str, payload: dict, timeout: float) -> dict:
+    session = _get_session()
+    async with session.post(
+            endpoint,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as response:
+        body = await response.read()
+        status = response.status
+
+    if status != 200:
+        raise RuntimeError(f"Agent returned {status}: {_preview(body)}")
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise RuntimeError(f"Agent returned invalid JSON: {_preview(body)}") from e
+
+
+async def _post_hedged(endpoint: str, payload: dict, timeout: float, hedge_delay: float) -> dict:
+    """
+    Posts the payload; if no reply arrives within hedge_delay, posts it again
+    and returns whichever copy succeeds first.
+    """
+    attempts = {asyncio.create_task(_post_once(endpoint, payload, timeout))}
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=hedge_delay)
+        if not done:
+            logger.info(f"Hedging slow request to {endpoint} after {hedge_delay}s")
+            attempts.add(asyncio.create_task(_post_once(endpoint, payload, timeout)))
+
+        pending = attempts
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = attempt.exception()
+        raise error
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+
+
+async def send_task(task: Task, endpoint: str, skill: str, timeout: int = 30,
+                    hedge_delay: Optional[float] = None) -> Task:
     """
     Sends a Task to a remote agent using A2A-compliant JSON-RPC via /message/send.
     Accepts both raw Task response and JSON-RPC wrapped result.message.
     """
+    breaker = _breakers.setdefault(
+        endpoint, CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+    )
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {skill} at {endpoint}, skipping call")
+
+    if hedge_delay is None:
+        hedge_delay = HEDGE_DELAY_SECONDS if skill in HEDGE_SKILLS else 0
+
+    started = time.monotonic()
     try:
         request_id = task.id or str(uuid.uuid4())
         payload = {
@@ -20,44 +161,34 @@ async def send_task(task: Task, endpoint: str, skill: str, timeout: int = 30) ->
             }
         }
 
-        print(f"=== Sending A2A task to {skill} ===")
-        print(f"Endpoint: {endpoint}")
-        print("Payload:", json.dumps(payload, indent=2)[:500])
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                    endpoint,
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                    timeout=timeout
-            ) as response:
-                response_text = await response.text()
-                print(f"=== Response from {skill} ===")
-                print(f"Status code: {response.status}")
-                print(f"Response body: {response_text[:500]}")
-
-                if response.status != 200:
-                    raise RuntimeError(f"Agent returned {response.status}: {response_text}")
-
-                # Accept both agent raw Task and JSON-RPC 'result.message'
-                try:
-                    response_data = await response.json()
-                except Exception:
-                    response_data = json.loads(response_text)
-
-                if isinstance(response_data, dict) and "result" in response_data:
-                    # Official A2A JSON-RPC
-                    task_json = response_data["result"].get("message")
-                else:
-                    # Raw Task (legacy, current FastAPI style)
-                    task_json = response_data
-
-                if not task_json:
-                    raise RuntimeError(f"Missing Task in agent reply: {response_data}")
-
-                response_task = Task.model_validate(task_json)
-                return response_task
+        logger.info(f"Sending A2A task to {skill} at {endpoint}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Payload: {_preview(json.dumps(payload))}")
+
+        if hedge_delay:
+            response_data = await _post_hedged(endpoint, payload, timeout, hedge_delay)
+        else:
+            response_data = await _post_once(endpoint, payload, timeout)
+
+        logger.info(f"Response from {skill} in {time.monotonic() - started:.2f}s")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Response body: {_preview(json.dumps(response_data))}")
+
+        if isinstance(response_data, dict) and "result" in response_data:
+            # Official A2A JSON-RPC
+            task_json = response_data["result"].get("message")
+        else:
+            # Raw Task (legacy, current FastAPI style)
+            task_json = response_data
+
+        if not task_json:
+            raise RuntimeError(f"Missing Task in agent reply: {_preview(json.dumps(response_data))}")
+
+        response_task = Task.model_validate(task_json)
+        breaker.record_success()
+        return response_task
 
     except Exception as e:
-        print(f"Error sending task to {skill} at {endpoint}: {e}")
+        breaker.record_failure()
+        logger.error(f"Error sending task to {skill} at {endpoint}: {e}")
         raise
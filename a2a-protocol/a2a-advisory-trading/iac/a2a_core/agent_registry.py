@@ -1,8 +1,9 @@
 import os
+import time
 import boto3
 import aiohttp
 import asyncio
-from typing import Dict
+from typing import Dict, List, Optional
 
 LOCAL_AGENT_CARD_URLS = [
     "http://localhost:8000/.well-known/agent.json",
@@ -11,45 +12,118 @@ LOCAL_AGENT_CARD_URLS = [
     "http://localhost:8003/.well-known/agent.json"
 ]
 
+# Routing table is reused for this long before it is refreshed in the background.
+REGISTRY_TTL_SECONDS = float(os.environ.get("AGENT_REGISTRY_TTL_SECONDS", "300"))
+# A stale table older than this is refreshed inline instead of being served.
+REGISTRY_MAX_STALE_SECONDS = float(os.environ.get("AGENT_REGISTRY_MAX_STALE_SECONDS", "3600"))
+
+
+class _RegistryCache:
+    """
+    Module-level state, kept across warm Lambda invocations.
+    """
+    def __init__(self):
+        self.routing_table: Dict[str, str] = {}
+        self.fetched_at: float = 0.0
+        self.cards: Dict[str, dict] = {}
+        self.etags: Dict[str, str] = {}
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.apigateway = None
+
+
+_cache = _RegistryCache()
+
+
 async def fetch_agent_card(session, url: str) -> dict:
+    """
+    Fetches an agent card, revalidating the cached copy with If-None-Match.
+    """
+    headers = {}
+    if url in _cache.etags and url in _cache.cards:
+        headers["If-None-Match"] = _cache.etags[url]
     try:
-        async with session.get(url, timeout=3) as resp:
+        async with session.get(url, headers=headers, timeout=3) as resp:
+            if resp.status == 304:
+                return _cache.cards[url]
             if resp.status == 200:
-                return await resp.json()
+                card = await resp.json()
+                _cache.cards[url] = card
+                etag = resp.headers.get("ETag")
+                if etag:
+                    _cache.etags[url] = etag
+                return card
     except Exception as e:
         print(f"Failed to fetch card from {url}: {e}")
-    return {}
+    # Keep serving the last known card while an agent is briefly unreachable.
+    return _cache.cards.get(url, {})
+
 
-async def discover_agent_cards() -> Dict[str, str]:
+def _list_agent_card_urls(env: str) -> List[str]:
+    """
+    Lists the agent card URL of every '*-api' REST API, following pagination.
+    """
+    if _cache.apigateway is None:
+        _cache.apigateway = boto3.client("apigateway")
+    region = os.environ.get("AWS_PRIMARY_REGION", "us-east-1")
+    urls = []
+    for page in _cache.apigateway.get_paginator("get_rest_apis").paginate():
+        for item in page.get("items", []):
+            if not item["name"].endswith("-api"):
+                continue
+            urls.append(f"https://{item['id']}.execute-api.{region}.amazonaws.com/{env}/.well-known/agent.json")
+    return urls
 
+
+async def _refresh_routing_table() -> Dict[str, str]:
     env = os.environ.get("ENV_NAME", "dev").lower()
-    routing_table = {}
+    if env == "dev":
+        # boto3 is blocking, keep it off the event loop.
+        card_urls = await asyncio.to_thread(_list_agent_card_urls, env)
+    else:
+        card_urls = LOCAL_AGENT_CARD_URLS
 
+    routing_table = {}
     async with aiohttp.ClientSession() as session:
-        tasks = []
-        if env == "dev":
-            client = boto3.client("apigateway")
-            region = os.environ.get("AWS_PRIMARY_REGION", "us-east-1")
-            response = client.get_rest_apis()
-            print("Response for discovery: ", response)
-            for item in response["items"]:
-                api_id = item["id"]
-                print("API ID: ", api_id)
-                name = item["name"]
-                print("name: ", name)
-                if not name.endswith("-api"):
-                    continue
-                card_url = f"https://{api_id}.execute-api.{region}.amazonaws.com/{env}/.well-known/agent.json"
-                tasks.append(fetch_agent_card(session, card_url))
-        else:
-            for url in LOCAL_AGENT_CARD_URLS:
-                tasks.append(fetch_agent_card(session, url))
-
-        results = await asyncio.gather(*tasks)
-        for card in results:
-            if card and "skills" in card and "url" in card:
-                for skill in card["skills"]:
-                    skill_id = skill.get("id")
-                    if skill_id:
-                        routing_table[skill_id] = card["url"]
+        results = await asyncio.gather(*(fetch_agent_card(session, url) for url in card_urls))
+    for card in results:
+        if card and "skills" in card and "url" in card:
+            for skill in card["skills"]:
+                skill_id = skill.get("id")
+                if skill_id:
+                    routing_table[skill_id] = card["url"]
+
+    print(f"Discovered {len(routing_table)} skills from {len(card_urls)} agent cards")
+    _cache.routing_table = routing_table
+    _cache.fetched_at = time.monotonic()
     return routing_table
+
+
+def _start_refresh() -> asyncio.Task:
+    """
+    Starts a refresh, or joins the one already running on this event loop.
+    """
+    task = _cache.refresh_task
+    if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.get_running_loop().create_task(_refresh_routing_table())
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        _cache.refresh_task = task
+    return task
+
+
+async def discover_agent_cards(force_refresh: bool = False) -> Dict[str, str]:
+    """
+    Returns the skill id -> agent URL routing table.
+
+    A fresh table is served from memory. A stale one is served immediately
+    while a background refresh runs; only a missing or very old table is
+    fetched on the request path.
+    """
+    age = time.monotonic() - _cache.fetched_at
+    if _cache.routing_table and not force_refresh:
+        if age < REGISTRY_TTL_SECONDS:
+            return dict(_cache.routing_table)
+        if age < REGISTRY_MAX_STALE_SECONDS:
+            _start_refresh()
+            return dict(_cache.routing_table)
+
+    return dict(await asyncio.shield(_start_refresh()))
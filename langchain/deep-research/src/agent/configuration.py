@@ -84,6 +84,41 @@ class Configuration(BaseModel):
             }
         }
     )
+    max_concurrent_model_calls: int = Field(
+        default=10,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 10,
+                "min": 1,
+                "max": 100,
+                "description": "Maximum number of in-flight requests per model, shared by the supervisor and all researchers. Extra requests wait for a free slot."
+            }
+        }
+    )
+    model_tokens_per_minute: int = Field(
+        default=0,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 0,
+                "min": 0,
+                "description": "Tokens per minute allowed per model, counting the prompt and max output tokens of each request. 0 disables the limit."
+            }
+        }
+    )
+    max_concurrent_search_calls: int = Field(
+        default=10,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 10,
+                "min": 1,
+                "max": 100,
+                "description": "Maximum number of in-flight search API requests, shared by all researchers"
+            }
+        }
+    )
     # Research Configuration
     search_api: SearchAPI = Field(
         default=SearchAPI.TAVILY,
@@ -160,6 +195,30 @@ class Configuration(BaseModel):
             }
         }
     )
+    search_deadline_seconds: float = Field(
+        default=60,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 60,
+                "min": 5,
+                "max": 300,
+                "description": "Maximum time a search tool call waits for searches and summaries. Sources whose summary isn't ready by then are returned with their search snippet."
+            }
+        }
+    )
+    search_min_sources: int = Field(
+        default=0,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 0,
+                "min": 0,
+                "max": 50,
+                "description": "Return search results as soon as this many sources are ready instead of waiting for all of them. 0 waits for all sources, up to the search deadline."
+            }
+        }
+    )
     research_model: str = Field(
         default="bedrock:us.anthropic.claude-sonnet-4-20250514-v1:0",
         metadata={
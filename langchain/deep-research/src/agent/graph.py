@@ -42,13 +42,18 @@ from agent.state import (
 from agent.utils import (
     anthropic_websearch_called,
     build_model_config,
+    count_tokens,
+    fit_messages_to_budget,
     get_all_tools,
     get_api_key_for_model,
+    get_input_token_budget,
     get_model_token_limit,
     get_notes_from_tool_calls,
     get_today_str,
     is_token_limit_exceeded,
     openai_websearch_called,
+    pack_notes,
+    rate_limited_ainvoke,
     remove_up_to_last_ai_message,
     think_tool,
 )
@@ -99,7 +104,13 @@ async def clarify_with_user(state: AgentState, config: RunnableConfig) -> Comman
         messages=get_buffer_string(messages), 
         date=get_today_str()
     )
-    response = await clarification_model.ainvoke([HumanMessage(content=prompt_content)])
+    response = await rate_limited_ainvoke(
+        clarification_model,
+        [HumanMessage(content=prompt_content)],
+        configurable.research_model,
+        configurable.research_model_max_tokens,
+        config
+    )
     
     # Step 4: Route based on clarification analysis
     if response.need_clarification:
@@ -152,7 +163,13 @@ async def write_research_brief(state: AgentState, config: RunnableConfig) -> Com
         messages=get_buffer_string(state.get("messages", [])),
         date=get_today_str()
     )
-    response = await research_model.ainvoke([HumanMessage(content=prompt_content)])
+    response = await rate_limited_ainvoke(
+        research_model,
+        [HumanMessage(content=prompt_content)],
+        configurable.research_model,
+        configurable.research_model_max_tokens,
+        config
+    )
     
     # Step 3: Initialize supervisor with research brief and instructions
     supervisor_system_prompt = lead_researcher_prompt.format(
@@ -212,7 +229,13 @@ async def supervisor(state: SupervisorState, config: RunnableConfig) -> Command[
     
     # Step 2: Generate supervisor response based on current context
     supervisor_messages = state.get("supervisor_messages", [])
-    response = await research_model.ainvoke(supervisor_messages)
+    response = await rate_limited_ainvoke(
+        research_model,
+        supervisor_messages,
+        configurable.research_model,
+        configurable.research_model_max_tokens,
+        config
+    )
     
     # Step 3: Update state and proceed to tool execution
     return Command(
@@ -413,7 +436,13 @@ async def researcher(state: ResearcherState, config: RunnableConfig) -> Command[
     
     # Step 3: Generate researcher response with system context
     messages = [SystemMessage(content=researcher_prompt)] + researcher_messages
-    response = await research_model.ainvoke(messages)
+    response = await rate_limited_ainvoke(
+        research_model,
+        messages,
+        configurable.research_model,
+        configurable.research_model_max_tokens,
+        config
+    )
     
     # Step 4: Update state and proceed to tool execution
     return Command(
@@ -550,8 +579,22 @@ async def compress_research(state: ResearcherState, config: RunnableConfig):
             compression_prompt = compress_research_system_prompt.format(date=get_today_str())
             messages = [SystemMessage(content=compression_prompt)] + researcher_messages
             
+            # Condense oversized tool outputs before the call instead of after an overflow
+            messages = await fit_messages_to_budget(
+                messages,
+                configurable.compression_model,
+                configurable.compression_model_max_tokens,
+                config
+            )
+            
             # Execute compression
-            response = await synthesizer_model.ainvoke(messages)
+            response = await rate_limited_ainvoke(
+                synthesizer_model,
+                messages,
+                configurable.compression_model,
+                configurable.compression_model_max_tokens,
+                config
+            )
             
             # Extract raw notes from all tool and AI messages
             raw_notes_content = "\n".join([
@@ -634,7 +677,32 @@ async def final_report_generation(state: AgentState, config: RunnableConfig):
         tags=["langsmith:nostream"]
     )
     
-    # Step 3: Attempt report generation with token limit retry logic
+    # Step 3: Pack findings into the model's context window before the first call
+    input_token_budget = get_input_token_budget(
+        configurable.final_report_model,
+        configurable.final_report_model_max_tokens
+    )
+    if input_token_budget is not None:
+        prompt_without_findings = final_report_generation_prompt.format(
+            research_brief=state.get("research_brief", ""),
+            messages=get_buffer_string(state.get("messages", [])),
+            findings="",
+            date=get_today_str()
+        )
+        findings_budget = input_token_budget - count_tokens(
+            prompt_without_findings, configurable.final_report_model
+        )
+        if findings_budget <= 0:
+            return {
+                "final_report": "Error generating final report: The research brief and messages alone exceed the model's context window.",
+                "messages": [AIMessage(content="Report generation failed due to token limits")],
+                **cleared_state
+            }
+        notes = await pack_notes(notes, findings_budget, configurable.final_report_model, config)
+        findings = "\n".join(notes)
+    
+    # Step 4: Attempt report generation, retrying with truncation if the model
+    # still reports a token limit (e.g. when its context window is unknown)
     max_retries = 3
     current_retry = 0
     findings_token_limit = None
@@ -650,9 +718,13 @@ async def final_report_generation(state: AgentState, config: RunnableConfig):
             )
             
             # Generate the final report
-            final_report = await configurable_model.with_config(writer_model_config).ainvoke([
-                HumanMessage(content=final_report_prompt)
-            ])
+            final_report = await rate_limited_ainvoke(
+                configurable_model.with_config(writer_model_config),
+                [HumanMessage(content=final_report_prompt)],
+                configurable.final_report_model,
+                configurable.final_report_model_max_tokens,
+                config
+            )
             
             # Return successful report generation
             return {
@@ -692,7 +764,7 @@ async def final_report_generation(state: AgentState, config: RunnableConfig):
                     **cleared_state
                 }
     
-    # Step 4: Return failure result if all retries exhausted
+    # Step 5: Return failure result if all retries exhausted
     return {
         "final_report": "Error generating final report: Maximum retries exceeded",
         "messages": [AIMessage(content="Report generation failed after maximum retries")],
@@ -365,4 +365,24 @@ Example 2 (for a scientific article):
 Remember, your goal is to create a summary that can be easily understood and utilized by a downstream research agent while preserving the most critical information from the original webpage.
 
 Today's date is {date}.
-"""
\ No newline at end of file
+"""
+
+condense_notes_prompt = """You are condensing research notes so that they fit into the limited context window of a downstream research agent.
+
+Here are the notes:
+
+<Notes>
+{notes}
+</Notes>
+
+Please follow these guidelines:
+
+1. Keep every fact, statistic, date, name and location that is relevant to the research.
+2. Keep all source URLs and citations exactly as they appear in the notes.
+3. Remove repetition, filler and formatting that doesn't carry information.
+4. Do not add any information that is not in the notes.
+
+Your condensed notes must be at most {max_words} words long. Return only the condensed notes, without any preamble.
+
+Today's date is {date}.
+"""
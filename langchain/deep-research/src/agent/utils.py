@@ -1,11 +1,20 @@
 """Utility functions and helpers for the Deep Research agent."""
 
 import asyncio
+import hashlib
+import json
 import logging
 import os
+import sqlite3
+import tempfile
+import threading
+import time
 import warnings
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Annotated, Any, Dict, List, Literal, Optional
+from functools import lru_cache
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
 
 import aiohttp
 from langchain.chat_models import init_chat_model
@@ -14,6 +23,7 @@ from langchain_core.messages import (
     AIMessage,
     HumanMessage,
     MessageLikeRepresentation,
+    ToolMessage,
     filter_messages,
 )
 from langchain_core.runnables import RunnableConfig
@@ -25,12 +35,18 @@ from langchain_core.tools import (
     tool,
 )
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools as load_session_tools
 from langgraph.config import get_store
 from mcp import McpError
 from tavily import AsyncTavilyClient
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 from agent.configuration import Configuration, SearchAPI
-from agent.prompts import summarize_webpage_prompt
+from agent.prompts import condense_notes_prompt, summarize_webpage_prompt
 from agent.state import ResearchComplete, Summary
 
 ##########################
@@ -74,24 +90,7 @@ async def tavily_search(
     Returns:
         Formatted string containing summarized search results
     """
-    # Step 1: Execute search queries asynchronously
-    search_results = await tavily_search_async(
-        queries,
-        max_results=max_results,
-        topic=topic,
-        include_raw_content=True,
-        config=config
-    )
-    
-    # Step 2: Deduplicate results by URL to avoid processing the same content multiple times
-    unique_results = {}
-    for response in search_results:
-        for result in response['results']:
-            url = result['url']
-            if url not in unique_results:
-                unique_results[url] = {**result, "query": response['query']}
-    
-    # Step 3: Set up the summarization model with configuration
+    # Step 1: Set up the summarization model with configuration
     configurable = Configuration.from_runnable_config(config)
     
     # Character limit to stay within model token limits (configurable)
@@ -110,37 +109,99 @@ async def tavily_search(
         stop_after_attempt=configurable.max_structured_output_retries
     )
     
-    # Step 4: Create summarization tasks (skip empty content)
-    async def noop():
-        """No-op function for results without raw content."""
-        return None
-    
-    summarization_tasks = [
-        noop() if not result.get("raw_content") 
-        else summarize_webpage(
-            summarization_model, 
-            result['raw_content'][:max_char_to_include]
+    # Step 2: Start all search queries; each result is summarized as soon as
+    # its query returns instead of after every query has finished
+    tavily_client = AsyncTavilyClient(api_key=get_tavily_api_key(config))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + configurable.search_deadline_seconds
+    search_tasks = {
+        asyncio.create_task(
+            tavily_search_one(tavily_client, query, max_results, topic, True, config)
+        ): query_index
+        for query_index, query in enumerate(queries)
+    }
+    summarization_tasks = {}
+    unique_results = {}
+    summaries = {}
+    search_error = None
+    pending = set(search_tasks)
+    
+    def enough_sources():
+        """Whether the configured number of sources is ready to return early."""
+        return (
+            configurable.search_min_sources > 0
+            and len(summaries) >= configurable.search_min_sources
         )
-        for result in unique_results.values()
-    ]
-    
-    # Step 5: Execute all summarization tasks in parallel
-    summaries = await asyncio.gather(*summarization_tasks)
     
-    # Step 6: Combine results with their summaries
+    # Step 3: Process searches and summaries as they complete, until all are
+    # done, enough sources are ready or the deadline passes
+    try:
+        while pending and not enough_sources():
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                logging.warning(
+                    f"Tavily search hit its {configurable.search_deadline_seconds}s deadline, "
+                    f"returning {len(summaries)} of {len(unique_results)} sources summarized"
+                )
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task in summarization_tasks:
+                    if task.exception() is None:
+                        summaries[summarization_tasks[task]] = task.result()
+                    continue
+                
+                # A failed query no longer fails the whole tool call
+                if task.exception() is not None:
+                    search_error = task.exception()
+                    logging.warning(f"Tavily search failed: {search_error}")
+                    continue
+                
+                # Deduplicate results by URL to avoid processing the same content multiple times
+                response = task.result()
+                for rank, result in enumerate(response['results']):
+                    url = result['url']
+                    if url in unique_results:
+                        continue
+                    unique_results[url] = {
+                        **result,
+                        "query": response['query'],
+                        "order": (search_tasks[task], rank)
+                    }
+                    if not result.get("raw_content"):
+                        # Nothing to summarize, the search snippet is used as is
+                        summaries[url] = None
+                        continue
+                    summarization_task = asyncio.create_task(summarize_webpage_cached(
+                        summarization_model,
+                        configurable.summarization_model,
+                        result['raw_content'][:max_char_to_include],
+                        config
+                    ))
+                    summarization_tasks[summarization_task] = url
+                    pending.add(summarization_task)
+    finally:
+        # Summaries still running keep going inside the summary cache, so a
+        # later search for the same page can reuse them
+        for task in pending:
+            task.cancel()
+    
+    if not unique_results and search_error is not None:
+        raise search_error
+    
+    # Step 4: Combine results with their summaries in query order, using the
+    # search snippet for sources whose summary wasn't ready in time
     summarized_results = {
         url: {
             'title': result['title'], 
-            'content': result['content'] if summary is None else summary
+            'content': summaries.get(url) or result['content']
         }
-        for url, result, summary in zip(
-            unique_results.keys(), 
-            unique_results.values(), 
-            summaries
-        )
+        for url, result in sorted(unique_results.items(), key=lambda item: item[1]["order"])
     }
     
-    # Step 7: Format the final output
+    # Step 5: Format the final output
     if not summarized_results:
         return "No valid search results found. Please try different search queries or use a different search API."
     
@@ -153,6 +214,36 @@ async def tavily_search(
     
     return formatted_output
 
+async def tavily_search_one(
+    tavily_client: AsyncTavilyClient,
+    query: str,
+    max_results: int = 2,
+    topic: Literal["general", "news", "finance"] = "general",
+    include_raw_content: bool = True,
+    config: RunnableConfig = None
+):
+    """Execute a single Tavily search query under the shared search rate limit.
+    
+    Args:
+        tavily_client: Tavily client to search with
+        query: Search query string
+        max_results: Maximum number of results
+        topic: Topic category for filtering results
+        include_raw_content: Whether to include full webpage content
+        config: Runtime configuration with the rate limits
+        
+    Returns:
+        Search result dictionary from Tavily API
+    """
+    # Searches from all researchers share the search API rate limit
+    async with search_rate_limit(config):
+        return await tavily_client.search(
+            query,
+            max_results=max_results,
+            include_raw_content=include_raw_content,
+            topic=topic
+        )
+
 async def tavily_search_async(
     search_queries, 
     max_results: int = 2, 
@@ -177,12 +268,7 @@ async def tavily_search_async(
     
     # Create search tasks for parallel execution
     search_tasks = [
-        tavily_client.search(
-            query,
-            max_results=max_results,
-            include_raw_content=include_raw_content,
-            topic=topic
-        )
+        tavily_search_one(tavily_client, query, max_results, topic, include_raw_content, config)
         for query in search_queries
     ]
     
@@ -190,12 +276,13 @@ async def tavily_search_async(
     search_results = await asyncio.gather(*search_tasks)
     return search_results
 
-async def summarize_webpage(model: BaseChatModel, webpage_content: str) -> str:
+async def summarize_webpage(model: BaseChatModel, webpage_content: str, config: RunnableConfig = None) -> str:
     """Summarize webpage content using AI model with timeout protection.
     
     Args:
         model: The chat model configured for summarization
         webpage_content: Raw webpage content to be summarized
+        config: Runtime configuration with the summarization model and rate limits
         
     Returns:
         Formatted summary with key excerpts, or original content if summarization fails
@@ -207,11 +294,20 @@ async def summarize_webpage(model: BaseChatModel, webpage_content: str) -> str:
             date=get_today_str()
         )
         
-        # Execute summarization with timeout to prevent hanging
-        summary = await asyncio.wait_for(
-            model.ainvoke([HumanMessage(content=prompt_content)]),
-            timeout=60.0  # 60 second timeout for summarization
-        )
+        # Execute summarization with timeout to prevent hanging; time spent
+        # waiting for a rate limit slot doesn't count against the timeout
+        configurable = Configuration.from_runnable_config(config)
+        messages = [HumanMessage(content=prompt_content)]
+        async with model_rate_limit(
+            configurable.summarization_model,
+            messages,
+            configurable.summarization_model_max_tokens,
+            config
+        ):
+            summary = await asyncio.wait_for(
+                model.ainvoke(messages),
+                timeout=60.0  # 60 second timeout for summarization
+            )
         
         # Format the summary with structured sections
         formatted_summary = (
@@ -230,6 +326,199 @@ async def summarize_webpage(model: BaseChatModel, webpage_content: str) -> str:
         logging.warning(f"Summarization failed with error: {str(e)}, returning original content")
         return webpage_content
 
+##########################
+# Summary Cache
+##########################
+
+# Summaries are reused for this long, in memory and on disk.
+SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("SUMMARY_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "2048"))
+# SQLite file shared by runs and processes; set to an empty string to keep summaries in memory only.
+SUMMARY_CACHE_PATH = os.getenv(
+    "SUMMARY_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "deep_research_summaries.db"),
+)
+
+
+class SummaryCache:
+    """Two-tier cache of webpage summaries keyed by content hash and model.
+
+    Lookups check an in-memory LRU first and then an optional SQLite file, so
+    summaries survive restarts and are shared between processes. Concurrent
+    lookups for the same key share one pending summarization instead of each
+    calling the model.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = SUMMARY_CACHE_PATH,
+        max_entries: int = SUMMARY_CACHE_MAX_ENTRIES,
+        ttl: float = SUMMARY_CACHE_TTL_SECONDS,
+        purge_every: int = 1000,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "shared": 0}
+        self._memory: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+    @staticmethod
+    def key(model_name: str, content: str) -> str:
+        """Cache key for content summarized by model_name with the current prompt."""
+        digest = hashlib.sha256()
+        for part in (model_name, summarize_webpage_prompt, content):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS summaries "
+                "(key TEXT PRIMARY KEY, summary TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            db.execute("DELETE FROM summaries WHERE expires_at < ?", (time.time(),))
+            db.commit()
+            self._db = db
+        return self._db
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        with self._db_lock:
+            db = self._connect()
+            if db is None:
+                return None
+            row = db.execute(
+                "SELECT summary FROM summaries WHERE key = ? AND expires_at >= ?",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _disk_set(self, key: str, summary: str):
+        with self._db_lock:
+            db = self._connect()
+            if db is None:
+                return
+            db.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, expires_at) VALUES (?, ?, ?)",
+                (key, summary, time.time() + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                db.execute("DELETE FROM summaries WHERE expires_at < ?", (time.time(),))
+            db.commit()
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, summary = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return summary
+
+    def _memory_set(self, key: str, summary: str):
+        self._memory[key] = (time.monotonic() + self.ttl, summary)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached summary for key, or None."""
+        summary = self._memory_get(key)
+        if summary is not None:
+            self.stats["memory_hits"] += 1
+            return summary
+        try:
+            summary = await asyncio.to_thread(self._disk_get, key)
+        except sqlite3.Error as e:
+            logging.warning(f"Summary cache read failed: {e}")
+            summary = None
+        if summary is not None:
+            self.stats["disk_hits"] += 1
+            self._memory_set(key, summary)
+        return summary
+
+    async def set(self, key: str, summary: str):
+        """Store a summary in both tiers."""
+        self._memory_set(key, summary)
+        try:
+            await asyncio.to_thread(self._disk_set, key, summary)
+        except sqlite3.Error as e:
+            logging.warning(f"Summary cache write failed: {e}")
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        """Return the cached summary for key, calling load once on a miss.
+
+        Callers that miss while a load for the same key is running wait for
+        that load. A load that returns None is not cached.
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["shared"] += 1
+            return await asyncio.shield(pending)
+
+        summary = await self.get(key)
+        if summary is not None:
+            return summary
+
+        # Another caller may have started the load while we read the disk.
+        pending = self._inflight.get(key)
+        if pending is None:
+            self.stats["misses"] += 1
+            pending = asyncio.create_task(self._load(key, load))
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(pending)
+
+    async def _load(self, key: str, load: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        summary = await load()
+        if summary is not None:
+            await self.set(key, summary)
+        return summary
+
+
+summary_cache = SummaryCache()
+
+async def summarize_webpage_cached(
+    model: BaseChatModel,
+    model_name: str,
+    webpage_content: str,
+    config: RunnableConfig = None
+) -> str:
+    """Summarize webpage content, reusing earlier summaries of the same content.
+
+    Args:
+        model: The chat model configured for summarization
+        model_name: Name of the summarization model, part of the cache key
+        webpage_content: Raw webpage content to be summarized
+        config: Runtime configuration with the rate limits
+
+    Returns:
+        Formatted summary with key excerpts, or original content if summarization fails
+    """
+    async def summarize():
+        summary = await summarize_webpage(model, webpage_content, config)
+        # summarize_webpage falls back to the raw content on errors, don't cache that
+        return None if summary == webpage_content else summary
+
+    summary = await summary_cache.get_or_load(
+        summary_cache.key(model_name, webpage_content), summarize
+    )
+    return webpage_content if summary is None else summary
+
 ##########################
 # Reflection Tool Utils
 ##########################
@@ -464,6 +753,191 @@ def wrap_mcp_authenticate_tool(tool: StructuredTool) -> StructuredTool:
     tool.coroutine = authentication_wrapper
     return tool
 
+##########################
+# MCP Tool Registry
+##########################
+
+# Tool lists are re-listed on the open session once they are this old.
+MCP_TOOLS_TTL_SECONDS = float(os.getenv("MCP_TOOLS_TTL_SECONDS", "300"))
+# A server that failed to connect is not retried for this many seconds.
+MCP_FAILURE_TTL_SECONDS = float(os.getenv("MCP_FAILURE_TTL_SECONDS", "30"))
+# Sessions kept open at once, least recently used are closed first.
+MCP_MAX_SESSIONS = int(os.getenv("MCP_MAX_SESSIONS", "16"))
+
+
+class MCPSession:
+    """A persistent MCP session and the tools loaded from it.
+
+    The session is opened and closed by a background task because MCP
+    transports run in anyio task groups that must be exited by the task that
+    entered them. Tools loaded from the session call back into it, so tool
+    calls do not open a new connection each time.
+    """
+
+    def __init__(self, connection: Dict[str, Any]):
+        self.connection = connection
+        self.tools: List[BaseTool] = []
+        self.loaded_at = 0.0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session = None
+        self._error: Optional[Exception] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        """Whether the session is open and usable from the running event loop."""
+        return (
+            self._runner is not None
+            and not self._runner.done()
+            and self.loop is asyncio.get_running_loop()
+        )
+
+    async def open(self):
+        """Connect, initialize the session and list its tools.
+
+        Raises:
+            Exception: The connection or listing error, if the session could not be opened
+        """
+        self.loop = asyncio.get_running_loop()
+        self._runner = self.loop.create_task(self._run())
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self):
+        client = MultiServerMCPClient({"server": self.connection})
+        try:
+            async with client.session("server") as session:
+                self._session = session
+                await self._list_tools()
+                self._ready.set()
+                await self._stop.wait()
+        except Exception as e:
+            self._error = e
+            logging.warning(f"MCP session to {self.connection['url']} ended: {e}")
+        finally:
+            self._session = None
+            self._ready.set()
+
+    async def _list_tools(self):
+        self.tools = await load_session_tools(self._session)
+        self.loaded_at = time.monotonic()
+
+    def refresh_if_stale(self, ttl: float):
+        """Re-list tools in the background once the cached list is older than ttl."""
+        if time.monotonic() - self.loaded_at < ttl:
+            return
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._list_tools())
+            self._refresh.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def close(self):
+        """Close the session and wait for its transport to shut down."""
+        self._stop.set()
+        if self._runner is not None and self.loop is asyncio.get_running_loop():
+            await asyncio.gather(self._runner, return_exceptions=True)
+
+
+class MCPToolRegistry:
+    """Process-wide registry of MCP sessions keyed by server URL and credentials.
+
+    The first lookup for a server opens a session and lists its tools. Later
+    lookups, from any researcher, return the cached list without touching the
+    network; stale lists are re-listed in the background on the same session.
+    Concurrent first lookups share one connection attempt, and failed servers
+    are not retried until ``failure_ttl`` has passed.
+    """
+
+    def __init__(
+        self,
+        ttl: float = MCP_TOOLS_TTL_SECONDS,
+        failure_ttl: float = MCP_FAILURE_TTL_SECONDS,
+        max_sessions: int = MCP_MAX_SESSIONS,
+    ):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[tuple, MCPSession]" = OrderedDict()
+        self._failures: Dict[tuple, tuple[float, Exception]] = {}
+        self._locks: Dict[tuple, asyncio.Lock] = {}
+
+    @staticmethod
+    def key(url: str, headers: Optional[Dict[str, str]] = None) -> tuple:
+        """Registry key for a server, with credentials hashed rather than stored."""
+        credentials = json.dumps(headers or {}, sort_keys=True)
+        return url, hashlib.sha256(credentials.encode()).hexdigest()
+
+    def _cached(self, key: tuple) -> Optional[List[BaseTool]]:
+        session = self._sessions.get(key)
+        if session is None or not session.alive:
+            return None
+        self._sessions.move_to_end(key)
+        session.refresh_if_stale(self.ttl)
+        return list(session.tools)
+
+    async def get_tools(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> List[BaseTool]:
+        """Return the tools of the MCP server at url, connecting on first use.
+
+        Args:
+            url: Full URL of the streamable HTTP MCP endpoint
+            headers: Optional request headers, such as authentication
+
+        Returns:
+            Tools bound to the registry's persistent session for this server
+
+        Raises:
+            Exception: The connection error, also re-raised for failure_ttl seconds
+        """
+        key = self.key(url, headers)
+        tools = self._cached(key)
+        if tools is not None:
+            return tools
+
+        failure = self._failures.get(key)
+        if failure and time.monotonic() - failure[0] < self.failure_ttl:
+            raise failure[1]
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            tools = self._cached(key)
+            if tools is not None:
+                return tools
+            # Sessions from a closed event loop can't be closed from this one.
+            self._sessions.pop(key, None)
+
+            connection = {"url": url, "transport": "streamable_http"}
+            if headers:
+                connection["headers"] = headers
+            session = MCPSession(connection)
+            try:
+                await session.open()
+            except Exception as e:
+                self._failures[key] = (time.monotonic(), e)
+                raise
+            self._failures.pop(key, None)
+
+            self._sessions[key] = session
+            while len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                await evicted.close()
+            return list(session.tools)
+
+    async def aclose(self):
+        """Close every open session."""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        self._failures.clear()
+        await asyncio.gather(*(session.close() for session in sessions))
+
+
+mcp_tool_registry = MCPToolRegistry()
+
 async def load_mcp_tools(
     config: RunnableConfig,
     existing_tool_names: set[str],
@@ -504,19 +978,11 @@ async def load_mcp_tools(
     if mcp_tokens:
         auth_headers = {"Authorization": f"Bearer {mcp_tokens['access_token']}"}
     
-    mcp_server_config = {
-        "server_1": {
-            "url": server_url,
-            "headers": auth_headers,
-            "transport": "streamable_http"
-        }
-    }
     # TODO: When Multi-MCP Server support is merged in OAP, update this code
-    
-    # Step 4: Load tools from MCP server
+
+    # Step 4: Load tools from MCP server (cached per server and credentials)
     try:
-        client = MultiServerMCPClient(mcp_server_config)
-        available_mcp_tools = await client.get_tools()
+        available_mcp_tools = await mcp_tool_registry.get_tools(server_url, auth_headers)
     except Exception:
         # If MCP server connection fails, return empty list
         return []
@@ -535,8 +1001,8 @@ async def load_mcp_tools(
         if mcp_tool.name not in set(configurable.mcp_config.tools):
             continue
         
-        # Wrap tool with authentication handling and add to list
-        enhanced_tool = wrap_mcp_authenticate_tool(mcp_tool)
+        # Wrap a copy with authentication handling, the registry's tool is shared
+        enhanced_tool = wrap_mcp_authenticate_tool(mcp_tool.model_copy())
         configured_tools.append(enhanced_tool)
     
     return configured_tools
@@ -584,10 +1050,11 @@ def create_duckduckgo_search_wrapper(mcp_tool: BaseTool):
         """
         # Execute the search via MCP tool (reuse the already-loaded tool)
         try:
-            result = await asyncio.wait_for(
-                mcp_tool.ainvoke({"query": query, "engine": engine}, config),
-                timeout=45.0  # 45 second timeout
-            )
+            async with search_rate_limit(config):
+                result = await asyncio.wait_for(
+                    mcp_tool.ainvoke({"query": query, "engine": engine}, config),
+                    timeout=45.0  # 45 second timeout
+                )
         except asyncio.TimeoutError:
             return "Search request timed out after 45 seconds. Please try again with a more specific query."
         except McpError as e:
@@ -652,15 +1119,16 @@ def create_google_search_wrapper(mcp_tool: BaseTool):
         
         # Execute the search via MCP tool with auto-injected credentials
         try:
-            result = await asyncio.wait_for(
-                mcp_tool.ainvoke({
-                    "query": query,
-                    "engine": engine,
-                    "api_key": api_key,
-                    "engine_id": engine_id
-                }, config),
-                timeout=45.0  # 45 second timeout
-            )
+            async with search_rate_limit(config):
+                result = await asyncio.wait_for(
+                    mcp_tool.ainvoke({
+                        "query": query,
+                        "engine": engine,
+                        "api_key": api_key,
+                        "engine_id": engine_id
+                    }, config),
+                    timeout=45.0  # 45 second timeout
+                )
         except asyncio.TimeoutError:
             return "Search request timed out after 45 seconds. Please try again with a more specific query."
         except McpError as e:
@@ -733,24 +1201,11 @@ async def _load_mcp_tools(config: RunnableConfig) -> List[BaseTool]:
     last_error = None
     available_tools = None
     
-    # Try each endpoint format
+    # Try each endpoint format; the registry answers from cache after the first
+    # success and skips an endpoint that failed recently
     for server_url in endpoints_to_try:
         try:
-            mcp_server_config = {
-                "opensearch": {
-                    "transport": "streamable_http",
-                    "url": server_url,
-                }
-            }
-            
-            # Add headers if authentication is configured
-            if auth_headers:
-                mcp_server_config["opensearch"]["headers"] = auth_headers
-            
-            # Load tools from MCP server
-            client = MultiServerMCPClient(mcp_server_config)
-            available_tools = await client.get_tools()
-            
+            available_tools = await mcp_tool_registry.get_tools(server_url, auth_headers)
             break  # Success, exit loop
             
         except Exception as e:
@@ -871,9 +1326,11 @@ async def _summarize_opensearch_results(result: dict, config: RunnableConfig) ->
     
     summarization_tasks = [
         noop() if not result.get("raw_content")
-        else summarize_webpage(
+        else summarize_webpage_cached(
             summarization_model,
-            result["raw_content"][:max_char_to_include]
+            configurable.summarization_model,
+            result["raw_content"][:max_char_to_include],
+            config
         )
         for result in unique_results.values()
     ]
@@ -1223,6 +1680,7 @@ MODEL_TOKEN_LIMITS = {
     "bedrock:us.anthropic.claude-3-7-sonnet-20250219-v1:0": 200000,
     "bedrock:us.anthropic.claude-sonnet-4-20250514-v1:0": 200000,
     "bedrock:us.anthropic.claude-opus-4-20250514-v1:0": 200000,
+    "bedrock:global.anthropic.claude-sonnet-4-20250514-v1:0": 200000,
     "anthropic.claude-opus-4-1-20250805-v1:0": 200000,
 }
 
@@ -1263,6 +1721,440 @@ def remove_up_to_last_ai_message(messages: list[MessageLikeRepresentation]) -> l
     # No AI messages found, return original list
     return messages
 
+##########################
+# Token Budgeting Utils
+##########################
+
+# Share of the context window kept free for tokenizer error and request overhead
+CONTEXT_SAFETY_MARGIN = 0.05
+# Other providers' tokenizers produce more tokens than OpenAI's for the same text
+NON_OPENAI_TOKEN_RATIO = 1.25
+# Tokens added per message for roles and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+@lru_cache(maxsize=8)
+def _load_encoding(encoding_name: str):
+    """Load a tiktoken encoding once, or return None if it is unavailable."""
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        # Encodings are downloaded on first use and may be unavailable offline
+        logging.warning(f"Tokenizer {encoding_name} unavailable, estimating tokens from characters: {e}")
+        return None
+
+def _get_encoding(model_name: str):
+    """Return a tiktoken encoding for the model, or None if none is available."""
+    if tiktoken is None:
+        return None
+    if model_name.lower().startswith("openai:"):
+        try:
+            return _load_encoding(tiktoken.encoding_name_for_model(model_name.split(":", 1)[1]))
+        except KeyError:
+            return _load_encoding("o200k_base")
+    return _load_encoding("cl100k_base")
+
+def count_tokens(text: str, model_name: str) -> int:
+    """Count the tokens of text for a model using a local tokenizer.
+
+    Args:
+        text: Text to count
+        model_name: Model identifier, used to pick the tokenizer
+
+    Returns:
+        Token count, rounded up for models without an exact local tokenizer
+    """
+    encoding = _get_encoding(model_name or "")
+    if encoding is None:
+        return len(text) // 3 + 1
+    tokens = len(encoding.encode(text, disallowed_special=()))
+    if not (model_name or "").lower().startswith("openai:"):
+        tokens = int(tokens * NON_OPENAI_TOKEN_RATIO) + 1
+    return tokens
+
+def _message_text(message) -> str:
+    """Text of a message as sent to the model, including tool call arguments."""
+    text = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+    if getattr(message, "tool_calls", None):
+        text += json.dumps(message.tool_calls, default=str)
+    return text
+
+def count_message_tokens(messages: list[MessageLikeRepresentation], model_name: str) -> int:
+    """Count the tokens of a list of messages for a model."""
+    return sum(
+        count_tokens(_message_text(message), model_name) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: str) -> str:
+    """Cut text so that it counts at most max_tokens for the model."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model_name) <= max_tokens:
+        return text
+    encoding = _get_encoding(model_name or "")
+    if encoding is None:
+        return text[:max_tokens * 3]
+    if not (model_name or "").lower().startswith("openai:"):
+        max_tokens = int(max_tokens / NON_OPENAI_TOKEN_RATIO)
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+def get_input_token_budget(model_name: str, max_output_tokens: int) -> Optional[int]:
+    """Return how many input tokens a request to the model may use.
+
+    Args:
+        model_name: Model identifier to look up in MODEL_TOKEN_LIMITS
+        max_output_tokens: Output tokens reserved for the response
+
+    Returns:
+        Input token budget, or None if the model's context window is unknown
+    """
+    token_limit = get_model_token_limit(model_name)
+    if not token_limit:
+        return None
+    return int(token_limit * (1 - CONTEXT_SAFETY_MARGIN)) - max_output_tokens
+
+def _split_by_tokens(text: str, chunk_tokens: int, model_name: str) -> List[str]:
+    """Split text on paragraph boundaries into chunks of at most chunk_tokens."""
+    chunks, current, current_tokens = [], [], 0
+    for paragraph in text.split("\n\n"):
+        paragraph_tokens = count_tokens(paragraph, model_name)
+        while paragraph_tokens > chunk_tokens:
+            # A single paragraph over the limit is cut into pieces
+            piece = truncate_to_tokens(paragraph, chunk_tokens, model_name)
+            chunks.append(piece)
+            paragraph = paragraph[len(piece):]
+            paragraph_tokens = count_tokens(paragraph, model_name)
+        if current and current_tokens + paragraph_tokens > chunk_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(paragraph)
+        current_tokens += paragraph_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+async def condense_text(
+    text: str,
+    max_tokens: int,
+    model_name: str,
+    config: RunnableConfig,
+    max_rounds: int = 2
+) -> str:
+    """Condense text to at most max_tokens with map-reduce summarization.
+
+    The text is split into chunks that fit the summarization model, each chunk
+    is condensed in parallel, and the results are joined. This repeats until
+    the text fits; whatever still doesn't fit after max_rounds is truncated.
+
+    Args:
+        text: Text to condense
+        max_tokens: Token budget of the result, counted for model_name
+        model_name: Model the condensed text will be sent to
+        config: Runtime configuration with the summarization model settings
+        max_rounds: Maximum number of summarization passes
+
+    Returns:
+        Text that counts at most max_tokens for model_name
+    """
+    if count_tokens(text, model_name) <= max_tokens:
+        return text
+
+    configurable = Configuration.from_runnable_config(config)
+    summarization_model_name = configurable.summarization_model
+    summarization_max_tokens = configurable.summarization_model_max_tokens
+    summarization_model = init_chat_model(
+        **build_model_config(
+            summarization_model_name,
+            summarization_max_tokens,
+            config,
+            tags=["langsmith:nostream"]
+        )
+    )
+    chunk_tokens = min(
+        get_input_token_budget(summarization_model_name, summarization_max_tokens) or 32000,
+        configurable.max_content_length // 3
+    ) - count_tokens(condense_notes_prompt, summarization_model_name)
+
+    async def condense_chunk(chunk: str, target_tokens: int) -> str:
+        prompt = condense_notes_prompt.format(
+            notes=chunk,
+            # Roughly three quarters of a word per token
+            max_words=max(50, target_tokens * 3 // 4),
+            date=get_today_str()
+        )
+        try:
+            response = await rate_limited_ainvoke(
+                summarization_model,
+                [HumanMessage(content=prompt)],
+                summarization_model_name,
+                summarization_max_tokens,
+                config
+            )
+            return str(response.content)
+        except Exception as e:
+            logging.warning(f"Condensing notes failed with error: {str(e)}, truncating instead")
+            return truncate_to_tokens(chunk, target_tokens, model_name)
+
+    for _ in range(max_rounds):
+        if count_tokens(text, model_name) <= max_tokens:
+            return text
+        chunks = _split_by_tokens(text, max(chunk_tokens, 1000), summarization_model_name)
+        target_tokens = max(max_tokens // len(chunks), 1)
+        condensed = await asyncio.gather(*(condense_chunk(chunk, target_tokens) for chunk in chunks))
+        text = "\n\n".join(condensed)
+
+    return truncate_to_tokens(text, max_tokens, model_name)
+
+async def pack_notes(notes: List[str], max_tokens: int, model_name: str, config: RunnableConfig) -> List[str]:
+    """Fit notes into a token budget, condensing the largest ones first.
+
+    Notes that fit in an even share of the budget are kept verbatim. The
+    budget they leave unused is split between the larger notes, which are
+    condensed to their share.
+
+    Args:
+        notes: Notes to pack, in their original order
+        max_tokens: Token budget for all notes together
+        model_name: Model the notes will be sent to
+        config: Runtime configuration with the summarization model settings
+
+    Returns:
+        Notes in their original order, together within max_tokens
+    """
+    sizes = [count_tokens(note, model_name) + 1 for note in notes]
+    if sum(sizes) <= max_tokens:
+        return list(notes)
+
+    shares = {}
+    remaining = max(max_tokens - len(notes), 0)
+    order = sorted(range(len(notes)), key=lambda i: sizes[i])
+    for position, index in enumerate(order):
+        share = remaining // (len(order) - position)
+        shares[index] = min(sizes[index], share)
+        remaining -= shares[index]
+
+    async def fit(index: int, note: str) -> str:
+        if sizes[index] <= shares[index]:
+            return note
+        return await condense_text(note, shares[index], model_name, config)
+
+    return list(await asyncio.gather(*(fit(i, note) for i, note in enumerate(notes))))
+
+async def fit_messages_to_budget(
+    messages: list[MessageLikeRepresentation],
+    model_name: str,
+    max_output_tokens: int,
+    config: RunnableConfig
+) -> list[MessageLikeRepresentation]:
+    """Condense a conversation so that it fits the model's context window.
+
+    The first and last messages (system prompt and current instruction) are
+    kept as they are. Tool outputs are condensed first; if that is not
+    enough, other text messages are condensed as well.
+
+    Args:
+        messages: Messages that will be sent to the model
+        model_name: Model the messages will be sent to
+        max_output_tokens: Output tokens reserved for the response
+        config: Runtime configuration with the summarization model settings
+
+    Returns:
+        The messages, with condensed copies in place of oversized ones
+    """
+    budget = get_input_token_budget(model_name, max_output_tokens)
+    if budget is None or count_message_tokens(messages, model_name) <= budget:
+        return messages
+
+    messages = list(messages)
+    middle = range(1, len(messages) - 1)
+    passes = [
+        [
+            i for i in middle
+            if isinstance(messages[i], ToolMessage) and isinstance(messages[i].content, str)
+        ],
+        # AI messages with content blocks carry tool calls and are left intact
+        [i for i in middle if isinstance(messages[i].content, str)],
+    ]
+    for condensable in passes:
+        fixed_tokens = count_message_tokens(
+            [m for i, m in enumerate(messages) if i not in condensable], model_name
+        )
+        available = budget - fixed_tokens - MESSAGE_OVERHEAD_TOKENS * len(condensable)
+        if not condensable or available <= 0:
+            continue
+        contents = await pack_notes(
+            [messages[i].content for i in condensable], available, model_name, config
+        )
+        for i, content in zip(condensable, contents):
+            messages[i] = messages[i].model_copy(update={"content": content})
+        if count_message_tokens(messages, model_name) <= budget:
+            break
+    return messages
+
+##########################
+# Rate Limiting Utils
+##########################
+
+def approximate_tokens(messages) -> int:
+    """Rough token count of a prompt, about four characters per token."""
+    if isinstance(messages, str):
+        return len(messages) // 4
+    return sum(len(str(getattr(message, "content", message))) for message in messages) // 4
+
+class _RateLimitLane:
+    """Concurrency slots and a tokens-per-minute bucket for one model or service."""
+
+    def __init__(self, max_concurrency: int, tokens_per_minute: int = 0):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.available = float(tokens_per_minute)
+        self.updated_at = time.monotonic()
+        self.bucket_lock = asyncio.Lock()
+
+    async def take_tokens(self, tokens: int):
+        """Wait until the bucket holds tokens, then remove them."""
+        if not self.tokens_per_minute or tokens <= 0:
+            return
+        # A request larger than the whole budget waits for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        rate = self.tokens_per_minute / 60
+        # The lock keeps waiters in arrival order
+        async with self.bucket_lock:
+            while True:
+                now = time.monotonic()
+                self.available = min(
+                    self.tokens_per_minute,
+                    self.available + (now - self.updated_at) * rate
+                )
+                self.updated_at = now
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+                await asyncio.sleep((tokens - self.available) / rate)
+
+class RateLimiter:
+    """Process-wide limiter shared by the supervisor, all researchers and their tools.
+
+    Each lane (a model name, or "search" for search APIs) has a fixed number of
+    in-flight slots and an optional tokens-per-minute bucket. Calls over the
+    limit queue instead of failing with 429s, and the time spent queued is
+    recorded per lane.
+    """
+
+    def __init__(self):
+        self._lanes: Dict[Tuple[str, int, int], _RateLimitLane] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _lane(self, name: str, max_concurrency: int, tokens_per_minute: int) -> _RateLimitLane:
+        # Runs configured with different limits for the same model each keep
+        # their own lane, instead of replacing (and resetting) a shared one
+        key = (name, max_concurrency, tokens_per_minute)
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = _RateLimitLane(max_concurrency, tokens_per_minute)
+            self._lanes[key] = lane
+        return lane
+
+    @asynccontextmanager
+    async def limit(self, name: str, max_concurrency: int, tokens_per_minute: int = 0, tokens: int = 0):
+        """Hold a slot in the named lane for the duration of the block.
+
+        Args:
+            name: Lane name, usually the model identifier
+            max_concurrency: Maximum in-flight calls in the lane
+            tokens_per_minute: Token budget of the lane, 0 for no token limit
+            tokens: Tokens this call counts against the budget
+        """
+        lane = self._lane(name, max_concurrency, tokens_per_minute)
+        stats = self._stats.setdefault(name, {
+            "calls": 0, "waiting": 0, "in_flight": 0, "tokens": 0,
+            "total_wait": 0.0, "max_wait": 0.0,
+        })
+        started = time.monotonic()
+        stats["waiting"] += 1
+        try:
+            await lane.semaphore.acquire()
+            try:
+                await lane.take_tokens(tokens)
+            except BaseException:
+                lane.semaphore.release()
+                raise
+        finally:
+            stats["waiting"] -= 1
+
+        waited = time.monotonic() - started
+        stats["calls"] += 1
+        stats["tokens"] += tokens
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+        if waited >= 1.0:
+            logging.info(f"Waited {waited:.1f}s for a {name} slot")
+
+        stats["in_flight"] += 1
+        try:
+            yield
+        finally:
+            stats["in_flight"] -= 1
+            lane.semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-lane call counts, queue lengths and queue wait times."""
+        return {
+            name: {**stats, "avg_wait": stats["total_wait"] / stats["calls"] if stats["calls"] else 0.0}
+            for name, stats in self._stats.items()
+        }
+
+rate_limiter = RateLimiter()
+
+def model_rate_limit(model_name: str, messages, max_tokens: int, config: RunnableConfig = None):
+    """Rate limit a model call, counting the prompt and max output tokens.
+
+    Args:
+        model_name: Model identifier, used as the lane name
+        messages: Prompt messages or text sent to the model
+        max_tokens: Maximum output tokens of the call
+        config: Runtime configuration with the rate limits
+
+    Returns:
+        Async context manager that holds a slot for the call
+    """
+    configurable = Configuration.from_runnable_config(config)
+    return rate_limiter.limit(
+        model_name,
+        configurable.max_concurrent_model_calls,
+        configurable.model_tokens_per_minute,
+        tokens=approximate_tokens(messages) + max_tokens,
+    )
+
+def search_rate_limit(config: RunnableConfig = None):
+    """Rate limit a search API call.
+
+    Args:
+        config: Runtime configuration with the rate limits
+
+    Returns:
+        Async context manager that holds a slot for the call
+    """
+    configurable = Configuration.from_runnable_config(config)
+    return rate_limiter.limit("search", configurable.max_concurrent_search_calls)
+
+async def rate_limited_ainvoke(model, messages, model_name: str, max_tokens: int, config: RunnableConfig):
+    """Invoke a model through the shared rate limiter.
+
+    Args:
+        model: The configured runnable to invoke
+        messages: Prompt messages for the model
+        model_name: Model identifier, used as the lane name
+        max_tokens: Maximum output tokens of the call
+        config: Runtime configuration with the rate limits
+
+    Returns:
+        The model response
+    """
+    async with model_rate_limit(model_name, messages, max_tokens, config):
+        return await model.ainvoke(messages)
+
 ##########################
 # Misc Utils
 ##########################
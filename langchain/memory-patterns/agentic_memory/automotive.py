@@ -1,9 +1,10 @@
 import random
 import json
-from typing import List, Dict, Tuple, Optional
+from typing import Iterable, List, Dict, Tuple, Optional
 from typing_extensions import TypedDict
 from datetime import datetime
 import os
+import threading
 
 
 class RepairCostEstimate(TypedDict):
@@ -13,9 +14,66 @@ class RepairCostEstimate(TypedDict):
     total_cost: float
 
 
+class VehicleIndex:
+    """
+    VIN -> (make, model, year) index over the vehicle data file.
+
+    The file is parsed on first use and again only when its mtime or size
+    changes, instead of on every lookup.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._vehicles: Dict[str, Tuple[str, str, int]] = {}
+
+    def _current(self) -> Dict[str, Tuple[str, str, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return {}
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    vehicles = {}
+                    try:
+                        with open(self.path, "r") as f:
+                            data = json.load(f)
+                        for vin, record in data.items():
+                            if record and all(k in record for k in ("make", "model", "year")):
+                                vehicles[vin] = (record["make"], record["model"], record["year"])
+                    except Exception as e:
+                        print(f"Failed to load vehicle data from {self.path}: {e}")
+                    self._vehicles = vehicles
+                    self._signature = signature
+        return self._vehicles
+
+    def get(self, vin: str) -> Optional[Tuple[str, str, int]]:
+        return self._current().get(vin)
+
+    def get_many(self, vins: Iterable[str]) -> Dict[str, Tuple[str, str, int]]:
+        vehicles = self._current()
+        return {vin: vehicles[vin] for vin in vins if vin in vehicles}
+
+
+_vehicle_indexes: Dict[str, VehicleIndex] = {}
+_vehicle_indexes_lock = threading.Lock()
+
+
+def get_vehicle_index(path: str) -> VehicleIndex:
+    """Shared index per data file, so every toolkit and retriever reuses one parse"""
+    key = os.path.abspath(path)
+    with _vehicle_indexes_lock:
+        if key not in _vehicle_indexes:
+            _vehicle_indexes[key] = VehicleIndex(path)
+        return _vehicle_indexes[key]
+
+
 class AutomotiveKnowledgeToolkit:
     def __init__(self, vehicle_data_path: str = "vechicle_model.json"):
         self.vehicle_data_path = vehicle_data_path
+        self.vehicle_index = get_vehicle_index(vehicle_data_path)
         self.fallback_vehicle_catalog = {
             "Toyota": ["Camry", "Corolla", "RAV4"],
             "Honda": ["Civic", "Accord", "CR-V"],
@@ -45,19 +103,21 @@ class AutomotiveKnowledgeToolkit:
 
         return estimates
 
+    def _fallback_vehicle_info(self, vin: str) -> Tuple[str, str, int]:
+        # Seeded by the VIN so unknown vehicles get the same values on every lookup
+        rng = random.Random(vin)
+        fallback_make = rng.choice(list(self.fallback_vehicle_catalog.keys()))
+        fallback_model = rng.choice(self.fallback_vehicle_catalog[fallback_make])
+        fallback_year = rng.choice(self.fallback_years)
+
+        return fallback_make, fallback_model, fallback_year
+
     def get_vehicle_info(self, vin: str) -> Tuple[str, str, int]:
-        try:
-            if os.path.exists(self.vehicle_data_path):
-                with open(self.vehicle_data_path, "r") as f:
-                    data = json.load(f)
-                record = data.get(vin)
-                if record and all(k in record for k in ("make", "model", "year")):
-                    return record["make"], record["model"], record["year"]
-        except Exception:
-            pass  # fallback if anything fails
-
-        fallback_make = random.choice(list(self.fallback_vehicle_catalog.keys()))
-        fallback_model = random.choice(self.fallback_vehicle_catalog[fallback_make])
-        fallback_year = random.choice(self.fallback_years)
-
-        return fallback_make, fallback_model, fallback_year 
+        return self.vehicle_index.get(vin) or self._fallback_vehicle_info(vin)
+
+    def get_vehicles_info(self, vins: Iterable[str]) -> Dict[str, Tuple[str, str, int]]:
+        """Batch lookup of (make, model, year) per VIN"""
+        vins = list(vins)
+        found = self.vehicle_index.get_many(vins)
+        return {vin: found.get(vin) or self._fallback_vehicle_info(vin) for vin in vins}
+
@@ -1,11 +1,14 @@
 from abc import ABC, abstractmethod
+import atexit
 from collections import defaultdict
 from datetime import datetime, timezone
 import json
 import os
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from agentic_memory.base import BaseCheckPointer,BaseEpisodicStore, BaseLongTermStore
+from agentic_memory.indexing import ServiceRecordIndex
+from agentic_memory.storage import AppendOnlyLog
 
 class CheckPointerInMemory(BaseCheckPointer):
     """In-memory implementation storing multiple checkpoints per session"""
@@ -25,113 +28,117 @@ class CheckPointerInMemory(BaseCheckPointer):
         return self.checkpointer.get(session_id)
 
 
+SERVICE_FIELDS = ["issue_summary", "resolution", "service_engineer", "service_date"]
+
+
+def _apply_service_record(state: Optional[dict], op: str, value: Any) -> dict:
+    """Fold a VIN's log records: 'set' replaces the record, 'append' adds issues"""
+    if op == "set":
+        return value
+    record = dict(state or {})
+    record["service_history"] = list(record.get("service_history", [])) + value
+    return record
+
+
 class EpisodicStoreFile(BaseEpisodicStore):
-    """File-based implementation preserving original timestamps"""
-    def __init__(self, storage_dir: str = "auto_service_records"):
+    """Append-only log implementation preserving original timestamps"""
+    def __init__(self, storage_dir: str = "auto_service_records", fsync_every: int = 100):
         self.storage_dir = storage_dir
         os.makedirs(self.storage_dir, exist_ok=True)
-    
-    def _get_file_path(self, key: Tuple) -> str:
-        safe_key = [str(k).replace(os.sep, "_") for k in key]
-        file_path = os.path.join(self.storage_dir ,"_".join(safe_key) + ".json")
-        return file_path
-    
+        log_path = os.path.join(self.storage_dir, "episodic.jsonl")
+        is_new = not os.path.exists(log_path)
+        self.log = AppendOnlyLog(log_path, fsync_every=fsync_every)
+        if is_new:
+            self._import_json_files()
+
+    def _import_json_files(self):
+        """One-time import of the per-key JSON files written by earlier versions"""
+        for filename in sorted(os.listdir(self.storage_dir)):
+            if not filename.endswith(".json"):
+                continue
+            parts = filename[:-5].split("_")
+            if len(parts) < 3:
+                continue
+            with open(os.path.join(self.storage_dir, filename), 'r', encoding='utf-8') as f:
+                self.log.set(["_".join(parts[:2]), parts[2]], json.load(f))
+        self.log.sync()
+
+    def _key(self, key: Tuple) -> list:
+        return [str(k) for k in key]
+
     def put(self, key: Tuple, value: Any):
         """Append value with original timestamp"""
-        file_path = self._get_file_path(key)
-        history = []
-        
-        if os.path.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-        
-        history.append({
+        self.log.append(self._key(key), [{
             "v": 1,
             "value": value
-        })
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2)
-    
+        }])
+
     def get(self, key: Tuple) -> Optional[List[Dict]]:
-        file_path = self._get_file_path(key)
-        if not os.path.exists(file_path):
-            return None
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.log.get(self._key(key))
 
     def list_keys(self) -> list:
-        keys = []
-        for filename in os.listdir(self.storage_dir):
-            if filename.endswith(".json"):
-                base = filename[:-5]
-                parts = base.split("_")
-                if len(parts) >= 2:
-                    customer_id = "_".join(parts[:2])
-                    vin = parts[2]
-                    keys.append((customer_id, vin))
-        return keys
+        return [tuple(key) for key in self.log.keys()]
+
+    def compact(self):
+        self.log.compact()
+
+    def close(self):
+        self.log.close()
 
 class LongTermStoreFile(BaseLongTermStore):
-    """File-based implementation storing all VINs in a single JSON file with multiple issues per VIN"""
-    def __init__(self, storage_file: str = "long_term_store/all_vins.json"):
+    """Append-only log implementation storing all VINs with multiple issues per VIN"""
+    def __init__(self, storage_file: str = "long_term_store/all_vins.json", fsync_every: int = 100):
         self.storage_file = storage_file
-        dir_name = os.path.dirname(self.storage_file)
-        if dir_name:
-            os.makedirs(dir_name, exist_ok=True)
-        if not os.path.exists(self.storage_file):
-            with open(self.storage_file, 'w', encoding='utf-8') as f:
-                json.dump({}, f)
+        self.log_file = os.path.splitext(self.storage_file)[0] + ".jsonl"
+        # Search index persisted next to the store, kept current by the log on every record
+        self.index = ServiceRecordIndex(os.path.splitext(self.storage_file)[0] + ".index.json")
+        is_new = not os.path.exists(self.log_file)
+        self.log = AppendOnlyLog(self.log_file, apply=_apply_service_record, fsync_every=fsync_every,
+                                 listener=self.index)
+        atexit.register(self.index.save)
+        if is_new and os.path.exists(self.storage_file):
+            # One-time import of the single JSON file written by earlier versions
+            with open(self.storage_file, 'r', encoding='utf-8') as f:
+                for vin, record in json.load(f).items():
+                    self.log.set(vin, record)
+            self.log.sync()
 
     def put(self, key: str, value: dict):
-        data = {}
-        if os.path.exists(self.storage_file):
-            with open(self.storage_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        # If VIN exists, append to service_history list
-        if key in data:
-            existing = data[key]
-            if "service_history" not in existing:
-                existing["service_history"] = []
-            # Append new detailed issue summary to service_history
-            existing["service_history"].append({
-                "issue_summary": value.get("issue_summary", ""),
-                "resolution": value.get("resolution", ""),
-                "service_engineer": value.get("service_engineer", ""),
-                "service_date": value.get("service_date", ""),
-                **{k: v for k, v in value.items() if k not in ["issue_summary", "resolution", "service_engineer", "service_date"]}
-            })
-            data[key] = existing
-        else:
-            if type(value) == list: #To avoid er due to response formatted as list
-                for i in value:
-                    # New VIN entry with vehicle metadata and service_history list
-                    data[key] = {
-                        "service_history": [{
-                            "issue_summary": i.get("issue_summary", ""),
-                            "resolution": i.get("resolution", ""),
-                            "service_engineer": i.get("service_engineer", ""),
-                            "service_date": i.get("service_date", ""),
-                            **{k: v for k, v in i.items() if k not in ["issue_summary", "resolution", "service_engineer", "service_date"]}
-                        }]
-                    }
-        with open(self.storage_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # Responses are sometimes formatted as a list of issues
+        issues = value if isinstance(value, list) else [value]
+        # Each put appends the detailed issue summaries to the VIN's service_history
+        self.log.append(key, [{
+            "issue_summary": i.get("issue_summary", ""),
+            "resolution": i.get("resolution", ""),
+            "service_engineer": i.get("service_engineer", ""),
+            "service_date": i.get("service_date", ""),
+            **{k: v for k, v in i.items() if k not in SERVICE_FIELDS}
+        } for i in issues])
 
     def get(self, key: str) -> Optional[dict]:
-        if not os.path.exists(self.storage_file):
-            return None
-        with open(self.storage_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data.get(key)
+        return self.log.get(key)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """Iterate over (vin, record) pairs"""
+        return self.log.items()
 
-    def search(self, query: str) -> List[dict]:
+    def search(self, query: str = "", make: Optional[str] = None, model: Optional[str] = None,
+               year: Optional[Any] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+               limit: Optional[int] = None) -> List[dict]:
+        """Entries matching the query terms and attribute filters, best match first"""
+        self.log.refresh()
+        ranked = self.index.search(query, filters={"make": make, "model": model, "year": year},
+                                   date_from=date_from, date_to=date_to, limit=limit)
         results = []
-        if not os.path.exists(self.storage_file):
-            return results
-        with open(self.storage_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        for vin, entry in data.items():
-            if query.lower() in json.dumps(entry).lower():
+        for vin, score in ranked:
+            entry = self.get(vin)
+            if entry is not None:
                 results.append(entry)
-        return results
\ No newline at end of file
+        return results
+
+    def compact(self):
+        self.log.compact()
+
+    def close(self):
+        self.log.close()
+        self.index.save()
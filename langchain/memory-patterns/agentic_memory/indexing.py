@@ -0,0 +1,227 @@
+import bisect
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+ATTRIBUTE_FIELDS = ["make", "model", "year", "service_date"]
+STOPWORDS = {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+             "it", "of", "on", "or", "the", "to", "was", "were", "with"}
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Shorter query tokens only match exactly ("c" in "A/C" shouldn't match every "c..." term)
+MIN_PREFIX_LENGTH = 3
+# Bumped whenever the indexed terms change, so older snapshots are rebuilt
+INDEX_FORMAT_VERSION = 2
+
+
+def _singular(token: str) -> str:
+    """Strip a plural 's' so "brakes" and "brake" index the same term"""
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: Any) -> List[str]:
+    """Lowercase, singular alphanumeric tokens without stopwords"""
+    if not isinstance(text, str):
+        text = "" if text is None else str(text)
+    return [_singular(t) for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def prefix_matches(vocabulary: List[str], token: str) -> Iterator[str]:
+    """Terms of a sorted vocabulary starting with token ("brake" also finds "brakes")"""
+    position = bisect.bisect_left(vocabulary, token)
+    while position < len(vocabulary) and vocabulary[position].startswith(token):
+        yield vocabulary[position]
+        position += 1
+
+
+def _attribute_value(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class ServiceRecordIndex:
+    """
+    Inverted index over the VIN and every text field of VIN service records
+    plus exact-match attribute indexes (make/model/year/service_date).
+
+    It is fed record by record by the store's AppendOnlyLog (see
+    AppendOnlyLog.listener), so it stays current with every put, including puts
+    from other processes. `save()` persists the per-VIN terms together with the
+    log position they cover; on the next start only records past that position
+    are indexed again.
+    """
+    def __init__(self, index_file: str, save_every: int = 10_000):
+        self.index_file = index_file
+        self.save_every = save_every
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.inode: Optional[int] = None
+        self.end = 0
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_attrs: Dict[str, Set[Tuple[str, str]]] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._vocabulary: Optional[List[str]] = None
+        self.attributes: Dict[str, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self._dirty = 0
+
+    def _load(self):
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable search index {self.index_file}: {e}")
+            return
+        if snapshot.get("version") != INDEX_FORMAT_VERSION:
+            return
+        self.inode = snapshot["inode"]
+        self.end = snapshot["end"]
+        for vin, doc in snapshot["docs"].items():
+            self._add(vin, Counter(doc["terms"]), {tuple(a) for a in doc["attrs"]})
+
+    def save(self):
+        """Persist the index next to the store"""
+        with self._lock:
+            snapshot = {
+                "version": INDEX_FORMAT_VERSION,
+                "inode": self.inode,
+                "end": self.end,
+                "docs": {
+                    vin: {"terms": terms, "attrs": sorted(self.doc_attrs.get(vin, ()))}
+                    for vin, terms in self.doc_terms.items()
+                },
+            }
+            tmp_file = f"{self.index_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_file, self.index_file)
+            self._dirty = 0
+
+    def _add(self, vin: str, terms: Counter, attrs: Set[Tuple[str, str]]):
+        doc_terms = self.doc_terms.setdefault(vin, Counter())
+        doc_terms.update(terms)
+        for term in terms:
+            if term not in self.postings:
+                self._vocabulary = None
+            self.postings[term][vin] = doc_terms[term]
+        self.doc_attrs.setdefault(vin, set()).update(attrs)
+        for field, value in attrs:
+            self.attributes[field][value].add(vin)
+
+    def _remove(self, vin: str):
+        for term in self.doc_terms.pop(vin, {}):
+            self.postings[term].pop(vin, None)
+            if not self.postings[term]:
+                del self.postings[term]
+                self._vocabulary = None
+        for field, value in self.doc_attrs.pop(vin, ()):
+            vins = self.attributes[field][value]
+            vins.discard(vin)
+            if not vins:
+                del self.attributes[field][value]
+
+    def _extract(self, record: dict, issues: Iterable[dict]) -> Tuple[Counter, Set[Tuple[str, str]]]:
+        terms = Counter()
+        attrs = set()
+        for source in [record, *issues]:
+            if not isinstance(source, dict):
+                continue
+            for field, value in source.items():
+                if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+                    terms.update(tokenize(value))
+            for field in ATTRIBUTE_FIELDS:
+                if source.get(field) not in (None, ""):
+                    attrs.add((field, _attribute_value(source[field])))
+        return terms, attrs
+
+    def on_record(self, vin: str, op: str, value: Any, inode: int, offset: int, end: int):
+        with self._lock:
+            if inode != self.inode:
+                # A different log file (first run or compacted elsewhere) is replayed from the start
+                self._reset()
+                self.inode = inode
+            if offset < self.end:
+                return
+            if op in ("set", "delete"):
+                self._remove(vin)
+            if op == "set":
+                self._add(vin, *self._extract({"vin": vin, **value}, value.get("service_history", [])))
+            elif op == "append":
+                record = {} if vin in self.doc_terms else {"vin": vin}
+                self._add(vin, *self._extract(record, value))
+            self.end = end
+            self._dirty += 1
+            if self._dirty >= self.save_every:
+                self.save()
+
+    def on_compact(self, inode: int, end: int):
+        with self._lock:
+            self.inode = inode
+            self.end = end
+        self.save()
+
+    def search(
+        self,
+        query: str = "",
+        filters: Optional[Dict[str, Any]] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank VINs by TF-IDF of the query terms, restricted to VINs matching
+        every attribute filter and the service_date range. Query terms also
+        match indexed terms they are a prefix of, at half weight. VINs
+        containing more of the query terms rank first. With no query, filtered
+        VINs are returned in index order.
+        """
+        with self._lock:
+            candidates: Optional[Set[str]] = None
+            for field, value in (filters or {}).items():
+                if value is None:
+                    continue
+                vins = self.attributes.get(field, {}).get(_attribute_value(value), set())
+                candidates = set(vins) if candidates is None else candidates & vins
+            if date_from or date_to:
+                vins = set()
+                for date, date_vins in self.attributes.get("service_date", {}).items():
+                    if (not date_from or date >= date_from) and (not date_to or date <= date_to):
+                        vins |= date_vins
+                candidates = vins if candidates is None else candidates & vins
+
+            terms = set(tokenize(query))
+            if not terms:
+                vins = self.doc_terms.keys() if candidates is None else candidates
+                return [(vin, 0.0) for vin in list(vins)[:limit]]
+
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self.postings)
+            total = max(len(self.doc_terms), 1)
+            scores: Dict[str, List[float]] = {}
+            for token in terms:
+                matched = [token] if len(token) < MIN_PREFIX_LENGTH else prefix_matches(self._vocabulary, token)
+                # Best match per VIN for this query term; exact matches outrank prefix matches
+                token_scores: Dict[str, float] = {}
+                for term in matched:
+                    postings = self.postings.get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(1 + total / len(postings)) * (1.0 if term == token else 0.5)
+                    for vin, tf in postings.items():
+                        if candidates is not None and vin not in candidates:
+                            continue
+                        token_scores[vin] = max(token_scores.get(vin, 0.0), (1 + math.log(tf)) * idf)
+                for vin, token_score in token_scores.items():
+                    score = scores.setdefault(vin, [0, 0.0])
+                    score[0] += 1
+                    score[1] += token_score
+            ranked = sorted(scores.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)
+            return [(vin, score[1]) for vin, score in ranked[:limit]]
@@ -13,9 +13,16 @@ from chromadb.utils import embedding_functions
 from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 from agentic_memory.base import BaseRetriever, BaseLongTermStore
 from agentic_memory.automotive import AutomotiveKnowledgeToolkit
+from agentic_memory.indexing import MIN_PREFIX_LENGTH, prefix_matches, tokenize
 from collections import defaultdict
-import botocore
-import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+import gzip
+import hashlib
+import heapq
+import math
+import sqlite3
+import threading
 
 
 
@@ -25,19 +32,80 @@ class LocalHuggingFaceEmbeddingFunction(EmbeddingFunction[Documents]):
     def __call__(self, input: Documents) -> Embeddings:
         return self.model.encode(input).tolist()
 
+def content_hash(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class BuildCache:
+    """
+    SQLite cache of entry embeddings and cluster summaries keyed by content hash,
+    so a rebuild only embeds and summarizes what changed since the last one.
+    """
+    def __init__(self, path: str):
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT)")
+        self._conn.commit()
+
+    def get_embeddings(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+        return found
+
+    def put_embeddings(self, vectors: Dict[str, List[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()]
+            )
+            self._conn.commit()
+
+    def get_summary(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put_summary(self, key: str, summary: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO summaries (key, summary) VALUES (?, ?)", (key, summary))
+            self._conn.commit()
+
+
 class SemanticStoreRetrieval(BaseRetriever):
     def __init__(
         self,
         long_term_store: BaseLongTermStore,
         n_clusters: int = 5,
         vector_store_path: str = "semantic_vector_store",
-        embedding_model: str = "sentence-transformers/all-mpnet-base-v2"
+        embedding_model: str = "sentence-transformers/all-mpnet-base-v2",
+        max_concurrent_summaries: int = 4
     ):
         self.long_term_store = long_term_store
         self.vector_store_path = vector_store_path
         self.n_clusters = n_clusters
-        self.bedrock_client = boto3.client('bedrock-runtime')
+        self.max_concurrent_summaries = max_concurrent_summaries
+        # The only retry layer for Bedrock calls: adaptive mode backs off with jitter
+        # and rate-limits the shared client itself once Bedrock starts throttling
+        self.bedrock_client = boto3.client('bedrock-runtime', config=Config(
+            retries={"max_attempts": 5, "mode": "adaptive"},
+            max_pool_connections=max(10, max_concurrent_summaries)
+        ))
+        self.embedding_model = embedding_model
         self.embeddings = LocalHuggingFaceEmbeddingFunction(embedding_model)
+        self.cache = BuildCache(os.path.join(self.vector_store_path, "build_cache.db"))
+        self.auto_tool_kit = AutomotiveKnowledgeToolkit()
         self.chroma_client = chromadb.PersistentClient(path=self.vector_store_path)
 
         try:
@@ -52,12 +120,11 @@ class SemanticStoreRetrieval(BaseRetriever):
 
     def load_all_entries(self) -> List[Dict[str, Any]]:
         entries = []
-        auto_tool_kit = AutomotiveKnowledgeToolkit()
-        if hasattr(self.long_term_store, 'storage_file') and os.path.exists(self.long_term_store.storage_file):
-            with open(self.long_term_store.storage_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            for vin, record in data.items():
-                make, model, year = auto_tool_kit.get_vehicle_info(vin)
+        if hasattr(self.long_term_store, 'items'):
+            records = list(self.long_term_store.items())
+            vehicles = self.auto_tool_kit.get_vehicles_info(vin for vin, _ in records)
+            for vin, record in records:
+                make, model, year = vehicles[vin]
                 entry = record.copy()
                 entry['vin'] = vin
                 entry['make'] = make
@@ -81,7 +148,7 @@ class SemanticStoreRetrieval(BaseRetriever):
                 " ".join([issue.get('issue_summary', '') for issue in entry.get('service_history', [])])
                 for entry in group_entries
             ]
-            vectors = self.embeddings(texts)
+            vectors = self.embed_texts(texts)
             n = min(n_clusters, len(group_entries))
             if n < 1:
                 continue
@@ -93,7 +160,18 @@ class SemanticStoreRetrieval(BaseRetriever):
             all_clusters.extend(clusters)
         return all_clusters
 
-    def call_bedrock_nova(self, prompt: str, max_retries: int = 3) -> str:
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, reusing cached vectors for unchanged content"""
+        keys = [content_hash(self.embedding_model, text) for text in texts]
+        cached = self.cache.get_embeddings(list(set(keys)))
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        if missing:
+            vectors = dict(zip(missing.keys(), self.embeddings(list(missing.values()))))
+            self.cache.put_embeddings(vectors)
+            cached.update(vectors)
+        return [cached[key] for key in keys]
+
+    def call_bedrock_nova(self, prompt: str) -> str:
         request_body = {
             "messages": [
                 {
@@ -106,29 +184,16 @@ class SemanticStoreRetrieval(BaseRetriever):
                 }
             ]
         }
-        retries = 0
-        while retries < max_retries:
-            try:
-                response = self.bedrock_client.invoke_model(
-                    modelId="us.amazon.nova-pro-v1:0",
-                    contentType="application/json",
-                    accept="application/json",
-                    body=json.dumps(request_body)
-                )
-                result = json.loads(response['body'].read())
-                # Adjust this line if Nova's output format changes
-                return result.get('output', [{}]).get('message',{}).get('content',[])[0].get('text')
-            except botocore.exceptions.ClientError as e:
-                error_code = e.response['Error']['Code']
-                if error_code == "ThrottlingException":
-                    print(f"ThrottlingException encountered {retries}. Waiting 60 seconds before retrying...")
-                    time.sleep(60)
-                    retries += 1
-                else:
-                    raise
-            except Exception as e:
-                raise
-        raise RuntimeError("Max retries exceeded for Bedrock Nova call due to throttling.")
+        # Throttling is retried by the client (adaptive mode, see __init__)
+        response = self.bedrock_client.invoke_model(
+            modelId="us.amazon.nova-pro-v1:0",
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps(request_body)
+        )
+        result = json.loads(response['body'].read())
+        # Adjust this line if Nova's output format changes
+        return result.get('output', [{}]).get('message',{}).get('content',[])[0].get('text')
 
     def summarize_cluster(self, cluster: List[Dict[str, Any]]) -> Dict[str, Any]:
         combined_text = ""
@@ -143,9 +208,15 @@ class SemanticStoreRetrieval(BaseRetriever):
             combined_text +
             "\nSummary:"
         )
-        summary = self.call_bedrock_nova(prompt)
+        # Clusters whose members and issues are unchanged reuse their previous summary
+        key = content_hash(prompt)
+        summary = self.cache.get_summary(key)
+        if summary is None:
+            summary = self.call_bedrock_nova(prompt)
+            self.cache.put_summary(key, summary)
         first = cluster[0]
         meta = {
+            "id": f"summary_{key[:32]}",
             "make": first.get("make", ""),
             "model": first.get("model", ""),
             "year": first.get("year", ""),
@@ -160,25 +231,27 @@ class SemanticStoreRetrieval(BaseRetriever):
             print("No entries found in long term store.")
             return
         clusters = self.cluster_entries(entries, self.n_clusters)
-        summaries = [self.summarize_cluster(cluster) for cluster in clusters]
-        documents = [summary["summary"] for summary in summaries]
-        metadatas = [{"make": s["make"], "model": s["model"], "year": s["year"]} for s in summaries]
-        ids = [f"summary_{i}" for i in range(len(documents))]
-        # Remove existing collection and recreate to avoid duplicates
-        try:
-            self.chroma_client.delete_collection("semantic_store")
-        except Exception:
-            pass  # Collection may not exist yet
-        self.collection = self.chroma_client.create_collection(
-            "semantic_store",
-            embedding_function=self.embeddings
-        )
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
-        #self.chroma_client.persist()
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_summaries) as pool:
+            summaries = {s["id"]: s for s in pool.map(self.summarize_cluster, clusters)}
+
+        if self.collection is None:
+            self.collection = self.chroma_client.get_or_create_collection(
+                name="semantic_store",
+                embedding_function=self.embeddings
+            )
+        # Summary ids are content hashes: only new clusters are upserted, vanished ones deleted
+        existing = set(self.collection.get(include=[])["ids"])
+        new = [s for summary_id, s in summaries.items() if summary_id not in existing]
+        stale = list(existing - summaries.keys())
+        if new:
+            self.collection.upsert(
+                documents=[s["summary"] for s in new],
+                metadatas=[{"make": s["make"], "model": s["model"], "year": s["year"]} for s in new],
+                ids=[s["id"] for s in new]
+            )
+        if stale:
+            self.collection.delete(ids=stale)
+        print(f"Semantic store updated: {len(new)} new, {len(stale)} removed, {len(summaries) - len(new)} unchanged summaries")
 
     def search(self, make: Optional[str], model: Optional[str], issue: Optional[str]) -> List[Dict[str, Any]]:
         """Search summaries filtered by metadata and issue similarity using Chroma native API."""
@@ -206,10 +279,14 @@ class SemanticStoreRetrieval(BaseRetriever):
         return output
 
 
+GRAPH_FORMAT_VERSION = 2
+
+
 class GraphRetrieval(BaseRetriever):
-    def __init__(self, long_term_store, graph_json_path="semantic_graph_store/vehicle_graph.json"):
+    def __init__(self, long_term_store, graph_json_path="semantic_graph_store/vehicle_graph.json.gz"):
         self.long_term_store = long_term_store
         self.graph_json_path = graph_json_path
+        self.auto_tool_kit = AutomotiveKnowledgeToolkit()
         self.G = nx.MultiDiGraph()
         if os.path.exists(self.graph_json_path):
             self.load_graph()
@@ -221,13 +298,16 @@ class GraphRetrieval(BaseRetriever):
         """Extracts nodes and edges from long-term store and builds the graph."""
         self.G.clear()
 
-        if hasattr(self.long_term_store, 'storage_file') and os.path.exists(self.long_term_store.storage_file):
-            with open(self.long_term_store.storage_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            for vin, record in data.items():
+        if hasattr(self.long_term_store, 'items'):
+            records = list(self.long_term_store.items())
+            # Only real index hits: the toolkit's made-up fallback vehicles
+            # would be returned by search(make=...) as if they were real
+            vehicles = self.auto_tool_kit.vehicle_index.get_many(vin for vin, _ in records)
+            for vin, record in records:
 
+                make, model, year = vehicles.get(vin, (None, None, None))
                 vehicle_node = f"VIN:{vin}"
-                self.G.add_node(vehicle_node, type="Vehicle", vin=vin, make=record.get("make"), model=record.get("model"), year=record.get("year"))
+                self.G.add_node(vehicle_node, type="Vehicle", vin=vin, make=record.get("make") or make, model=record.get("model") or model, year=record.get("year") or year)
 
                 for idx, service in enumerate(record.get("service_history", [])):
                     issue_node = f"Issue:{vin}:{idx}"
@@ -242,45 +322,138 @@ class GraphRetrieval(BaseRetriever):
                         engineer_node = f"Engineer:{service.get('service_engineer')}"
                         self.G.add_node(engineer_node, type="Engineer", name=service.get("service_engineer"))
                         self.G.add_edge(resolution_node, engineer_node, relation="performed_by")
+        self.build_indexes()
+
+    def build_indexes(self):
+        """Secondary indexes so searches touch only matching vehicles and issues."""
+        self.vehicles_by_make = defaultdict(list)
+        self.vehicles_by_make_model = defaultdict(list)
+        self.issue_vehicle: Dict[str, str] = {}
+        self.issue_tokens: Dict[str, set] = {}
+        self.issues_by_token = defaultdict(set)
+        for node, data in self.G.nodes(data=True):
+            if data.get("type") != "Vehicle":
+                continue
+            make = str(data.get("make") or "").lower()
+            model = str(data.get("model") or "").lower()
+            self.vehicles_by_make[make].append(node)
+            self.vehicles_by_make_model[(make, model)].append(node)
+            for _, issue_node, edge_data in self.G.out_edges(node, data=True):
+                if edge_data.get("relation") != "has_issue":
+                    continue
+                tokens = set(tokenize(self.G.nodes[issue_node].get("summary")))
+                self.issue_vehicle[issue_node] = node
+                self.issue_tokens[issue_node] = tokens
+                for token in tokens:
+                    self.issues_by_token[token].add(issue_node)
+        # Sorted vocabulary for prefix lookups ("brake" also finds "brakes")
+        self.vocabulary = sorted(self.issues_by_token)
 
     def save_graph(self):
-        """Persist the graph as a JSON file."""
+        """Persist the graph as gzip-compressed compact JSON."""
         directory = os.path.dirname(self.graph_json_path)
-        os.makedirs(directory, exist_ok=True)
-        with open(self.graph_json_path, 'w', encoding='utf-8') as f:
-            json.dump(nx.node_link_data(self.G), f, indent=2)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            "format": GRAPH_FORMAT_VERSION,
+            "nodes": [[node, attrs] for node, attrs in self.G.nodes(data=True)],
+            "edges": [[u, v, attrs] for u, v, attrs in self.G.edges(data=True)],
+        }
+        tmp_path = f"{self.graph_json_path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.graph_json_path)
 
     def load_graph(self):
-        """Load the graph from a JSON file."""
-        with open(self.graph_json_path, 'r', encoding='utf-8') as f:
-            self.G = nx.node_link_graph(json.load(f))
+        """Load the graph saved by save_graph, or a pretty-printed node-link JSON file."""
+        opener = gzip.open if self.graph_json_path.endswith(".gz") else open
+        with opener(self.graph_json_path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("format") == GRAPH_FORMAT_VERSION:
+            self.G = nx.MultiDiGraph()
+            self.G.add_nodes_from((node, attrs) for node, attrs in data["nodes"])
+            self.G.add_edges_from((u, v, attrs) for u, v, attrs in data["edges"])
+        else:
+            self.G = nx.node_link_graph(data)
+        self.build_indexes()
 
-    def search(self, make: Optional[str]=None, model: Optional[str]=None, issue: Optional[str]=None) -> List[Dict[str, Any]]:
-        """Search for vehicles/issues/resolutions by metadata and keyword."""
-        results = []
-        for node, data in self.G.nodes(data=True):
-            if data.get("type") == "Vehicle":
-                if (make and data.get("make") != make) or (model and data.get("model") != model):
+    def _issues_matching(self, issue: str) -> Dict[str, float]:
+        """Issue nodes containing every query token (as a token prefix), scored by IDF."""
+        scores: Optional[Dict[str, float]] = None
+        total = max(len(self.issue_tokens), 1)
+        for token in set(tokenize(issue)):
+            matches: Dict[str, float] = {}
+            # Same rule as the store index: short tokens ("a", "c" in "A/C") match exactly
+            terms = [token] if len(token) < MIN_PREFIX_LENGTH else prefix_matches(self.vocabulary, token)
+            for term in terms:
+                postings = self.issues_by_token.get(term)
+                if not postings:
                     continue
+                # Exact token matches outrank prefix matches
+                weight = math.log(1 + total / len(postings)) * (1.0 if term == token else 0.5)
+                for issue_node in postings:
+                    matches[issue_node] = max(matches.get(issue_node, 0.0), weight)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {node: score + matches[node] for node, score in scores.items() if node in matches}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def search(self, make: Optional[str]=None, model: Optional[str]=None, issue: Optional[str]=None,
+               top_k: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Search for vehicles/issues/resolutions by metadata and keyword.
+
+        Issue keywords are ranked best match first; `top_k` and `offset` page
+        through the results.
+        """
+        vehicles = None
+        if make and model:
+            vehicles = self.vehicles_by_make_model.get((make.lower(), model.lower()), [])
+        elif make:
+            vehicles = self.vehicles_by_make.get(make.lower(), [])
+        elif model:
+            vehicles = [node for (_, m), nodes in self.vehicles_by_make_model.items() if m == model.lower() for node in nodes]
 
-                for _, issue_node, edge_data in self.G.out_edges(node, data=True):
-                    if edge_data.get("relation") == "has_issue":
-                        issue_data = self.G.nodes[issue_node]
-
-                        if issue and issue.lower() not in (issue_data.get("summary") or "").lower():
-                            continue
-
-                        for _, res_node, res_edge in self.G.out_edges(issue_node, data=True):
-                            if res_edge.get("relation") == "resolved_by":
-                                res_data = self.G.nodes[res_node]
-                                results.append({
-                                    "vin": data.get("vin"),
-                                    "make": data.get("make"),
-                                    "model": data.get("model"),
-                                    "year": data.get("year"),
-                                    "issue_summary": issue_data.get("summary"),
-                                    "issue_date": issue_data.get("date"),
-                                    "resolution": res_data.get("resolution"),
-                                    "engineer": res_data.get("engineer")
-                                })
+        if issue and tokenize(issue):
+            scores = self._issues_matching(issue)
+            if vehicles is not None:
+                allowed = set(vehicles)
+                scores = {node: score for node, score in scores.items() if self.issue_vehicle[node] in allowed}
+            limit = offset + top_k if top_k is not None else None
+            if limit is not None:
+                ranked = heapq.nlargest(limit, scores, key=scores.get)
+            else:
+                ranked = sorted(scores, key=scores.get, reverse=True)
+            issue_nodes = ranked[offset:]
+        else:
+            if vehicles is None:
+                vehicles = [node for nodes in self.vehicles_by_make.values() for node in nodes]
+            issue_nodes = [
+                issue_node
+                for vehicle_node in vehicles
+                for _, issue_node, edge_data in self.G.out_edges(vehicle_node, data=True)
+                if edge_data.get("relation") == "has_issue"
+            ]
+            issue_nodes = issue_nodes[offset:offset + top_k if top_k is not None else None]
+
+        results = []
+        for issue_node in issue_nodes:
+            data = self.G.nodes[self.issue_vehicle[issue_node]]
+            issue_data = self.G.nodes[issue_node]
+            for _, res_node, res_edge in self.G.out_edges(issue_node, data=True):
+                if res_edge.get("relation") == "resolved_by":
+                    res_data = self.G.nodes[res_node]
+                    results.append({
+                        "vin": data.get("vin"),
+                        "make": data.get("make"),
+                        "model": data.get("model"),
+                        "year": data.get("year"),
+                        "issue_summary": issue_data.get("summary"),
+                        "issue_date": issue_data.get("date"),
+                        "resolution": res_data.get("resolution"),
+                        "engineer": res_data.get("engineer")
+                    })
         return results
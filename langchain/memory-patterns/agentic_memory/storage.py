@@ -0,0 +1,269 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within this process
+    fcntl = None
+
+Apply = Callable[[Any, str, Any], Any]
+
+
+def apply_list(state: Optional[List], op: str, value: Any) -> List:
+    """Default fold: 'set' replaces the list, 'append' extends it"""
+    if op == "set":
+        return list(value)
+    return (state or []) + list(value)
+
+
+def _encode(key: Any, op: str, value: Any) -> bytes:
+    record = {"k": key, "op": op, "v": value}
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _index_key(key: Any) -> Any:
+    return tuple(key) if isinstance(key, list) else key
+
+
+class AppendOnlyLog:
+    """
+    Key/value store kept as an append-only JSONL log with an in-memory index.
+
+    Each write appends one line {"k": key, "op": op, "v": value} and the index
+    maps every key to the offsets of its lines, so a put is O(1) and a get
+    only reads that key's lines. The value of a key is obtained by folding its
+    records with `apply`, starting from the last 'set'.
+
+    Writers in other processes are serialized with an exclusive file lock and
+    their records are picked up by tailing the log before each operation.
+    fsync is batched: the log is synced every `fsync_every` writes or when
+    `fsync_interval` seconds have passed since the last sync, and on close.
+    `compact()` rewrites the log with a single 'set' record per key; it runs
+    automatically once there are `compact_ratio` times more records than keys.
+
+    An optional `listener` sees every record as it is indexed, including those
+    written by other processes, through `on_record(key, op, value, inode,
+    offset, end)`, and is told about compactions through `on_compact(inode, end)`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        apply: Apply = apply_list,
+        fsync_every: int = 100,
+        fsync_interval: float = 1.0,
+        compact_ratio: float = 4.0,
+        compact_min_records: int = 10_000,
+        listener: Any = None,
+    ):
+        self.path = path
+        self.apply = apply
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_ratio = compact_ratio
+        self.compact_min_records = compact_min_records
+        self.listener = listener
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._open()
+        atexit.register(self.close)
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self._inode = os.fstat(self._fd).st_ino
+        self._index: Dict[Any, List[Tuple[int, int]]] = {}
+        self._records = 0
+        self._end = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _stale(self) -> bool:
+        """Whether another process replaced the log file (compaction)"""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """Hold the thread lock and the file lock, reopening a replaced log"""
+        with self._lock:
+            while True:
+                if self._fd is None or self._stale():
+                    self._open()
+                fd = self._fd
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                if not self._stale():
+                    break
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            try:
+                self._scan(truncate_partial=exclusive)
+                yield
+            finally:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    except OSError:
+                        pass  # fd was closed by compaction, which released the lock
+
+    def _scan(self, truncate_partial: bool = False):
+        """Index records appended since the last scan, by us or other processes"""
+        size = os.fstat(self._fd).st_size
+        offset = self._end
+        pending = b""
+        while offset + len(pending) < size:
+            chunk = os.pread(self._fd, min(1 << 20, size - offset - len(pending)), offset + len(pending))
+            if not chunk:
+                break
+            pending += chunk
+            lines = pending.split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                self._index_record(line, offset)
+                offset += len(line) + 1
+        self._end = offset
+        if pending and truncate_partial:
+            # A writer died mid-line; only safe to drop while holding the exclusive lock
+            os.ftruncate(self._fd, self._end)
+
+    def _index_record(self, line: bytes, offset: int):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            print(f"Skipping corrupt record at offset {offset} in {self.path}")
+            return
+        key = _index_key(record["k"])
+        position = (offset, len(line) + 1)
+        if record["op"] == "delete":
+            self._index.pop(key, None)
+        elif record["op"] == "set":
+            self._index[key] = [position]
+        else:
+            self._index.setdefault(key, []).append(position)
+        self._records += 1
+        if self.listener is not None:
+            self.listener.on_record(key, record["op"], record["v"], self._inode, offset, offset + position[1])
+
+    def _fold(self, positions: List[Tuple[int, int]]) -> Any:
+        state = None
+        for offset, length in positions:
+            record = json.loads(os.pread(self._fd, length, offset))
+            state = self.apply(state, record["op"], record["v"])
+        return state
+
+    def _write(self, line: bytes):
+        view = memoryview(line)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+        offset = self._end
+        self._end += len(line)
+        self._index_record(line[:-1], offset)
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self._sync()
+
+    def _sync(self):
+        if self._unsynced:
+            os.fsync(self._fd)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, key: Any, value: Any, op: str = "append"):
+        """Append a record for key; `op` is 'append', 'set' or 'delete'"""
+        line = _encode(key, op, value)
+        with self._locked(exclusive=True):
+            self._write(line)
+            needs_compaction = (
+                self._records >= self.compact_min_records
+                and self._records > self.compact_ratio * max(len(self._index), 1)
+            )
+        if needs_compaction:
+            self.compact()
+
+    def set(self, key: Any, value: Any):
+        self.append(key, value, op="set")
+
+    def delete(self, key: Any):
+        self.append(key, None, op="delete")
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Folded value of key, or None"""
+        with self._locked(exclusive=False):
+            positions = self._index.get(_index_key(key))
+            if not positions:
+                return None
+            return self._fold(positions)
+
+    def keys(self) -> List[Any]:
+        with self._locked(exclusive=False):
+            return list(self._index.keys())
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        """Iterate over (key, value) pairs, folding one key at a time"""
+        for key in self.keys():
+            value = self.get(key)
+            if value is not None:
+                yield key, value
+
+    def refresh(self):
+        """Pick up records appended by other processes"""
+        with self._locked(exclusive=False):
+            pass
+
+    def __contains__(self, key: Any) -> bool:
+        with self._locked(exclusive=False):
+            return _index_key(key) in self._index
+
+    def __len__(self) -> int:
+        with self._locked(exclusive=False):
+            return len(self._index)
+
+    def compact(self):
+        """Rewrite the log with one 'set' record per key"""
+        with self._locked(exclusive=True):
+            tmp_path = f"{self.path}.compact"
+            index: Dict[Any, List[Tuple[int, int]]] = {}
+            offset = 0
+            with open(tmp_path, "wb") as out:
+                for key, positions in self._index.items():
+                    line = _encode(key, "set", self._fold(positions))
+                    out.write(line)
+                    index[key] = [(offset, len(line))]
+                    offset += len(line)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, self.path)
+            # Closing the old fd releases its lock; waiting writers then see the new file
+            self._open()
+            self._index = index
+            self._records = len(index)
+            self._end = offset
+            if self.listener is not None:
+                self.listener.on_compact(self._inode, self._end)
+
+    def sync(self):
+        """fsync any batched writes"""
+        with self._lock:
+            if self._fd is not None:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                self._sync()
+                os.close(self._fd)
+                self._fd = None
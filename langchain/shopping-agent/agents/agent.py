@@ -11,6 +11,7 @@ from langgraph.types import interrupt
 
 from agents.subagents import invoice_subagent, opensearch_subagent
 from agents.opensearch_memory_client import get_memory_client
+from agents.memory_writer import get_memory_writer
 from agents.prompts import (
     supervisor_routing_prompt,
     supervisor_system_prompt,
@@ -197,7 +198,7 @@ def should_interrupt(state: State):
 @timing_decorator("load_memory")
 def load_memory(state: State):
     """Loads music preferences from users using OpenSearch agentic memory."""
-    user_id = state["customer_id"]
+    user_id = str(state["customer_id"])
     formatted_memory = ""
 
     try:
@@ -250,7 +251,7 @@ class UserProfile(BaseModel):
 
 @timing_decorator("create_memory")
 def create_memory(state: State):
-    """Updates customer preferences using OpenSearch agentic memory."""
+    """Queues an update of customer preferences in OpenSearch agentic memory."""
     user_id = str(state["customer_id"])
     formatted_memory = state.get("loaded_memory", "")
 
@@ -270,16 +271,48 @@ def create_memory(state: State):
         print(f"[Memory] No preference keywords detected in conversation, skipping memory update")
         return {}
 
-    print(f"[Memory] Preference keywords detected, updating customer preferences")
+    print(f"[Memory] Preference keywords detected, queueing preference update")
+
+    # Extraction and storage run in the background, off the response path.
+    # A queued update for the same customer is merged with this one, so turns
+    # from another conversation of the customer aren't lost.
+    get_memory_writer().submit(
+        user_id, update_memory, user_id, list(messages), formatted_memory,
+        merge=merge_memory_updates
+    )
+
+    return {}
 
-    try:
-        # Get memory client (uses OPENSEARCH_MEMORY_CONTAINER_ID from env)
-        memory_client = get_memory_client()
 
+def merge_memory_updates(queued: tuple, latest: tuple) -> tuple:
+    """Combines a queued update_memory call with a newer one for the same customer."""
+    user_id, queued_messages, _ = queued
+    _, messages, loaded_memory = latest
+    # A later turn of the same conversation repeats its earlier messages;
+    # messages from another conversation are carried over
+    message_ids = {message.id for message in messages if message.id is not None}
+    carried = [message for message in queued_messages if message.id is None or message.id not in message_ids]
+    return user_id, carried + messages, loaded_memory
+
+
+def update_memory(user_id: str, messages: List[AnyMessage], loaded_memory: str):
+    """Extracts updated preferences from a conversation and stores them in OpenSearch agentic memory."""
+    memory_client = get_memory_client()
+
+    # An update that finished while this one was queued is newer than the
+    # memory loaded at the start of the turn; the cache is written through,
+    # so this read sees it without querying OpenSearch
+    existing_memory = memory_client.get_customer_memory(customer_id=user_id)
+    if existing_memory and existing_memory.get('preferences'):
+        formatted_memory = format_user_memory({"memory": existing_memory['preferences']})
+    else:
+        formatted_memory = loaded_memory
+
+    try:
         # Use LLM to extract updated preferences from conversation
         formatted_system_message = SystemMessage(
             content=create_memory_prompt.format(
-                conversation=state["messages"],
+                conversation=messages,
                 memory_profile=formatted_memory
             )
         )
@@ -296,7 +329,7 @@ def create_memory(state: State):
             "interests": updated_memory.interests
         }
 
-        # Store in OpenSearch agentic memory
+        # Store in OpenSearch agentic memory (also updates the memory cache)
         memory_id = memory_client.add_customer_memory(
             customer_id=user_id,
             preferences=preferences_dict
@@ -308,8 +341,6 @@ def create_memory(state: State):
         print(f"[Memory] Error creating/updating memory: {e}")
         # Continue even if memory update fails
 
-    return {}
-
 
 # ------------------------------------------------------------
 # State Graph with Conditional Routing
@@ -1,33 +1,126 @@
 """
 In-memory cache for customer preferences to reduce OpenSearch query latency.
 
-This module provides a TTL-based cache that stores customer memory data,
-reducing the need for repeated OpenSearch queries for the same customer
-within a short time window.
+This module provides a bounded LRU cache with a TTL that stores customer
+memory data, reducing the need for repeated OpenSearch queries for the same
+customer within a short time window. Entries are spread over independently
+locked shards, expired entries are swept by a background thread, and
+concurrent misses for the same customer share a single OpenSearch query.
 """
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import os
 import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional
+
+MEMORY_CACHE_TTL_SECONDS = float(os.getenv('MEMORY_CACHE_TTL_SECONDS', '300'))
+MEMORY_CACHE_MAX_ENTRIES = int(os.getenv('MEMORY_CACHE_MAX_ENTRIES', '10000'))
+MEMORY_CACHE_SHARDS = int(os.getenv('MEMORY_CACHE_SHARDS', '16'))
+MEMORY_CACHE_SWEEP_SECONDS = float(os.getenv('MEMORY_CACHE_SWEEP_SECONDS', '60'))
+# Number of recent load latencies kept for the percentiles in get_stats
+LATENCY_SAMPLES = 1024
+
+
+class _Load:
+    """A load in progress; concurrent misses for the key wait on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        # Set when the key is written or invalidated during the load
+        self.superseded = False
+
+
+class _Shard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self.loads: Dict[str, _Load] = {}
+
+
+def _percentile(sorted_values: list, percent: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
 
 
 class MemoryCache:
-    """Thread-safe TTL cache for customer preferences."""
+    """
+    Thread-safe, sharded LRU cache with TTL for customer preferences.
+
+    Customer IDs are normalized to strings, so the int ID in the graph state
+    and the str ID used when writing memory share one entry.
+    """
 
-    def __init__(self, ttl_seconds: int = 300):
+    def __init__(
+        self,
+        ttl_seconds: float = MEMORY_CACHE_TTL_SECONDS,
+        max_entries: int = MEMORY_CACHE_MAX_ENTRIES,
+        num_shards: int = MEMORY_CACHE_SHARDS,
+        sweep_interval: float = MEMORY_CACHE_SWEEP_SECONDS
+    ):
         """
         Initialize the memory cache.
 
         Args:
             ttl_seconds: Time-to-live for cached entries in seconds (default: 5 minutes)
+            max_entries: Maximum number of entries; each shard evicts its least recently used
+            num_shards: Number of independently locked shards
+            sweep_interval: Seconds between background sweeps of expired entries (0 disables)
         """
         self.ttl_seconds = ttl_seconds
-        self._cache: Dict[str, tuple[Any, datetime]] = {}
-        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._shards = [_Shard() for _ in range(max(1, num_shards))]
+        self._shard_capacity = max(1, -(-max_entries // len(self._shards)))
+        self._stats_lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeping = threading.Event()
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
         self._hits = 0
         self._misses = 0
+        self._loads = 0
+        self._coalesced = 0
+        self._load_errors = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._load_latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def _shard(self, customer_id: str) -> _Shard:
+        return self._shards[hash(customer_id) % len(self._shards)]
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _lookup(self, shard: _Shard, customer_id: str) -> tuple[bool, Any]:
+        """Return (found, value) for a fresh entry; caller holds shard.lock."""
+        entry = shard.entries.get(customer_id)
+        if entry is None:
+            return False, None
+        if time.monotonic() - entry[1] > self.ttl_seconds:
+            del shard.entries[customer_id]
+            self._count('_expirations')
+            return False, None
+        shard.entries.move_to_end(customer_id)
+        return True, entry[0]
 
-    def get(self, customer_id: str) -> Optional[str]:
+    def _store(self, shard: _Shard, customer_id: str, memory_data: Any) -> None:
+        """Insert an entry and evict over capacity; caller holds shard.lock."""
+        shard.entries[customer_id] = (memory_data, time.monotonic())
+        shard.entries.move_to_end(customer_id)
+        evicted = 0
+        while len(shard.entries) > self._shard_capacity:
+            shard.entries.popitem(last=False)
+            evicted += 1
+        if evicted:
+            self._count('_evictions', evicted)
+        self._start_sweeper()
+
+    def get(self, customer_id: str) -> Optional[Any]:
         """
         Retrieve customer memory from cache if available and not expired.
 
@@ -35,26 +128,71 @@ class MemoryCache:
             customer_id: The customer ID to lookup
 
         Returns:
-            Cached memory string if available and fresh, None otherwise
+            Cached memory data if available and fresh, None otherwise
         """
-        with self._lock:
-            if customer_id not in self._cache:
-                self._misses += 1
-                return None
+        customer_id = str(customer_id)
+        shard = self._shard(customer_id)
+        with shard.lock:
+            found, value = self._lookup(shard, customer_id)
+        self._count('_hits' if found else '_misses')
+        return value
 
-            cached_data, timestamp = self._cache[customer_id]
+    def get_or_load(self, customer_id: str, loader: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Return cached memory, or load it once for all concurrent callers.
 
-            # Check if cache entry has expired
-            if datetime.now() - timestamp > timedelta(seconds=self.ttl_seconds):
-                # Remove expired entry
-                del self._cache[customer_id]
-                self._misses += 1
-                return None
+        On a miss the first caller runs loader() while later callers for the
+        same customer wait for its result instead of querying OpenSearch
+        themselves. A None result is returned but not cached.
 
-            self._hits += 1
-            return cached_data
+        Args:
+            customer_id: The customer ID to lookup
+            loader: Loads the memory data on a miss
 
-    def set(self, customer_id: str, memory_data: str) -> None:
+        Returns:
+            Cached or loaded memory data, or None
+        """
+        customer_id = str(customer_id)
+        shard = self._shard(customer_id)
+        with shard.lock:
+            found, value = self._lookup(shard, customer_id)
+            if not found:
+                load = shard.loads.get(customer_id)
+                leader = load is None
+                if leader:
+                    load = shard.loads[customer_id] = _Load()
+        self._count('_hits' if found else '_misses')
+        if found:
+            return value
+
+        if not leader:
+            self._count('_coalesced')
+            load.done.wait()
+            if load.error is not None:
+                raise load.error
+            return load.result
+
+        start = time.perf_counter()
+        try:
+            load.result = loader()
+        except BaseException as e:
+            load.error = e
+            self._count('_load_errors')
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self._loads += 1
+                self._load_latencies.append(elapsed)
+            with shard.lock:
+                del shard.loads[customer_id]
+                # A write or invalidation during the load is newer than what was loaded
+                if load.error is None and load.result is not None and not load.superseded:
+                    self._store(shard, customer_id, load.result)
+            load.done.set()
+        return load.result
+
+    def set(self, customer_id: str, memory_data: Any) -> None:
         """
         Store customer memory in cache with current timestamp.
 
@@ -62,8 +200,12 @@ class MemoryCache:
             customer_id: The customer ID
             memory_data: The memory data to cache
         """
-        with self._lock:
-            self._cache[customer_id] = (memory_data, datetime.now())
+        customer_id = str(customer_id)
+        shard = self._shard(customer_id)
+        with shard.lock:
+            self._store(shard, customer_id, memory_data)
+            if customer_id in shard.loads:
+                shard.loads[customer_id].superseded = True
 
     def invalidate(self, customer_id: str) -> None:
         """
@@ -72,37 +214,57 @@ class MemoryCache:
         Args:
             customer_id: The customer ID to invalidate
         """
-        with self._lock:
-            if customer_id in self._cache:
-                del self._cache[customer_id]
+        customer_id = str(customer_id)
+        shard = self._shard(customer_id)
+        with shard.lock:
+            shard.entries.pop(customer_id, None)
+            if customer_id in shard.loads:
+                shard.loads[customer_id].superseded = True
 
     def clear(self) -> None:
         """Clear all cached entries."""
-        with self._lock:
-            self._cache.clear()
-            self._hits = 0
-            self._misses = 0
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                for load in shard.loads.values():
+                    load.superseded = True
+        with self._stats_lock:
+            self._reset_stats()
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
 
     def get_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics.
 
         Returns:
-            Dictionary with cache hit rate and other metrics
+            Dictionary with cache hit rate, load latency percentiles and other metrics
         """
-        with self._lock:
+        with self._stats_lock:
             total_requests = self._hits + self._misses
             hit_rate = (self._hits / total_requests * 100) if total_requests > 0 else 0
+            latencies = sorted(self._load_latencies)
 
-            return {
+            stats = {
                 "hits": self._hits,
                 "misses": self._misses,
                 "total_requests": total_requests,
                 "hit_rate_percent": round(hit_rate, 2),
-                "cache_size": len(self._cache),
+                "loads": self._loads,
+                "coalesced_loads": self._coalesced,
+                "load_errors": self._load_errors,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "cache_size": len(self),
+                "max_entries": self.max_entries,
                 "ttl_seconds": self.ttl_seconds
             }
 
+        for percent in (50, 95, 99):
+            stats[f"load_p{percent}_ms"] = round(_percentile(latencies, percent) * 1000, 2) if latencies else 0
+        return stats
+
     def cleanup_expired(self) -> int:
         """
         Remove all expired entries from cache.
@@ -110,21 +272,40 @@ class MemoryCache:
         Returns:
             Number of entries removed
         """
-        with self._lock:
-            current_time = datetime.now()
-            expired_keys = [
-                key for key, (_, timestamp) in self._cache.items()
-                if current_time - timestamp > timedelta(seconds=self.ttl_seconds)
-            ]
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                cutoff = time.monotonic() - self.ttl_seconds
+                expired_keys = [key for key, (_, timestamp) in shard.entries.items() if timestamp < cutoff]
+                for key in expired_keys:
+                    del shard.entries[key]
+            removed += len(expired_keys)
+
+        if removed:
+            self._count('_expirations', removed)
+        return removed
+
+    def _start_sweeper(self) -> None:
+        # Started on the first write so idle caches don't own a thread
+        if self._sweeper is None and self.sweep_interval > 0:
+            with self._stats_lock:
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(target=self._sweep, name="memory-cache-sweeper", daemon=True)
+                    self._sweeper.start()
 
-            for key in expired_keys:
-                del self._cache[key]
+    def _sweep(self) -> None:
+        while not self._stop_sweeping.wait(self.sweep_interval):
+            removed = self.cleanup_expired()
+            if removed:
+                print(f"[MemoryCache] Swept {removed} expired entries")
 
-            return len(expired_keys)
+    def close(self) -> None:
+        """Stop the background sweeper."""
+        self._stop_sweeping.set()
 
 
 # Global cache instance
-_customer_memory_cache = MemoryCache(ttl_seconds=300)  # 5 minutes default
+_customer_memory_cache = MemoryCache()
 
 
 def get_customer_memory_cache() -> MemoryCache:
@@ -0,0 +1,140 @@
+"""
+Write-behind queue for customer memory updates.
+
+Extracting preferences with the LLM and persisting them to OpenSearch takes
+seconds, so it runs on background worker threads instead of at the end of
+the agent's turn. Updates are coalesced per customer: while an update waits
+or runs, a newer one for the same customer is merged into any still-waiting
+update, and updates for one customer never run concurrently.
+"""
+
+import atexit
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Optional
+
+MEMORY_WRITE_WORKERS = int(os.getenv('MEMORY_WRITE_WORKERS', '2'))
+# How long process exit waits for queued updates to be written
+MEMORY_WRITE_DRAIN_SECONDS = float(os.getenv('MEMORY_WRITE_DRAIN_SECONDS', '30'))
+
+
+class WriteBehindQueue:
+    """Runs coalesced jobs per key on background threads, one at a time per key."""
+
+    def __init__(self, workers: int = MEMORY_WRITE_WORKERS):
+        """
+        Initialize the queue.
+
+        Args:
+            workers: Number of background worker threads
+        """
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._work_ready = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._pending: Dict[Hashable, tuple[Callable, tuple]] = {}
+        self._ready: deque = deque()
+        self._running: set = set()
+        self._threads: list[threading.Thread] = []
+        self._submitted = 0
+        self._coalesced = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _start_workers(self) -> None:
+        # Started lazily so importing the module doesn't spawn threads
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"memory-writer-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable,
+        *args: Any,
+        merge: Optional[Callable[[tuple, tuple], tuple]] = None
+    ) -> None:
+        """
+        Queue fn(*args) to run in the background, coalesced with a queued job for the same key.
+
+        Args:
+            key: Coalescing key, e.g. the customer ID
+            fn: Job to run
+            args: Arguments for the job
+            merge: Combines the queued job's args with these into the args to run;
+                without it the queued job is replaced
+        """
+        with self._lock:
+            self._start_workers()
+            self._submitted += 1
+            if key in self._pending:
+                self._coalesced += 1
+                if merge is not None:
+                    args = merge(self._pending[key][1], args)
+            elif key not in self._running:
+                self._ready.append(key)
+                self._work_ready.notify()
+            # A key that is running is re-queued by its worker when it finishes
+            self._pending[key] = (fn, args)
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                while not self._ready:
+                    self._work_ready.wait()
+                key = self._ready.popleft()
+                fn, args = self._pending.pop(key)
+                self._running.add(key)
+
+            try:
+                fn(*args)
+                failed = False
+            except Exception as e:
+                print(f"[MemoryWriter] Update for {key} failed: {e}")
+                failed = True
+
+            with self._lock:
+                self._running.discard(key)
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+                if key in self._pending:
+                    self._ready.append(key)
+                    self._work_ready.notify()
+                if not self._pending and not self._running:
+                    self._idle.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued update has been written.
+
+        Returns:
+            True if the queue drained within the timeout
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._pending and not self._running, timeout=timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics."""
+        with self._lock:
+            return {
+                "submitted": self._submitted,
+                "coalesced": self._coalesced,
+                "completed": self._completed,
+                "failed": self._failed,
+                "queued": len(self._pending),
+                "running": len(self._running),
+            }
+
+
+_memory_writer = WriteBehindQueue()
+atexit.register(_memory_writer.flush, MEMORY_WRITE_DRAIN_SECONDS)
+
+
+def get_memory_writer() -> WriteBehindQueue:
+    """Get the global memory write-behind queue."""
+    return _memory_writer
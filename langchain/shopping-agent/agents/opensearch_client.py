@@ -3,27 +3,40 @@ OpenSearch client utilities for shopping agent.
 Supports both local Docker OpenSearch and Amazon OpenSearch Service 3.1.
 """
 
+import asyncio
 import os
+import threading
 import time
 from typing import Optional, Dict, Any, List
 from urllib.parse import urlparse
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests_aws4auth import AWS4Auth
+from opensearchpy import OpenSearch, RequestsHttpConnection, RequestsAWSV4SignerAuth
 import boto3
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-def get_opensearch_client() -> OpenSearch:
+# Connections kept alive per OpenSearch node, shared by all tool calls in the process
+OPENSEARCH_POOL_MAXSIZE = int(os.getenv('OPENSEARCH_POOL_MAXSIZE', '20'))
+OPENSEARCH_TIMEOUT = int(os.getenv('OPENSEARCH_TIMEOUT', '60'))
+
+_client: Optional[OpenSearch] = None
+_client_lock = threading.Lock()
+# AsyncOpenSearch holds an aiohttp session, which is tied to the event loop it was created on
+_async_clients: Dict[asyncio.AbstractEventLoop, Any] = {}
+
+
+def _connection_settings() -> Dict[str, Any]:
     """
-    Initialize OpenSearch client with environment configuration.
+    Resolve host, TLS and authentication settings from the environment.
     Automatically detects and configures for either:
     - Local Docker OpenSearch (no auth)
     - Amazon OpenSearch Service 3.1 (with AWS IAM or basic auth)
 
-    Returns:
-        OpenSearch: Configured OpenSearch client
+    For IAM, the returned 'aws_auth' holds botocore credentials; requests are
+    signed with SigV4 one at a time, so refreshable credentials (instance or
+    task roles, SSO) are renewed automatically instead of expiring in a
+    long-lived client.
     """
     host = os.getenv('OPENSEARCH_HOST', 'localhost')
     port = int(os.getenv('OPENSEARCH_PORT', '9200'))
@@ -37,67 +50,112 @@ def get_opensearch_client() -> OpenSearch:
     hostname = host if '://' not in host else urlparse(f'https://{host}' if not host.startswith(('http://', 'https://')) else host).hostname or host
     is_aws_opensearch = hostname.endswith('.es.amazonaws.com') or hostname.endswith('.aoss.amazonaws.com')
 
-    if is_aws_opensearch:
-        # Amazon OpenSearch Service configuration
-        region = os.getenv('AWS_REGION_NAME', 'us-east-1')
-
-        # Try AWS IAM authentication first
-        if os.getenv('AWS_ACCESS_KEY_ID') and os.getenv('AWS_SECRET_ACCESS_KEY'):
-            credentials = boto3.Session(
-                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                region_name=region
-            ).get_credentials()
-
-            awsauth = AWS4Auth(
-                credentials.access_key,
-                credentials.secret_key,
-                region,
-                'es',
-                session_token=credentials.token
-            )
-
-            return OpenSearch(
-                hosts=[{'host': host, 'port': port}],
-                http_auth=awsauth,
-                use_ssl=True,
-                verify_certs=True,
-                connection_class=RequestsHttpConnection,
-                timeout=60,
-                max_retries=3,
-                retry_on_timeout=True
-            )
+    settings = {
+        'hosts': [{'host': host, 'port': port}],
+        'use_ssl': use_ssl,
+        'verify_certs': verify_certs,
+        'timeout': OPENSEARCH_TIMEOUT,
+    }
 
-        # Fall back to basic auth if provided
-        elif username and password:
-            return OpenSearch(
-                hosts=[{'host': host, 'port': port}],
-                http_auth=(username, password),
-                use_ssl=True,
-                verify_certs=verify_certs,
-                connection_class=RequestsHttpConnection,
-                timeout=60,
-                max_retries=3,
-                retry_on_timeout=True
-            )
-        else:
+    if not is_aws_opensearch:
+        # Local Docker OpenSearch configuration
+        settings['http_auth'] = (username, password) if username and password else None
+        return settings
+
+    # Amazon OpenSearch Service configuration
+    region = os.getenv('AWS_REGION_NAME', 'us-east-1')
+    settings.update(max_retries=3, retry_on_timeout=True)
+
+    # Try AWS IAM authentication first
+    if os.getenv('AWS_ACCESS_KEY_ID') and os.getenv('AWS_SECRET_ACCESS_KEY'):
+        credentials = boto3.Session(
+            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+            aws_session_token=os.getenv('AWS_SESSION_TOKEN') or None,
+            region_name=region
+        ).get_credentials()
+    # Fall back to basic auth if provided
+    elif username and password:
+        settings.update(http_auth=(username, password), use_ssl=True)
+        return settings
+    else:
+        # Default credential chain (instance profile, task role, SSO, ...)
+        credentials = boto3.Session(region_name=region).get_credentials()
+        if credentials is None:
             raise ValueError(
                 "For Amazon OpenSearch Service, provide either AWS credentials "
                 "(AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY) or basic auth "
                 "(OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD)"
             )
-    else:
-        # Local Docker OpenSearch configuration
-        auth = (username, password) if username and password else None
-
-        return OpenSearch(
-            hosts=[{'host': host, 'port': port}],
-            http_auth=auth,
-            use_ssl=use_ssl,
-            verify_certs=verify_certs,
-            connection_class=RequestsHttpConnection,
-            timeout=60
+
+    service = 'aoss' if hostname.endswith('.aoss.amazonaws.com') else 'es'
+    settings.update(aws_auth=(credentials, region, service), use_ssl=True, verify_certs=True)
+    return settings
+
+
+def get_opensearch_client() -> OpenSearch:
+    """
+    Get the process-wide OpenSearch client, creating it on first use.
+
+    The client and its pool of keep-alive connections are shared by every
+    caller, so tool calls don't pay for a new TCP/TLS handshake and
+    credential lookup each time.
+
+    Returns:
+        OpenSearch: Configured OpenSearch client
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                settings = _connection_settings()
+                aws_auth = settings.pop('aws_auth', None)
+                if aws_auth:
+                    settings['http_auth'] = RequestsAWSV4SignerAuth(*aws_auth)
+                _client = OpenSearch(
+                    **settings,
+                    connection_class=RequestsHttpConnection,
+                    pool_maxsize=OPENSEARCH_POOL_MAXSIZE
+                )
+    return _client
+
+
+def get_async_opensearch_client():
+    """
+    Get the AsyncOpenSearch client for the running event loop, creating it on first use.
+
+    Lets concurrent tool calls issue their queries in parallel over a shared
+    aiohttp connection pool. Requires the aiohttp package.
+
+    Returns:
+        AsyncOpenSearch: Configured async OpenSearch client
+    """
+    from opensearchpy import AsyncOpenSearch, AsyncHttpConnection, AWSV4SignerAsyncAuth
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        settings = _connection_settings()
+        aws_auth = settings.pop('aws_auth', None)
+        if aws_auth:
+            settings['http_auth'] = AWSV4SignerAsyncAuth(*aws_auth)
+        client = AsyncOpenSearch(
+            **settings,
+            connection_class=AsyncHttpConnection,
+            maxsize=OPENSEARCH_POOL_MAXSIZE
         )
+        # Drop clients of loops that have been closed
+        for stale_loop in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[stale_loop]
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_opensearch_client():
+    """Close the async client of the running event loop, if any."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
 
 
 def register_and_deploy_model(client: OpenSearch) -> tuple[str, int]:
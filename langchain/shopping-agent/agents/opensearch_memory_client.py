@@ -120,9 +120,15 @@ class OpenSearchMemoryClient:
             if not memory_id:
                 raise ValueError(f"No memory_id or working_memory_id returned from OpenSearch. Response: {response}")
 
-            # Invalidate cache since preferences were updated
-            self.cache.invalidate(customer_id)
-            print(f"[MemoryCache] Invalidated cache for customer_id={customer_id}")
+            # Write through so reads see the new preferences before the
+            # working-memory index is refreshed
+            self.cache.set(customer_id, {
+                'preferences': preferences,
+                'updated_at': memory_data['metadata']['updated_at'],
+                'memory_id': memory_id,
+                'namespace': memory_data['namespace']
+            })
+            print(f"[MemoryCache] Updated cache for customer_id={customer_id}")
 
             return memory_id
 
@@ -151,17 +157,22 @@ class OpenSearchMemoryClient:
             >>> if memory:
             ...     print(memory['preferences']['music_preferences'])
         """
-        # Check cache first (only for non-session-specific queries)
-        cache_key = f"{customer_id}:{session_id}" if session_id else customer_id
-
-        if not session_id:  # Only cache non-session-specific queries
-            cached_memory = self.cache.get(cache_key)
-            if cached_memory is not None:
-                print(f"[MemoryCache] Hit for customer_id={customer_id}")
-                return cached_memory
-            else:
-                print(f"[MemoryCache] Miss for customer_id={customer_id}")
+        if session_id:  # Only cache non-session-specific queries
+            return self._query_customer_memory(customer_id, session_id)
+
+        def load():
+            print(f"[MemoryCache] Miss for customer_id={customer_id}")
+            return self._query_customer_memory(customer_id)
 
+        # Concurrent misses for the same customer share one query
+        return self.cache.get_or_load(customer_id, load)
+
+    def _query_customer_memory(
+        self,
+        customer_id: str,
+        session_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Query the most recent memory for a customer, bypassing the cache."""
         try:
             # Query the underlying system index directly
             # Memories are stored in .plugins-ml-am-{index_prefix}-memory-working
@@ -220,19 +231,13 @@ class OpenSearchMemoryClient:
                     import json
                     preferences = json.loads(preferences)
 
-                result = {
+                return {
                     'preferences': preferences,
                     'updated_at': memory_doc.get('last_updated_time'),
                     'memory_id': hits[0]['_id'],
                     'namespace': memory_doc.get('namespace', {})
                 }
 
-                # Cache the result (only for non-session-specific queries)
-                if not session_id:
-                    self.cache.set(cache_key, result)
-
-                return result
-
             return None
 
         except Exception as e:
@@ -353,6 +358,7 @@ class OpenSearchMemoryClient:
                         f'/_plugins/_ml/memory_containers/{self.memory_container_id}/memories/{memory_id}'
                     )
 
+            self.cache.invalidate(customer_id)
             return True
 
         except Exception as e:
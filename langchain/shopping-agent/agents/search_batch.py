@@ -0,0 +1,162 @@
+"""
+Coalesces concurrent product searches into OpenSearch multi-search requests.
+
+When the LLM fires several product tools in one turn, their searches run at
+the same time. Instead of one HTTP request each, searches arriving within a
+short window are sent together as a single `_msearch` call and the responses
+are handed back to their callers.
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict, List
+
+MSEARCH_WINDOW_MS = float(os.getenv('OPENSEARCH_MSEARCH_WINDOW_MS', '10'))
+MSEARCH_MAX_BATCH = int(os.getenv('OPENSEARCH_MSEARCH_MAX_BATCH', '20'))
+
+
+class SearchFailed(RuntimeError):
+    """A search in a multi-search batch returned an error."""
+
+
+def _msearch_body(requests: List[tuple[str, dict]]) -> List[dict]:
+    lines = []
+    for index, body in requests:
+        lines.append({"index": index})
+        lines.append(body)
+    return lines
+
+
+def _split_responses(response: dict, count: int) -> List[Any]:
+    """Per-search response, or a SearchFailed for searches that errored."""
+    responses = response.get('responses', [])
+    if len(responses) != count:
+        error = SearchFailed(f"_msearch returned {len(responses)} responses for {count} searches")
+        return [error] * count
+    return [SearchFailed(str(item['error'])) if 'error' in item else item for item in responses]
+
+
+class _PendingSearch:
+    def __init__(self, index: str, body: dict):
+        self.index = index
+        self.body = body
+        self.done = threading.Event()
+        self.result: Any = None
+
+
+class SearchBatcher:
+    """
+    Thread-based coalescer for the sync OpenSearch client.
+
+    The first search in a window waits for up to MSEARCH_WINDOW_MS (or until
+    the batch is full) and then runs the whole batch; the other callers block
+    until their response is ready.
+    """
+
+    def __init__(self, window_ms: float = MSEARCH_WINDOW_MS, max_batch: int = MSEARCH_MAX_BATCH):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._batch_full = threading.Condition(self._lock)
+        self._pending: Dict[int, List[_PendingSearch]] = {}
+
+    def search(self, client, index: str, body: dict) -> dict:
+        if self.window <= 0:
+            return client.search(index=index, body=body)
+
+        request = _PendingSearch(index, body)
+        with self._lock:
+            batch = self._pending.get(id(client))
+            leader = batch is None
+            if leader:
+                batch = self._pending[id(client)] = []
+            batch.append(request)
+            if len(batch) >= self.max_batch:
+                self._batch_full.notify_all()
+            if leader:
+                self._batch_full.wait_for(lambda: len(batch) >= self.max_batch, timeout=self.window)
+                del self._pending[id(client)]
+
+        if leader:
+            self._run(client, batch)
+        else:
+            request.done.wait()
+        if isinstance(request.result, Exception):
+            raise request.result
+        return request.result
+
+    def _run(self, client, batch: List[_PendingSearch]):
+        try:
+            if len(batch) == 1:
+                results = [client.search(index=batch[0].index, body=batch[0].body)]
+            else:
+                response = client.msearch(body=_msearch_body([(r.index, r.body) for r in batch]))
+                results = _split_responses(response, len(batch))
+        except Exception as e:
+            results = [e] * len(batch)
+        for request, result in zip(batch, results):
+            request.result = result
+            request.done.set()
+
+
+class AsyncSearchBatcher:
+    """
+    asyncio coalescer for the AsyncOpenSearch client.
+
+    Searches are queued on the event loop and flushed by a timer MSEARCH_WINDOW_MS
+    after the first one, or as soon as the batch is full.
+    """
+
+    def __init__(self, window_ms: float = MSEARCH_WINDOW_MS, max_batch: int = MSEARCH_MAX_BATCH):
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        # Futures and timers belong to one event loop, so batches are kept per loop and client
+        self._pending: Dict[tuple, List[tuple[str, dict, asyncio.Future]]] = {}
+        self._timers: Dict[tuple, asyncio.TimerHandle] = {}
+
+    async def search(self, client, index: str, body: dict) -> dict:
+        if self.window <= 0:
+            return await client.search(index=index, body=body)
+
+        loop = asyncio.get_running_loop()
+        key = (loop, id(client))
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((index, body, future))
+        if len(batch) >= self.max_batch:
+            self._flush(key, client)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key, client)
+        return await future
+
+    def _flush(self, key: tuple, client):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = key[0].create_task(self._run(client, batch))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _run(self, client, batch: List[tuple[str, dict, asyncio.Future]]):
+        try:
+            if len(batch) == 1:
+                index, body, _ = batch[0]
+                results = [await client.search(index=index, body=body)]
+            else:
+                response = await client.msearch(body=_msearch_body([(index, body) for index, body, _ in batch]))
+                results = _split_responses(response, len(batch))
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue  # Caller was cancelled
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+search_batcher = SearchBatcher()
+async_search_batcher = AsyncSearchBatcher()
@@ -0,0 +1,236 @@
+"""
+Client-side caches for product search.
+
+Neural queries make OpenSearch run the embedding model on every call. Query
+embeddings are cached here per normalized query text, so repeated searches
+send a precomputed vector in a `knn` clause instead. Full search responses
+are cached for a short time as well, keyed by index and search body, and
+dropped whenever the index has changed since they were stored.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from agents.search_batch import async_search_batcher, search_batcher
+
+EMBEDDING_CACHE_SIZE = int(os.getenv('OPENSEARCH_EMBEDDING_CACHE_SIZE', '2048'))
+EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv('OPENSEARCH_EMBEDDING_CACHE_TTL_SECONDS', '3600'))
+RESULT_CACHE_SIZE = int(os.getenv('OPENSEARCH_RESULT_CACHE_SIZE', '512'))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv('OPENSEARCH_RESULT_CACHE_TTL_SECONDS', '30'))
+# How often the index's write/refresh counters are checked to invalidate cached results
+INDEX_GENERATION_CHECK_SECONDS = float(os.getenv('OPENSEARCH_INDEX_GENERATION_CHECK_SECONDS', '5'))
+
+
+class LRUTTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl_seconds."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept; the least recently used is evicted
+            ttl_seconds: Time-to-live for entries in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries over capacity."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Clear all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            total_requests = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total_requests * 100, 2) if total_requests else 0,
+            }
+
+
+embedding_cache = LRUTTLCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL_SECONDS)
+result_cache = LRUTTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
+# index -> (generation, checked_at)
+_index_generations: Dict[str, tuple[Any, float]] = {}
+
+
+def normalize_query_text(text: str) -> str:
+    """Collapse whitespace and case; the embedding model is uncased."""
+    return " ".join(text.lower().split())
+
+
+def _embedding_request(model_id: str, text: str) -> tuple[str, dict]:
+    path = f'/_plugins/_ml/_predict/text_embedding/{model_id}'
+    body = {
+        "text_docs": [text],
+        "return_number": True,
+        "target_response": ["sentence_embedding"]
+    }
+    return path, body
+
+
+def _embedding_from_response(response: dict) -> List[float]:
+    return response['inference_results'][0]['output'][0]['data']
+
+
+def vector_clause(field: str, query_text: str, model_id: str, k: int, vector: Optional[List[float]]) -> dict:
+    """
+    kNN clause with a precomputed query vector, or the equivalent neural
+    clause (embedded by OpenSearch) when no vector is available.
+    """
+    if vector is not None:
+        return {"knn": {field: {"vector": vector, "k": k}}}
+    return {"neural": {field: {"query_text": query_text, "model_id": model_id, "k": k}}}
+
+
+def embed_query(client, model_id: Optional[str], text: str) -> Optional[List[float]]:
+    """
+    Embed text with the deployed model, once per normalized text.
+
+    Returns None if the model isn't configured or inference fails, so callers
+    fall back to a neural query.
+    """
+    if not model_id:
+        return None
+    text = normalize_query_text(text)
+    key = (model_id, text)
+    vector = embedding_cache.get(key)
+    if vector is None:
+        try:
+            path, body = _embedding_request(model_id, text)
+            vector = _embedding_from_response(client.transport.perform_request('POST', path, body=body))
+        except Exception as e:
+            print(f"Query embedding failed, falling back to neural search: {e}")
+            return None
+        embedding_cache.set(key, vector)
+    return vector
+
+
+async def aembed_query(client, model_id: Optional[str], text: str) -> Optional[List[float]]:
+    """Async version of embed_query."""
+    if not model_id:
+        return None
+    text = normalize_query_text(text)
+    key = (model_id, text)
+    vector = embedding_cache.get(key)
+    if vector is None:
+        try:
+            path, body = _embedding_request(model_id, text)
+            vector = _embedding_from_response(await client.transport.perform_request('POST', path, body=body))
+        except Exception as e:
+            print(f"Query embedding failed, falling back to neural search: {e}")
+            return None
+        embedding_cache.set(key, vector)
+    return vector
+
+
+def _result_key(index: str, body: dict) -> str:
+    return hashlib.sha256(f"{index}\x1f{json.dumps(body, sort_keys=True)}".encode('utf-8')).hexdigest()
+
+
+def _generation_from_stats(stats: dict) -> Any:
+    primaries = stats['_all']['primaries']
+    return (
+        primaries.get('indexing', {}).get('index_total'),
+        primaries.get('indexing', {}).get('delete_total'),
+        primaries.get('refresh', {}).get('total'),
+    )
+
+
+def _cached_generation(index: str) -> tuple[bool, Any]:
+    entry = _index_generations.get(index)
+    if entry is not None and time.monotonic() - entry[1] < INDEX_GENERATION_CHECK_SECONDS:
+        return True, entry[0]
+    return False, None
+
+
+def _update_generation(index: str, generation: Any) -> None:
+    previous = _index_generations.get(index)
+    if previous is not None and previous[0] != generation:
+        # The index was written to or refreshed: cached results may be stale
+        result_cache.clear()
+    _index_generations[index] = (generation, time.monotonic())
+
+
+def _index_generation(client, index: str) -> Any:
+    fresh, generation = _cached_generation(index)
+    if not fresh:
+        try:
+            generation = _generation_from_stats(client.indices.stats(index=index, metric='indexing,refresh'))
+        except Exception:
+            generation = None  # Stats unavailable (e.g. serverless): rely on the TTL alone
+        _update_generation(index, generation)
+    return generation
+
+
+async def _aindex_generation(client, index: str) -> Any:
+    fresh, generation = _cached_generation(index)
+    if not fresh:
+        try:
+            generation = _generation_from_stats(await client.indices.stats(index=index, metric='indexing,refresh'))
+        except Exception:
+            generation = None
+        _update_generation(index, generation)
+    return generation
+
+
+def cached_search(client, index: str, body: dict) -> dict:
+    """client.search with a short-lived result cache, invalidated when the index changes."""
+    key = (_result_key(index, body), _index_generation(client, index))
+    response = result_cache.get(key)
+    if response is None:
+        # Concurrent misses are coalesced into one _msearch request
+        response = search_batcher.search(client, index, body)
+        result_cache.set(key, response)
+    return response
+
+
+async def acached_search(client, index: str, body: dict) -> dict:
+    """Async version of cached_search."""
+    key = (_result_key(index, body), await _aindex_generation(client, index))
+    response = result_cache.get(key)
+    if response is None:
+        response = await async_search_batcher.search(client, index, body)
+        result_cache.set(key, response)
+    return response
+
+
+def clear_search_caches() -> None:
+    """Drop cached embeddings and results, e.g. after reloading the catalog or redeploying the model."""
+    embedding_cache.clear()
+    result_cache.clear()
+    _index_generations.clear()
@@ -5,82 +5,95 @@ from agents.utils import db
 # Opensearch E-commerce Agent Tools
 # ------------------------------------------------------------
 import os
-from agents.opensearch_client import get_opensearch_client
+from agents.opensearch_client import get_opensearch_client, get_async_opensearch_client
+from agents.search_cache import acached_search, aembed_query, cached_search, embed_query, vector_clause
 
-@tool
-def search_products_by_query(runtime: ToolRuntime, query: str, max_results: int = 10) -> list[dict]:
-    """
-    Search the product catalog using semantic/neural search via OpenSearch.
-    Returns product details matching the customer's query using AI-powered semantic understanding.
+# Each tool has a sync body and a native async one (attached as the tool's coroutine
+# below), so parallel tool calls in an async graph query OpenSearch concurrently over
+# the shared connection pool. Both build the same request. Query texts are embedded
+# client-side through a cache and sent as knn vectors, and search responses are
+# briefly cached (see agents/search_cache.py).
 
-    Args:
-        query: Natural language search query (e.g., "comfortable hiking backpack")
-        max_results: Maximum number of products to return (default: 10)
+def _products_index() -> str:
+    return os.getenv('OPENSEARCH_INDEX_PRODUCTS', 'shopping_products')
 
-    Returns:
-        list[dict]: List of matching products with relevance scores
-    """
+
+def _to_products(response: dict, with_score: bool) -> list[dict]:
+    products = []
+    for hit in response['hits']['hits']:
+        product = dict(hit['_source'])  # Responses may be shared through the result cache
+        if with_score:
+            product['relevance_score'] = round(hit['_score'], 2)
+        products.append(product)
+    return products
+
+
+def _search_products(search_body: dict, with_score: bool, error_label: str) -> list[dict]:
     client = get_opensearch_client()
+    try:
+        response = cached_search(client, _products_index(), search_body)
+        return _to_products(response, with_score)
+    except Exception as e:
+        return [{"error": f"{error_label}: {str(e)}"}]
+
+
+async def _asearch_products(search_body: dict, with_score: bool, error_label: str) -> list[dict]:
+    client = get_async_opensearch_client()
+    try:
+        response = await acached_search(client, _products_index(), search_body)
+        return _to_products(response, with_score)
+    except Exception as e:
+        return [{"error": f"{error_label}: {str(e)}"}]
+
+
+def _embed(text: str):
+    return embed_query(get_opensearch_client(), os.getenv('OPENSEARCH_MODEL_ID'), text)
+
+
+async def _aembed(text: str):
+    return await aembed_query(get_async_opensearch_client(), os.getenv('OPENSEARCH_MODEL_ID'), text)
+
+
+def _query_search_body(query: str, max_results: int, vector=None) -> dict:
     model_id = os.getenv('OPENSEARCH_MODEL_ID')
-    index_name = os.getenv('OPENSEARCH_INDEX_PRODUCTS', 'shopping_products')
 
-    # Perform neural search using the deployed ML model
-    search_body = {
+    # Perform semantic search with the deployed ML model's embedding of the query
+    return {
         "size": max_results,
-        "query": {
-            "neural": {
-                "product_vector": {
-                    "query_text": query,
-                    "model_id": model_id,
-                    "k": max_results * 2  # Get more candidates for better ranking
-                }
-            }
-        },
+        "query": vector_clause(
+            "product_vector", query, model_id,
+            max_results * 2,  # Get more candidates for better ranking
+            vector
+        ),
         "_source": {
             "excludes": ["product_vector"]  # Don't return the vector in results
         }
     }
 
-    try:
-        response = client.search(index=index_name, body=search_body)
-
-        products = []
-        for hit in response['hits']['hits']:
-            product = hit['_source']
-            product['relevance_score'] = round(hit['_score'], 2)
-            products.append(product)
-
-        return products
-    except Exception as e:
-        return [{"error": f"Search failed: {str(e)}"}]
-
 
 @tool
-def filter_products_by_category_and_price(
-    runtime: ToolRuntime,
-    category: str = None,
-    min_price: float = 0,
-    max_price: float = 10000,
-    promoted_only: bool = False,
-    max_results: int = 20
-) -> list[dict]:
+def search_products_by_query(runtime: ToolRuntime, query: str, max_results: int = 10) -> list[dict]:
     """
-    Filter and browse products by category, price range, and promotion status.
-    Use this for structured browsing when customers want to see products in a specific category or price range.
+    Search the product catalog using semantic/neural search via OpenSearch.
+    Returns product details matching the customer's query using AI-powered semantic understanding.
 
     Args:
-        category: Product category to filter by (e.g., "accessories", "electronics", "apparel")
-        min_price: Minimum price in dollars (default: 0)
-        max_price: Maximum price in dollars (default: 10000)
-        promoted_only: Only return promoted/featured products (default: False)
-        max_results: Maximum number of products to return (default: 20)
+        query: Natural language search query (e.g., "comfortable hiking backpack")
+        max_results: Maximum number of products to return (default: 10)
 
     Returns:
-        list[dict]: List of products matching the filters
+        list[dict]: List of matching products with relevance scores
     """
-    client = get_opensearch_client()
-    index_name = os.getenv('OPENSEARCH_INDEX_PRODUCTS', 'shopping_products')
+    search_body = _query_search_body(query, max_results, _embed(query))
+    return _search_products(search_body, True, "Search failed")
+
 
+async def _asearch_products_by_query(runtime: ToolRuntime, query: str, max_results: int = 10) -> list[dict]:
+    search_body = _query_search_body(query, max_results, await _aembed(query))
+    return await _asearch_products(search_body, True, "Search failed")
+
+
+def _filter_body(category: str, min_price: float, max_price: float, promoted_only: bool, max_results: int) -> dict:
     # Build filter query
     filters = []
 
@@ -93,7 +106,7 @@ def filter_products_by_category_and_price(
     if promoted_only:
         filters.append({"term": {"promoted": True}})
 
-    search_body = {
+    return {
         "size": max_results,
         "query": {
             "bool": {
@@ -109,42 +122,52 @@ def filter_products_by_category_and_price(
         }
     }
 
-    try:
-        response = client.search(index=index_name, body=search_body)
-
-        products = []
-        for hit in response['hits']['hits']:
-            products.append(hit['_source'])
-
-        return products
-    except Exception as e:
-        return [{"error": f"Filter failed: {str(e)}"}]
-
 
 @tool
-def get_product_recommendations(runtime: ToolRuntime, max_results: int = 5) -> list[dict]:
+def filter_products_by_category_and_price(
+    runtime: ToolRuntime,
+    category: str = None,
+    min_price: float = 0,
+    max_price: float = 10000,
+    promoted_only: bool = False,
+    max_results: int = 20
+) -> list[dict]:
     """
-    Get personalized product recommendations based on customer's preferences from their memory profile.
-    Uses hybrid search combining neural semantic search with keyword matching for best results.
-    Automatically filters by favorite colors, sizes, style preferences, and interests when available.
+    Filter and browse products by category, price range, and promotion status.
+    Use this for structured browsing when customers want to see products in a specific category or price range.
 
     Args:
-        max_results: Maximum number of recommendations (default: 5)
+        category: Product category to filter by (e.g., "accessories", "electronics", "apparel")
+        min_price: Minimum price in dollars (default: 0)
+        max_price: Maximum price in dollars (default: 10000)
+        promoted_only: Only return promoted/featured products (default: False)
+        max_results: Maximum number of products to return (default: 20)
 
     Returns:
-        list[dict]: List of recommended products with relevance scores
+        list[dict]: List of products matching the filters
     """
-    loaded_memory = runtime.state.get("loaded_memory", "")
+    search_body = _filter_body(category, min_price, max_price, promoted_only, max_results)
+    return _search_products(search_body, False, "Filter failed")
 
-    client = get_opensearch_client()
-    model_id = os.getenv('OPENSEARCH_MODEL_ID')
-    index_name = os.getenv('OPENSEARCH_INDEX_PRODUCTS', 'shopping_products')
 
-    # If no preferences, return promoted products
-    if not loaded_memory or loaded_memory.strip() == "" or loaded_memory == "No preferences stored yet":
-        return filter_products_by_category_and_price.invoke(
-            {"runtime": runtime, "promoted_only": True, "max_results": max_results}
-        )
+async def _afilter_products_by_category_and_price(
+    runtime: ToolRuntime,
+    category: str = None,
+    min_price: float = 0,
+    max_price: float = 10000,
+    promoted_only: bool = False,
+    max_results: int = 20
+) -> list[dict]:
+    search_body = _filter_body(category, min_price, max_price, promoted_only, max_results)
+    return await _asearch_products(search_body, False, "Filter failed")
+
+
+def _has_preferences(loaded_memory: str) -> bool:
+    return bool(loaded_memory and loaded_memory.strip() != "" and loaded_memory != "No preferences stored yet")
+
+
+def _recommendations_body(loaded_memory: str, max_results: int, vector=None) -> dict:
+    model_id = os.getenv('OPENSEARCH_MODEL_ID')
 
     # Parse preferences from loaded_memory to build smarter filters
     color_boost_query = None
@@ -163,15 +186,7 @@ def get_product_recommendations(runtime: ToolRuntime, max_results: int = 5) -> l
 
     # Build hybrid search: Neural + BM25 + Color preference boost
     should_clauses = [
-        {
-            "neural": {
-                "product_vector": {
-                    "query_text": loaded_memory,
-                    "model_id": model_id,
-                    "k": max_results * 3
-                }
-            }
-        },
+        vector_clause("product_vector", loaded_memory, model_id, max_results * 3, vector),
         {
             "multi_match": {
                 "query": loaded_memory,
@@ -186,7 +201,7 @@ def get_product_recommendations(runtime: ToolRuntime, max_results: int = 5) -> l
     if color_boost_query:
         should_clauses.append(color_boost_query)
 
-    search_body = {
+    return {
         "size": max_results,
         "query": {
             "bool": {
@@ -202,46 +217,42 @@ def get_product_recommendations(runtime: ToolRuntime, max_results: int = 5) -> l
         }
     }
 
-    try:
-        response = client.search(index=index_name, body=search_body)
-
-        products = []
-        for hit in response['hits']['hits']:
-            product = hit['_source']
-            product['relevance_score'] = round(hit['_score'], 2)
-            products.append(product)
-
-        return products
-    except Exception as e:
-        return [{"error": f"Recommendations failed: {str(e)}"}]
-
 
 @tool
-def search_products_by_preferences(
-    runtime: ToolRuntime,
-    colors: str = None,
-    style: str = None,
-    category: str = None,
-    max_results: int = 10
-) -> list[dict]:
+def get_product_recommendations(runtime: ToolRuntime, max_results: int = 5) -> list[dict]:
     """
-    Search products by specific preferences like color, style, and category.
-    Use this when the customer explicitly mentions they want products in specific colors or styles.
-    This tool performs semantic search weighted by the specified preferences.
+    Get personalized product recommendations based on customer's preferences from their memory profile.
+    Uses hybrid search combining neural semantic search with keyword matching for best results.
+    Automatically filters by favorite colors, sizes, style preferences, and interests when available.
 
     Args:
-        colors: Preferred colors (e.g., "blue", "black and red", "navy")
-        style: Style preference (e.g., "casual", "formal", "athletic", "vintage")
-        category: Product category (e.g., "apparel", "footwear", "accessories")
-        max_results: Maximum number of products to return (default: 10)
+        max_results: Maximum number of recommendations (default: 5)
 
     Returns:
-        list[dict]: List of matching products with relevance scores
+        list[dict]: List of recommended products with relevance scores
     """
-    client = get_opensearch_client()
-    model_id = os.getenv('OPENSEARCH_MODEL_ID')
-    index_name = os.getenv('OPENSEARCH_INDEX_PRODUCTS', 'shopping_products')
+    loaded_memory = runtime.state.get("loaded_memory", "")
+
+    # If no preferences, return promoted products
+    if not _has_preferences(loaded_memory):
+        return _search_products(_filter_body(None, 0, 10000, True, max_results), False, "Filter failed")
+
+    # The profile is the same on every turn, so its embedding is usually cached
+    search_body = _recommendations_body(loaded_memory, max_results, _embed(loaded_memory))
+    return _search_products(search_body, True, "Recommendations failed")
+
 
+async def _aget_product_recommendations(runtime: ToolRuntime, max_results: int = 5) -> list[dict]:
+    loaded_memory = runtime.state.get("loaded_memory", "")
+
+    if not _has_preferences(loaded_memory):
+        return await _asearch_products(_filter_body(None, 0, 10000, True, max_results), False, "Filter failed")
+
+    search_body = _recommendations_body(loaded_memory, max_results, await _aembed(loaded_memory))
+    return await _asearch_products(search_body, True, "Recommendations failed")
+
+
+def _preferences_query(colors: str, style: str, category: str) -> str:
     # Build search query from preferences
     query_parts = []
     if colors:
@@ -251,19 +262,16 @@ def search_products_by_preferences(
     if category:
         query_parts.append(category)
 
-    search_query = " ".join(query_parts) if query_parts else "featured products"
+    return " ".join(query_parts) if query_parts else "featured products"
+
+
+def _preferences_body(colors: str, style: str, category: str, max_results: int, vector=None) -> dict:
+    model_id = os.getenv('OPENSEARCH_MODEL_ID')
+    search_query = _preferences_query(colors, style, category)
 
     # Build OpenSearch query with preference boosting
     should_clauses = [
-        {
-            "neural": {
-                "product_vector": {
-                    "query_text": search_query,
-                    "model_id": model_id,
-                    "k": max_results * 2
-                }
-            }
-        }
+        vector_clause("product_vector", search_query, model_id, max_results * 2, vector)
     ]
 
     # Add specific color matching with high boost
@@ -291,7 +299,7 @@ def search_products_by_preferences(
     if category:
         filters.append({"term": {"category": category.lower()}})
 
-    search_body = {
+    return {
         "size": max_results,
         "query": {
             "bool": {
@@ -305,18 +313,44 @@ def search_products_by_preferences(
         }
     }
 
-    try:
-        response = client.search(index=index_name, body=search_body)
 
-        products = []
-        for hit in response['hits']['hits']:
-            product = hit['_source']
-            product['relevance_score'] = round(hit['_score'], 2)
-            products.append(product)
+@tool
+def search_products_by_preferences(
+    runtime: ToolRuntime,
+    colors: str = None,
+    style: str = None,
+    category: str = None,
+    max_results: int = 10
+) -> list[dict]:
+    """
+    Search products by specific preferences like color, style, and category.
+    Use this when the customer explicitly mentions they want products in specific colors or styles.
+    This tool performs semantic search weighted by the specified preferences.
 
-        return products
-    except Exception as e:
-        return [{"error": f"Preference search failed: {str(e)}"}]
+    Args:
+        colors: Preferred colors (e.g., "blue", "black and red", "navy")
+        style: Style preference (e.g., "casual", "formal", "athletic", "vintage")
+        category: Product category (e.g., "apparel", "footwear", "accessories")
+        max_results: Maximum number of products to return (default: 10)
+
+    Returns:
+        list[dict]: List of matching products with relevance scores
+    """
+    vector = _embed(_preferences_query(colors, style, category))
+    search_body = _preferences_body(colors, style, category, max_results, vector)
+    return _search_products(search_body, True, "Preference search failed")
+
+
+async def _asearch_products_by_preferences(
+    runtime: ToolRuntime,
+    colors: str = None,
+    style: str = None,
+    category: str = None,
+    max_results: int = 10
+) -> list[dict]:
+    vector = await _aembed(_preferences_query(colors, style, category))
+    search_body = _preferences_body(colors, style, category, max_results, vector)
+    return await _asearch_products(search_body, True, "Preference search failed")
 
 
 @tool
@@ -332,11 +366,10 @@ def get_product_by_id(runtime: ToolRuntime, product_id: str) -> dict:
         dict: Product details or error message
     """
     client = get_opensearch_client()
-    index_name = os.getenv('OPENSEARCH_INDEX_PRODUCTS', 'shopping_products')
 
     try:
         response = client.get(
-            index=index_name,
+            index=_products_index(),
             id=product_id,
             _source_excludes=["product_vector"]
         )
@@ -345,6 +378,27 @@ def get_product_by_id(runtime: ToolRuntime, product_id: str) -> dict:
         return {"error": f"Product {product_id} not found: {str(e)}"}
 
 
+async def _aget_product_by_id(runtime: ToolRuntime, product_id: str) -> dict:
+    client = get_async_opensearch_client()
+
+    try:
+        response = await client.get(
+            index=_products_index(),
+            id=product_id,
+            _source_excludes=["product_vector"]
+        )
+        return response['_source']
+    except Exception as e:
+        return {"error": f"Product {product_id} not found: {str(e)}"}
+
+
+search_products_by_query.coroutine = _asearch_products_by_query
+filter_products_by_category_and_price.coroutine = _afilter_products_by_category_and_price
+get_product_recommendations.coroutine = _aget_product_recommendations
+search_products_by_preferences.coroutine = _asearch_products_by_preferences
+get_product_by_id.coroutine = _aget_product_by_id
+
+
 # Export OpenSearch tools
 opensearch_tools = [
     search_products_by_query,